@@ -4,6 +4,8 @@ import st7p.timing
 import st7p.levels
 import st7p.config
 import st7p.vectors
+import st7p.cache
+import st7p.device
 import st7p.st7putils as st7putils  
 from collections import OrderedDict
 # TODO: How many unique labels processed? 
@@ -11,11 +13,18 @@ from collections import OrderedDict
 # TODO: Execution time? 
 # 
 # ----------------------------------------------------------------------------:
+def read_label(cache,sfp): 
+    """Reads a vector label through the parse cache (if any)."""
+    if cache is None: return st7p.vectors.nvidia_vector_file_read(sfp)
+    return cache.read_label(sfp)
+# ----------------------------------------------------------------------------:
 def _handle_cmd_line_args(): 
     func = "_handle_cmd_line_args"
     parser = argparse.ArgumentParser()
     parser.add_argument("--debug", "-d", action="store_true",
                         help="increase output verbosity.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always re-parse, bypassing the st7p parse cache.")
     parser.add_argument("testflow",metavar="testflow",type=str,
                         help="testflow file to be proces")
     #parser.add_argument("--bbn_csv",
@@ -71,11 +80,14 @@ if __name__ == "__main__":
     args = _handle_cmd_line_args()
     # ------------------------------------------------------------------------: 
     # Parse setup files 
-    tfo = st7p.testflow.read(args.testflow,debug=args.debug)
-    cfo = st7p.config.read(tfo.get_config_path())
-    lvo = st7p.levels.read(tfo.get_levels_path())
-    tmo = st7p.timing.read(tfo.get_timing_path())
-    pmf = st7p.vectors.read(tfo.get_vectors_path())
+    if args.no_cache: cache = None
+    else:             cache = st7p.cache.ParseCache()
+    dev = st7p.device.load(args.testflow,cache=cache,debug=args.debug)
+    tfo = dev.testflow
+    cfo = dev.config
+    lvo = dev.levels
+    tmo = dev.timing
+    pmf = dev.vectors
     print("\n------------:")
     print("Setup files :")
     print("------------:")
@@ -355,7 +367,7 @@ if __name__ == "__main__":
                        break 
            else: 
                fp_label = _labels[0]
-           main_label_obj, mpb_label_obj = st7p.vectors.nvidia_vector_file_read(fp_label)
+           main_label_obj, mpb_label_obj = read_label(cache,fp_label)
            if    main_label_obj: main_labels[label] = main_label_obj
            elif  mpb_label_obj : mpb_labels[label]  = mpb_label_obj
            else: raise RuntimeError("Unaccomidated label type: %s"%(label))
@@ -407,7 +419,7 @@ if __name__ == "__main__":
                                 error_log(setup_reference,err_msg,__labels)
                             if len(__labels) == 0: print("WARNING: No returns for label."); continue 
                             print("DEBUG: (%s): %s: parsing: %s"%(func,port,__labels[0]))
-                            main_labels[call_main_label] , _ = st7p.vectors.nvidia_vector_file_read(__labels[0])
+                            main_labels[call_main_label] , _ = read_label(cache,__labels[0])
                         # Extract the vectors and cycles per main-label
                         port_to_vectors_and_cycles[port.name]["vectors"] += main_labels[call_main_label].seq_prog.vectors
                         port_to_vectors_and_cycles[port.name]["cycles"]  += main_labels[call_main_label].seq_prog.cycles
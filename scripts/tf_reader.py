@@ -7,6 +7,8 @@ import st7p.config
 import st7p.timing
 import st7p.levels
 import st7p.vectors
+import st7p.cache
+import st7p.device
 import sys, os, re, argparse
 from collections import OrderedDict
 # ----------------------------------------------------------------------------:
@@ -20,6 +22,9 @@ def __handle_cmd_args():
                         action="store_true")
     parser.add_argument("-tf",help="testflow file")
     parser.add_argument("-ts",help="test-suite name")
+    parser.add_argument("-no_cache",
+                        help="always re-parse, bypassing the st7p parse cache",
+                        action="store_true")
     parser.add_argument("-test",
                         help="execute testing checks",
                         action="store_true")
@@ -38,11 +43,15 @@ if __name__ == "__main__":
     # ------------------------------------------------------------------------:
     # Testflow and setup files
     # ------------------------------------------------------------------------:
-    tfo = st7p.testflow.read(args.tf,debug)               # 1
-    cfo = st7p.config.read(tfo.get_config_path(),debug)   # 2
-    tmo = st7p.timing.read(tfo.get_timing_path(),debug)   # 3 
-    lvo = st7p.levels.read(tfo.get_levels_path(),debug)   # 4
-    vco = st7p.vectors.read(tfo.get_vectors_path(),debug) # 5
+    # Testflow, config, timing, levels and vectors are parsed concurrently.
+    if args.no_cache: cache = None 
+    else:             cache = st7p.cache.ParseCache(debug=debug)
+    dev = st7p.device.load(args.tf,cache=cache,debug=debug)
+    tfo = dev.testflow # 1
+    cfo = dev.config   # 2
+    tmo = dev.timing   # 3 
+    lvo = dev.levels   # 4
+    vco = dev.vectors  # 5
     # ------------------------------------------------------------------------:
     # Setup Summaries: 
     # ------------------------------------------------------------------------:
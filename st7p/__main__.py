@@ -1,55 +1,86 @@
-import sys, os, argparse 
-import config,testflow,vectors,timing,levels
+"""
+Command line entry point. Each subcommand only imports the parser it
+needs, e.g.:
 
-def help_menu(args): 
+    python -m st7p config   <config-file>
+    python -m st7p testflow <testflow-file>
+    python -m st7p timing   <timing-file> [-workers N]
+    python -m st7p levels   <levels-file> [-workers N]
+    python -m st7p vectors  <vectors-file>
+    python -m st7p device   <testflow-file> [-workers N] [-no_cache]
+
+Run with `python -i -m st7p ...` to inspect the parsed object.
+"""
+import sys, os, importlib, argparse
+
+def _import(name):
+    """Imports the st7p module `name` on demand."""
+    return importlib.import_module("st7p.%s"%(name))
+
+def help_menu(command,ref):
     retstr    =  ["\nst7p interactive mode: ",
                      "=====================:"]
-    if args.config: 
-        retstr.append("\nConfig file -> object reference `cfo`:")
-        retstr.append(  "-------------------------------------:")
-        retstr.append(  "cfo.summary() # Dump high-level summary report of config file.")
-        retstr.append("") 
-        retstr.append("\nVector file -> object reference `vfo`:")
-        retstr.append(  "-------------------------------------:")
-        retstr.append(  "vfo.summary() # Dump high-level summary report of vector file.")
-        retstr.append("") 
-
+    retstr.append("\n%s file -> object reference `%s`:"%(command.capitalize(),ref))
+    retstr.append(  "-------------------------------------:")
+    retstr.append(  "%s.summary() # Dump high-level summary report of %s file."%(ref,command))
+    retstr.append("")
     return "\n".join(retstr)
 
-def __handle_cmdline_args():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("-debug", help="increase output verbosity.",
+# ----------------------------------------------------------------------------:
+def _run_config(args):
+    return _import("config").read(sfp=args.path,debug=args.debug)
+
+def _run_testflow(args):
+    return _import("testflow").read(sfp=args.path,debug=args.debug)
+
+def _run_timing(args):
+    return _import("timing").read(sfp=args.path,debug=args.debug,workers=args.workers)
+
+def _run_levels(args):
+    return _import("levels").read(sfp=args.path,debug=args.debug,workers=args.workers)
+
+def _run_vectors(args):
+    return _import("vectors").read(sfp=args.path,debug=args.debug)
+
+def _run_device(args):
+    cache = None
+    if not args.no_cache: cache = _import("cache").ParseCache(debug=args.debug)
+    return _import("device").load(args.path,workers=args.workers,cache=cache,debug=args.debug)
+
+# [command] -> (runner, object reference, description, path help, workers option)
+COMMANDS = {"config"   : (_run_config,   "cfo", "parse a pin-config file", "pin-config file path", False),
+            "testflow" : (_run_testflow, "tfo", "parse a testflow file",   "testflow file path",   False),
+            "timing"   : (_run_timing,   "tmo", "parse a timing file",     "timing file path",     True),
+            "levels"   : (_run_levels,   "lvo", "parse a levels file",     "levels file path",     True),
+            "vectors"  : (_run_vectors,  "vfo", "parse a vectors file",    "vectors file path",    False),
+            "device"   : (_run_device,   "dvo", "load a testflow and all setup files of its context",
+                                                "testflow file path",   True)}
+
+def __handle_cmdline_args(argv=None):
+    parser = argparse.ArgumentParser(prog="st7p")
+    subparsers = parser.add_subparsers(dest="command",metavar="command")
+    for command, (runner, ref, description, path_help, workers) in COMMANDS.items():
+        sub = subparsers.add_parser(command,help=description)
+        sub.add_argument("path", help=path_help)
+        sub.add_argument("-debug", help="increase output verbosity.",
                          action="store_true")
-    parser.add_argument("-config",   help="pin-config file path",)
-    parser.add_argument("-testflow", help="testflow file path",)
-    parser.add_argument("-vector",   help="vector file path",)
-    parser.add_argument("-timing",   help="timing file path",)
-    parser.add_argument("-levels",   help="levels file path",)
-    args = parser.parse_args()
-
-    if not (args.config or args.testflow or args.vector or args.timing or args.levels): 
-        error_msg = "ERROR: Must provide a file.\n"\
-                    "  -config   <config-file>\n"\
-                    "  -testflow <testflow-file>\n"\
-                    "  -timing   <timing-file>\n"\
-                    "  -levels   <levels-file>\n"\
-                    "  -vectors  <vectors-file>\n"
-        raise ValueError(error_msg)
+        if workers:
+            sub.add_argument("-workers", type=int, default=None,
+                             help="number of parser processes (default: cpu count, 1: in-process)")
+        if command == "device":
+            sub.add_argument("-no_cache", action="store_true",
+                             help="do not use the on-disk parse cache")
+    args = parser.parse_args(argv)
+    if not args.command:
+        parser.print_help()
+        raise SystemExit(2)
+    if not os.path.isfile(args.path):
+        raise ValueError("Invalid file: %s"%(args.path))
     return args
 #-----------------------------------------------------------------------------:
 if __name__ == "__main__":
     args = __handle_cmdline_args()
-
-    if args.config: 
-        cfo = config.read(sfp=args.config,debug=args.debug)
-        print("\nSUCCESS: Configuration file parsed: use object reference 'cfo' for internal information.")
-    if args.testflow: 
-        tfo = testflow.read(sfp=args.testflow,debug=args.debug)
-    if args.vector: 
-        vfo = vectors.read(sfp=args.vector,debug=args.debug)
-    if args.timing: 
-        tmo = timing.read(sfp=args.timing,debug=args.debug)
-    if args.levels: 
-        lvo = levels.read(sfp=args.levels,debug=args.debug)
-
-    print(help_menu(args))
+    runner, ref = COMMANDS[args.command][:2]
+    globals()[ref] = runner(args)
+    print("\nSUCCESS: %s parsed: use object reference '%s' for internal information."%(args.path,ref))
+    print(help_menu(args.command,ref))
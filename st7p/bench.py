@@ -0,0 +1,536 @@
+"""
+This module benchmarks the st7p parsers against synthetic SmarTest 7
+setup files.
+
+The `gen_*` functions write realistic files of configurable size into a
+device directory layout (configuration, levels, timing, testflow and
+vectors). `run` then times every `read`/`eval_*` entry point and reports
+throughput (lines/s, MB/s, or evaluations/s) and the peak memory
+allocated during the call (tracemalloc).
+
+Results can be saved as JSON and compared against a previous run, so
+performance regressions show up before they reach the tester farm.
+
+Usage:
+    python bench.py -size medium
+    python bench.py -size large -only timing levels -keep /tmp/st7p_bench
+    python bench.py -save base.json
+    python bench.py -baseline base.json
+"""
+import os, sys, gc, time, json, shutil, random, argparse, tempfile, importlib, tracemalloc
+from collections import OrderedDict
+
+# [size] -> generator parameters
+SIZES = {"small"  : {"pins" : 64,   "sites" : 4,  "groups" : 16,  "eqnsets" : 2, "specsets" : 4,
+                     "levelsets" : 4,  "timingsets" : 4,  "wavetables" : 2, "specifications" : 2,
+                     "suites" : 200,  "labels" : 8,   "sqpg" : 200,   "ports" : 2},
+         "medium" : {"pins" : 256,  "sites" : 8,  "groups" : 64,  "eqnsets" : 4, "specsets" : 8,
+                     "levelsets" : 8,  "timingsets" : 8,  "wavetables" : 4, "specifications" : 4,
+                     "suites" : 2000, "labels" : 32,  "sqpg" : 2000,  "ports" : 4},
+         "large"  : {"pins" : 1024, "sites" : 16, "groups" : 256, "eqnsets" : 8, "specsets" : 16,
+                     "levelsets" : 16, "timingsets" : 16, "wavetables" : 8, "specifications" : 8,
+                     "suites" : 20000, "labels" : 128, "sqpg" : 20000, "ports" : 8}}
+KINDS = ["config","levels","timing","testflow","vectors"]
+PINS_PER_LINE = 32 # pins per PINS/DFGP/CONF statement
+REGRESSION = 1.2   # slow-down ratio reported as a regression by `compare`
+
+def _import(name):
+    """Imports the st7p module `name` on demand."""
+    return importlib.import_module("st7p.%s"%(name))
+
+def _write(path,lines):
+    """Writes the generated `lines` to `path` and returns `path`."""
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory): os.makedirs(directory)
+    with open(path,"w") as writer:
+        for line in lines: writer.write("%s\n"%(line))
+    return path
+
+def _chunks(items,size=PINS_PER_LINE):
+    for i in range(0,len(items),size): yield items[i:i+size]
+
+def _pin_names(pins):
+    return ["p%d"%(i) for i in range(pins)]
+
+# ----------------------------------------------------------------------------:
+def config_lines(pins=256,sites=8,groups=64,supplies=16,seed=0):
+    """Yields a pin-config file: DFPN/DFPS, DFGP/DFGE groups, ports, CONF and PALS per site."""
+    rng = random.Random(seed)
+    names = _pin_names(pins)
+    yield "hp93000,config,0.1"
+    yield 'NOOP "7.1.4",,,'
+    yield "PSTE %d"%(sites)
+    for i, name in enumerate(names): yield 'DFPN %d,"%d",(%s)'%(10001 + i,i,name)
+    for j in range(supplies): yield "DFPS %d,POS,(VDD%d)"%(20001 + j,j)
+    dfgp = max(1,groups // 2)
+    for g in range(dfgp):
+        members = rng.sample(names,min(pins,PINS_PER_LINE))
+        yield "DFGP %s,(%s),(grp%d)"%(rng.choice(["I","O","IO"]),",".join(members),g)
+    for g in range(groups - dfgp):
+        terms = ["grp%d"%(rng.randrange(dfgp))]
+        for _ in range(rng.randint(1,4)):
+            terms.append("%s%s"%(rng.choice("++-"),rng.choice(["grp%d"%(rng.randrange(dfgp)),rng.choice(names)])))
+        yield 'DFGE I,"%s",(grpx%d)'%("".join(terms),g)
+    for k, chunk in enumerate(_chunks(names,max(1,pins // 4))):
+        yield "DFPT (%s),(port%d)"%(",".join(chunk),k)
+    for chunk in _chunks(names): yield "CONF IO,F330,(%s)"%(",".join(chunk))
+    yield "CONF DC,POWER,(%s)"%(",".join("VDD%d"%(j) for j in range(supplies)))
+    for site in range(1,sites + 1):
+        for i, name in enumerate(names): yield "PALS %d,%d,,(%s)"%(site,site*100000 + i,name)
+        for j in range(supplies): yield "PALS %d,%d,,(VDD%d)"%(site,20000 + site*100 + j,j)
+
+def levels_lines(pins=256,eqnsets=4,levelsets=8,specsets=8,supplies=16,**_):
+    """Yields a levels file: per EQNSET the equations, DPS and pin LEVELSETs and SPECSETs."""
+    names = _pin_names(pins)
+    yield "hp93000,level,0.1"
+    yield 'NOOP "7.1",,,'
+    for eqn in range(1,eqnsets + 1):
+        yield "EQSP LEV,EQN,#9"
+        yield 'EQNSET %d "levels %d"'%(eqn,eqn)
+        yield "SPECS"
+        for spec in ["vcc [V]","vdd [V]","vt [V]"]: yield spec
+        yield "EQUATIONS"
+        yield "vih_nom = vcc*0.8"
+        yield "vil_nom = vcc*0.2"
+        yield "vdd_lim = vdd > 1 ? 0.5 : 0.25"
+        for j in range(supplies):
+            yield "DPSPINS VDD%d"%(j)
+            yield "vout = vdd"
+            yield "ilimit = vdd_lim"
+        for lvl in range(1,levelsets + 1):
+            yield 'LEVELSET %d "ls%d"'%(lvl,lvl)
+            for chunk in _chunks(names):
+                yield "PINS %s"%(" ".join(chunk))
+                yield "vih = vih_nom + 0.0%d"%(lvl % 10)
+                yield "vil = vil_nom"
+                yield "voh = vt*1.1"
+                yield "vol = vt*0.9"
+        yield "@"
+        yield "EQSP LEV,SPS,#9"
+        yield "EQNSET %d"%(eqn)
+        for ss in range(1,specsets + 1):
+            yield 'SPECSET %d "ss%d"'%(ss,ss)
+            yield "vcc %.3f 1.0 2.0 [V]"%(1.0 + ss*0.05)
+            yield "vdd %.3f [V]"%(0.8 + ss*0.05)
+            yield "vt %.3f"%(0.5 + ss*0.01)
+        yield "@"
+
+def timing_lines(pins=256,eqnsets=4,timingsets=8,wavetables=4,specsets=8,specifications=4,**_):
+    """Yields a timing file: EQNSETs with TIMINGSETs, WAVETBLs, SPECSETs and SPECIFICATIONs."""
+    names = _pin_names(pins)
+    yield "hp93000,timing,0.1"
+    for eqn in range(1,eqnsets + 1):
+        yield "EQSP TIM,EQN,#9"
+        yield 'EQNSET %d "timing %d"'%(eqn,eqn)
+        yield "SPECS"
+        for spec in ["per [ns]","t_d [ns]","t_r [ns]"]: yield spec
+        yield "EQUATIONS"
+        yield "half = per/2"
+        yield "strobe = half + t_r > per ? per : half + t_r"
+        for ts in range(1,timingsets + 1):
+            yield 'TIMINGSET %d "ts%d"'%(ts,ts)
+            yield "period = per"
+            for chunk in _chunks(names):
+                yield "PINS %s"%(" ".join(chunk))
+                yield "d1 = t_d"
+                yield "d2 = half + t_d*%d"%(ts)
+                yield "r1 = strobe"
+        yield "@"
+    yield "EQSP TIM,WVT,#9"
+    for wt in range(wavetables):
+        yield 'WAVETBL "wt%d"'%(wt)
+        for chunk in _chunks(names):
+            yield "PINS %s"%(" ".join(chunk))
+            yield '0 "d1:F00 d2:F10" d1'
+            yield '1 "d1:F10 d2:F00"'
+            yield '2 "r1:X"'
+            yield '3 "r1:L"'
+    yield "@"
+    for eqn in range(1,eqnsets + 1):
+        yield "EQSP TIM,SPS,#9"
+        yield "EQNSET %d"%(eqn)
+        yield 'WAVETBL "wt%d"'%(eqn % wavetables)
+        yield "CHECK all"
+        for ss in range(1,specsets + 1):
+            yield 'SPECSET %d "ss%d"'%(ss,ss)
+            yield "per %d 5 100 [ns]"%(5 + ss)
+            yield "t_d %.2f [ns]"%(0.1*ss)
+            yield "t_r %.2f [ns]"%(0.5 + 0.1*ss)
+        yield "@"
+    yield "EQSP TIM,SPS,#9"
+    for spf in range(specifications):
+        yield 'SPECIFICATION "spf%d" {'%(spf)
+        yield "  EQNSET %d"%(spf % eqnsets + 1)
+        yield '  WAVETBL "wt%d"'%(spf % wavetables)
+        yield "  per %d [ns]"%(10 + spf)
+        yield "  t_d 0.5 [ns]"
+        yield "  t_r 1.5 [ns]"
+        yield "}"
+    yield "@"
+
+def testflow_lines(suites=2000,eqnsets=4,levelsets=8,specsets=8,timingsets=8,labels=32,context=None,**_):
+    """
+    Yields a testflow with `suites` test suites (and test methods), run in
+    groups of 100 within the test_flow. `context` maps the context keys
+    (config, levels, timing, vector) to file names.
+    """
+    if context is None: context = {}
+    yield "hp93000,testflow,0.1"
+    yield "language_revision = 1;"
+    yield ""
+    yield "information"
+    yield 'description = "st7p benchmark";'
+    yield 'device_name = "bench";'
+    yield "end"
+    yield "-"*65
+    yield "declarations"
+    yield "@VAR1 = 1;"
+    yield "end"
+    yield "flags"
+    yield "user bench_flag = 0;"
+    yield "datalog_formatter = 1;"
+    yield "end"
+    for section in ["testmethodparameters","testmethodlimits","testmethods"]:
+        yield section
+        for i in range(1,suites + 1):
+            yield "tm_%d:"%(i)
+            if section == "testmethodparameters":
+                yield '  "Param1" = "%d";'%(i)
+                yield '  "output" = "None";'
+            elif section == "testmethodlimits":
+                yield '  "Functional" = "":"NA":"":"NA":"":"":"";'
+            else:
+                yield '  testmethod_class = "ac_tml.AcTest.FunctionalTest";'
+        yield "end"
+    yield "test_suites"
+    for i in range(1,suites + 1):
+        eqn = i % eqnsets + 1
+        yield "ts_%d:"%(i)
+        if i % 50 == 0: yield "  local_flags = bypass, output_on_fail;"
+        else:           yield "  local_flags = output_on_pass, output_on_fail, value_on_fail;"
+        yield "  override = 1;"
+        yield "  override_lev_equ_set = %d;"%(eqn)
+        yield "  override_lev_spec_set = %d;"%(i % specsets + 1)
+        yield "  override_levset = %d;"%(i % levelsets + 1)
+        yield '  override_seqlbl = "main_%d";'%(i % labels)
+        yield "  override_testf = tm_%d;"%(i)
+        yield "  override_tim_equ_set = %d;"%(eqn)
+        yield "  override_tim_spec_set = %d;"%(i % specsets + 1)
+        yield "  override_timset = %d;"%(i % timingsets + 1)
+        yield '  site_control = "parallel:";'
+        yield "  site_match = 2;"
+    yield "end"
+    yield ""
+    yield "test_flow"
+    yield ""
+    yield "  {"
+    for i in range(1,suites + 1):
+        if i % 100 == 1: yield "  {"
+        if i % 3 == 0:
+            for line in ["    run_and_branch(ts_%d)"%(i),"    then","    {","    }","    else","    {",
+                         '       stop_bin "db", "", , bad, noreprobe, red, , over_on;',"    }"]:
+                yield line
+        elif i % 3 == 1:
+            for line in ["    run(ts_%d);"%(i),"    if @VAR1 == 1 then","    {",'       print_dl("x");',"    }",
+                         "    else","    {","    }"]:
+                yield line
+        else: yield "    run(ts_%d);"%(i)
+        if i % 100 == 0 or i == suites:
+            group = (i - 1) // 100 + 1
+            if group % 5 == 0: yield '  }, groupbypass, open,"grp_%d", ""'%(group)
+            else:              yield '  }, open,"grp_%d", ""'%(group)
+    yield '  }, open,"top", ""'
+    yield ""
+    yield "end"
+    yield "binning"
+    yield '  otherwise bin = "db", "", , bad, noreprobe, red, , over_on;'
+    yield "end"
+    yield "context"
+    for key in ["config","levels","timing","vector"]:
+        if key in context: yield '  context_%s_file = "%s";'%(key,context[key])
+    yield "end"
+    yield "hardware_bin_descriptions"
+    yield '  1 = "good";'
+    yield "end"
+
+def main_label_lines(name,sqpg=2000,port="pA"):
+    """Yields a MAIN vector label with `sqpg` sequencer commands (STVA, GENV/RPTV, STOP)."""
+    yield "hp93000,vector,0.1"
+    yield "DMAS MTST,SM,0,(%s)"%(port)
+    yield "DMAS SQPG,SM,%d,(%s)"%(sqpg,port)
+    yield 'SQLB "%s",MAIN,0,%d,"wt0",(%s)'%(name,sqpg - 1,port)
+    yield "SQPG 0,STVA,0,,,(%s)"%(port)
+    for i in range(1,sqpg - 1):
+        if i % 4 == 0: yield "SQPG %d,RPTV,%d,%d,,(%s)"%(i,i % 7 + 1,i % 13 + 2,port)
+        else:          yield "SQPG %d,GENV,%d,,,(%s)"%(i,i % 29 + 1,port)
+    yield "SQPG %d,STOP,,,,(%s)"%(sqpg - 1,port)
+
+def burst_label_lines(name,calls,ports=4):
+    """Yields a MPBU label calling the MAIN labels `calls` on each of `ports` ports."""
+    yield "hp93000,vector,0.1"
+    for p in range(ports):
+        port = "p%s"%(chr(ord("A") + p))
+        yield "DMAS SQPG,SM,%d,(%s)"%(len(calls) + 1,port)
+        yield 'SQLB "%s",MPBU,0,%d,"grp",(%s)'%(name,len(calls),port)
+        for i, call in enumerate(calls): yield 'SQPG %d,CALL,,"%s",,(%s)'%(i,call,port)
+        yield "SQPG %d,BEND,,,,(%s)"%(len(calls),port)
+
+def pmf_lines(files):
+    yield "hp93000,pattern_master_file,0.1"
+    yield "path:"
+    yield "../vectors"
+    yield "files:"
+    for fyle in files: yield fyle
+
+# ----------------------------------------------------------------------------:
+def gen_config(directory,**sizes):
+    return _write(os.path.join(directory,"configuration","cfg"),config_lines(**_only(sizes,["pins","sites","groups"])))
+
+def gen_levels(directory,**sizes):
+    return _write(os.path.join(directory,"levels","lev"),levels_lines(**sizes))
+
+def gen_timing(directory,**sizes):
+    return _write(os.path.join(directory,"timing","tim"),timing_lines(**sizes))
+
+def gen_vectors(directory,labels=32,sqpg=2000,ports=4,**_):
+    """Writes `labels` MAIN labels, one MPBU burst over `ports` ports and the pmf. Returns the pmf path."""
+    vdir = os.path.join(directory,"vectors")
+    files = []
+    for k in range(labels):
+        files.append(os.path.basename(_write(os.path.join(vdir,"main_%d.binl"%(k)),main_label_lines("main_%d"%(k),sqpg))))
+    calls = ["main_%d"%(k) for k in range(labels)]
+    files.append(os.path.basename(_write(os.path.join(vdir,"burst_0.burst"),burst_label_lines("burst_0",calls,ports))))
+    return _write(os.path.join(vdir,"pmf"),pmf_lines(files))
+
+def gen_testflow(directory,**sizes):
+    context = {"config" : "cfg", "levels" : "lev", "timing" : "tim", "vector" : "pmf"}
+    return _write(os.path.join(directory,"testflow","tf"),testflow_lines(context=context,**sizes))
+
+def _only(sizes,keys):
+    return dict((key,sizes[key]) for key in keys if key in sizes)
+
+def generate(directory,kinds=None,**sizes):
+    """Writes the synthetic device directory. Returns [kind] -> file path."""
+    if kinds is None: kinds = KINDS
+    generators = {"config"   : gen_config,
+                  "levels"   : gen_levels,
+                  "timing"   : gen_timing,
+                  "testflow" : gen_testflow,
+                  "vectors"  : gen_vectors}
+    return OrderedDict((kind,generators[kind](directory,**sizes)) for kind in kinds)
+
+# ----------------------------------------------------------------------------:
+def file_stats(paths):
+    """Returns (lines, bytes) summed over `paths`."""
+    lines = 0; size = 0
+    for path in paths:
+        size += os.path.getsize(path)
+        with open(path,"rb") as fh:
+            for block in iter(lambda: fh.read(1<<20), b""): lines += block.count(b"\n")
+    return lines, size
+
+class Case(object):
+    """
+    A benchmarked call. Reads report lines/s and MB/s over `paths`;
+    evaluations report `count` calls per second.
+    """
+    def __init__(self,name,function,paths=None,count=0,setup=None):
+        self.name     = name
+        self.function = function
+        self.paths    = paths if paths else []
+        self.count    = count
+        self.setup    = setup # Called (untimed) before every run, e.g. to clear memos
+
+def cases(files,sizes):
+    """Returns the list of Cases for the generated `files` ([kind] -> path)."""
+    out = []
+    if "config" in files:
+        config = _import("config")
+        out.append(Case("config.read",lambda: config.read(files["config"]),[files["config"]]))
+    if "levels" in files:
+        levels = _import("levels")
+        out.append(Case("levels.read",lambda: levels.read(files["levels"]),[files["levels"]]))
+        lvo = levels.read(files["levels"])
+        combos = [(ss.name,ls.name) for ss in lvo.specsets
+                  for ls in lvo.eqnsets[str(ss.eqnset)].levelsets]
+        def eval_levels():
+            for ss, ls in combos: levels.eval_specset(lvo,ss,ls)
+        out.append(Case("levels.eval_specset",eval_levels,count=len(combos),setup=levels.EVAL_MEMO.clear))
+        if _import("lazy").numpy() is not None:
+            out.append(Case("levels.eval_levels_matrix",lambda: levels.eval_levels_matrix(lvo,combos),
+                            count=len(combos),setup=levels.EVAL_MEMO.clear))
+    if "timing" in files:
+        timing = _import("timing")
+        out.append(Case("timing.read",lambda: timing.read(files["timing"]),[files["timing"]]))
+        tmo = timing.read(files["timing"])
+        combos = [(ss.name,ts.name) for ss in tmo.specsets
+                  for ts in tmo.eqnsets[str(ss.eqnset)].timingsets]
+        def eval_timing():
+            for ss, ts in combos: timing.eval_specset(tmo,ss,ts)
+        out.append(Case("timing.eval_specset",eval_timing,count=len(combos),setup=timing.EVAL_MEMO.clear))
+        spfs = tmo.specifications.names()
+        def eval_spfs():
+            for spf in spfs: timing.eval_specification(tmo,spf,[1])
+        out.append(Case("timing.eval_specification",eval_spfs,count=len(spfs),setup=timing.EVAL_MEMO.clear))
+        if _import("lazy").numpy() is not None:
+            eqnsets = tmo.eqnsets.names()
+            def eval_matrix():
+                for eqn in eqnsets: timing.eval_eqnset_matrix(tmo,eqn)
+            out.append(Case("timing.eval_eqnset_matrix",eval_matrix,count=len(eqnsets),setup=timing.EVAL_MEMO.clear))
+    if "testflow" in files:
+        testflow = _import("testflow")
+        out.append(Case("testflow.read",lambda: testflow.read(files["testflow"]),[files["testflow"]]))
+        out.append(Case("testflow.read(flow=False)",lambda: testflow.read(files["testflow"],flow=False),[files["testflow"]]))
+    if "vectors" in files:
+        vectors = _import("vectors")
+        vdir = os.path.dirname(files["vectors"])
+        mains = [os.path.join(vdir,fyle) for fyle in sorted(os.listdir(vdir)) if fyle.endswith(".binl")]
+        burst = os.path.join(vdir,"burst_0.burst")
+        def stream_mains():
+            for path in mains: vectors.nvidia_vector_file_stream(path)
+        out.append(Case("vectors.nvidia_vector_file_stream(MAIN)",stream_mains,mains))
+        out.append(Case("vectors.nvidia_vector_file_stream(MPBU)",lambda: vectors.nvidia_vector_file_stream(burst),[burst]))
+        out.append(Case("vectors.read(pmf)",lambda: vectors.read(files["vectors"]),[files["vectors"]]))
+        pmf = vectors.read(files["vectors"])
+        out.append(Case("vectors.PMF.parse_all",lambda: pmf.parse_all(workers=1),mains + [burst]))
+    if all(kind in files for kind in KINDS):
+        device = _import("device")
+        out.append(Case("device.load",lambda: device.load(files["testflow"],workers=1),list(files.values())))
+    return out
+
+def measure(case,repeat=3):
+    """
+    Runs `case` `repeat` times (best time kept) plus once under tracemalloc.
+    Returns an OrderedDict of the results.
+    """
+    best = None
+    for _ in range(repeat):
+        if case.setup: case.setup()
+        gc.collect()
+        start = time.perf_counter()
+        case.function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best: best = elapsed
+    if case.setup: case.setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    result = OrderedDict([("name",case.name),("seconds",best),("peak_mb",peak/1e6)])
+    if case.paths:
+        lines, size = file_stats(case.paths)
+        result["lines"] = lines
+        result["mb"] = size/1e6
+        result["lines_per_s"] = lines/best if best else 0.0
+        result["mb_per_s"] = size/1e6/best if best else 0.0
+    if case.count:
+        result["evals"] = case.count
+        result["evals_per_s"] = case.count/best if best else 0.0
+    return result
+
+def run(directory="",size="medium",kinds=None,repeat=3,quiet=True,**overrides):
+    """
+    Generates the synthetic files and benchmarks them.
+
+    Parameters:
+      directory : string, default = ""
+        Where to write the files. A temporary directory (removed afterwards)
+        is used if empty.
+
+      size : string, one of SIZES; `overrides` replace single parameters.
+
+      kinds : list, default = None (all of KINDS)
+
+      quiet : bool, default = True
+        If True, the parsers' console output is suppressed.
+
+    Returns:
+      list of result dictionaries, see `measure`.
+    """
+    func = "st7p.bench.run"
+    if size not in SIZES: raise RuntimeError("(%s): Unsupported size: %s"%(func,size))
+    sizes = dict(SIZES[size]); sizes.update(overrides)
+    cleanup = not directory
+    if cleanup: directory = tempfile.mkdtemp(prefix="st7p_bench_")
+    try:
+        files = generate(directory,kinds=kinds,**sizes)
+        with open(os.devnull,"w") as devnull:
+            stdout = sys.stdout
+            if quiet: sys.stdout = devnull
+            try:
+                results = [measure(case,repeat) for case in cases(files,sizes)]
+            finally:
+                sys.stdout = stdout
+    finally:
+        if cleanup: shutil.rmtree(directory,ignore_errors=True)
+    return results
+
+# ----------------------------------------------------------------------------:
+def report(results,baseline=None):
+    """Prints the results table. With a baseline, the time ratio is added."""
+    base = {}
+    if baseline: base = dict((r["name"],r) for r in baseline)
+    header = "%-42s %10s %12s %9s %12s %9s"%("case","seconds","lines/s","MB/s","evals/s","peak MB")
+    if base: header += " %8s"%("vs base")
+    print(header)
+    print("-"*len(header))
+    for r in results:
+        line = "%-42s %10.4f %12s %9s %12s %9.2f"%(r["name"],r["seconds"],
+               "%.0f"%(r["lines_per_s"]) if "lines_per_s" in r else "-",
+               "%.2f"%(r["mb_per_s"]) if "mb_per_s" in r else "-",
+               "%.0f"%(r["evals_per_s"]) if "evals_per_s" in r else "-",
+               r["peak_mb"])
+        if r["name"] in base and base[r["name"]]["seconds"]:
+            ratio = r["seconds"]/base[r["name"]]["seconds"]
+            line += " %7.2fx%s"%(ratio," REGRESSION" if ratio > REGRESSION else "")
+        print(line)
+
+def compare(results,baseline,threshold=REGRESSION):
+    """Returns the names of cases more than `threshold` times slower than `baseline`."""
+    base = dict((r["name"],r) for r in baseline)
+    slower = []
+    for r in results:
+        if r["name"] not in base or not base[r["name"]]["seconds"]: continue
+        if r["seconds"]/base[r["name"]]["seconds"] > threshold: slower.append(r["name"])
+    return slower
+
+# ----------------------------------------------------------------------------:
+def __handle_cmdline_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-size", default="medium", choices=sorted(SIZES),
+                        help="preset file sizes (default: medium)")
+    parser.add_argument("-only", nargs="+", choices=KINDS, default=None,
+                        help="only generate and benchmark these kinds")
+    parser.add_argument("-repeat", type=int, default=3,
+                        help="runs per case, the best is reported (default: 3)")
+    parser.add_argument("-keep", default="",
+                        help="write the synthetic files to this directory and keep them")
+    parser.add_argument("-save", default="",
+                        help="save the results as JSON")
+    parser.add_argument("-baseline", default="",
+                        help="compare against results saved with -save (same size) and exit 1 on regressions")
+    parser.add_argument("-verbose", action="store_true",
+                        help="show the parsers' console output")
+    for key in sorted(SIZES["medium"]):
+        parser.add_argument("-%s"%(key), type=int, default=None,
+                            help="override the %s parameter of the size preset"%(key))
+    args = parser.parse_args()
+    if args.baseline and not os.path.isfile(args.baseline):
+        raise ValueError("Invalid baseline file: %s"%(args.baseline))
+    return args
+# ----------------------------------------------------------------------------:
+if __name__ == "__main__":
+    args = __handle_cmdline_args()
+    overrides = dict((key,getattr(args,key)) for key in SIZES["medium"] if getattr(args,key) is not None)
+    results = run(directory=args.keep,size=args.size,kinds=args.only,repeat=args.repeat,
+                  quiet=not args.verbose,**overrides)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline,"r") as fh: baseline = json.load(fh)
+    report(results,baseline)
+    if args.save:
+        with open(args.save,"w") as fh: json.dump(results,fh,indent=2)
+    if baseline and compare(results,baseline): sys.exit(1)
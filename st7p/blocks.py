@@ -0,0 +1,66 @@
+"""
+This module provides the pin index shared by the containers of pin
+blocks: timing PWFBlocks (WAVETBL) and EdgeBlocks (TIMINGSET), levels
+PinBlocks (LEVELSET) and DPSBlocks (EQNSET).
+
+A block is named by its pin list (e.g. "a b c"). Each pin may only be
+defined by one block of a container, thus a block is found by its name or
+by any of its pins in constant time.
+
+Usage:
+    class EdgeBlocks(blocks.PinBlockIndex,st7putils.Container):
+        def add(self,edgeblock):
+            self._index_pins(edgeblock)
+            super(EdgeBlocks,self).add(edgeblock,EdgeBlock)
+            self._index_id(edgeblock)
+"""
+
+class PinBlockIndex(object):
+    """
+    Mixin for st7putils.Container subclasses holding pin blocks. The `add`
+    of the container calls `_index_pins` before and `_index_id` after
+    adding a block.
+    """
+    def __init__(self):
+        super(PinBlockIndex,self).__init__()
+        self._ids = []
+        self._ids_2_names = {}
+        self._pin_index = {} # [pin] -> block name
+
+    def _index_pins(self,block):
+        """Maps each pin of `block` to its name. Raises on pins already
+        defined by another block."""
+        for pin in block.name.split():
+            if self._pin_index.get(pin,block.name) != block.name:
+                raise RuntimeError("Pin '%s' of '%s' already defined in '%s'"%(pin,block.name,self._pin_index[pin]))
+        for pin in block.name.split():
+            self._pin_index[pin] = block.name
+
+    def _index_id(self,block):
+        self._ids.append(block._id)
+        self._ids_2_names[block._id] = block.name
+
+    def _get_next_id(self):
+        if len(self._ids) == 0 : return 1
+        else: return int(self._ids[-1] + 1)
+
+    def __getitem__(self,entry):
+        return self.get(entry)
+
+    def get(self,entry):
+        """Returns the block named `entry` or defining pin `entry`."""
+        if entry in self.objects: return self.objects[entry]
+        if entry in self._pin_index: return self.objects[self._pin_index[entry]]
+        raise RuntimeError("No entry for '%s'"%(entry))
+
+    def contains(self,pin):
+        """Returns the block defining `pin`, or None."""
+        if pin in self._pin_index: return self.objects[self._pin_index[pin]]
+        return None
+
+    def pins(self):
+        """Return a list of all pins referenced within all blocks"""
+        retlist = []
+        for name in self.objects:
+            retlist.extend(self.objects[name].pins)
+        return retlist
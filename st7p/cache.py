@@ -0,0 +1,292 @@
+"""
+This module provides a persistent on-disk cache for parsed setup files
+(testflow, config, levels, timing, pmf and vector labels). Parsing a full
+device directory is slow, whereas the parsed objects rarely change between
+runs.
+
+Each entry is a pickle file holding a small header followed by the parsed
+object. The header lists the source file and every file it depends on
+(e.g. the files referenced by a timing/levels master file) with their size
+and mtime, and optionally a content hash. An entry is only returned while
+all of those match; otherwise it is deleted and the file is re-parsed.
+
+Usage:
+    import st7p.cache
+    cache = st7p.cache.ParseCache()
+    tfo = cache.read("testflow", sfp)
+    main_label_obj, mpb_label_obj = cache.read_label(label_sfp)
+"""
+import os, sys, re, time, pickle, hashlib, argparse
+
+CACHE_VERSION = 13 # Bump whenever parsed object layouts change.
+CACHE_DIR_ENV = "ST7P_CACHE_DIR"
+KINDS = ["testflow","config","levels","timing","vectors","label"]
+EVICT_INTERVAL = 24 * 3600 # seconds between automatic evict passes
+
+# ----------------------------------------------------------------------------:
+def default_cache_dir():
+    """Returns $ST7P_CACHE_DIR, else ~/.cache/st7p"""
+    if os.environ.get(CACHE_DIR_ENV): return os.environ[CACHE_DIR_ENV]
+    return os.path.join(os.path.expanduser("~"),".cache","st7p")
+
+def _readers():
+    """Returns [kind] -> reader function. Imported lazily."""
+    from st7p import testflow, config, levels, timing, vectors
+    return {"testflow" : testflow.read,
+            "config"   : config.read,
+            "levels"   : levels.read,
+            "timing"   : timing.read,
+            "vectors"  : vectors.read,
+            "label"    : vectors.nvidia_vector_file_stream}
+
+# Readers running a process pool of their own (for master files).
+POOL_KINDS = ["timing","levels"]
+
+def file_hash(sfp,blocksize=1<<20):
+    """Returns the blake2b hex digest of the file contents."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(sfp,"rb") as fh:
+        for block in iter(lambda: fh.read(blocksize), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _resolve_master_entry(dir_path,path):
+    """
+    Resolves a path found within a timing/levels master file. Same rules
+    as `timing.read` and `levels.read`: leading '../' are relative to the
+    master file directory, other paths are tried relative to it and as-is.
+    """
+    relative_count = path.count("../")
+    if relative_count >= 1:
+        return os.path.join("/".join(dir_path.split("/")[:-relative_count]),path[3*relative_count:])
+    tmppath = os.path.join(dir_path,path)
+    if os.path.isfile(tmppath): return tmppath
+    return path
+
+def dependencies(kind,sfp,debug=False):
+    """
+    Returns the list of files the parse result of `sfp` depends on. This
+    is the file itself plus, for timing and levels master files, all files
+    referenced by the master file.
+    """
+    deps = [sfp]
+    if kind not in ["timing","levels"]: return deps
+    from st7p import levels, timing
+    with open(sfp,"r") as fh:
+        header = fh.readline()
+    dir_path = os.path.dirname(sfp)
+    if kind == "timing" and timing.RE_TMF_HEADER.search(header):
+        tmf = timing.read_timing_master_file(sfp,debug=debug)
+        entries = list(tmf.eqnsets.values()) + list(tmf.wvtbls.values()) + list(tmf.mp_specs.values())
+    elif kind == "levels" and levels.RE_LMF_HEADER.search(header):
+        lmf = levels.read_levels_master_file(sfp,debug=debug)
+        entries = list(lmf.eqnsets.values())
+    else: return deps
+    for entry in entries:
+        path = _resolve_master_entry(dir_path,entry["path"])
+        if path not in deps: deps.append(path)
+    return deps
+
+# ----------------------------------------------------------------------------:
+class ParseCache(object):
+    """
+    Persistent cache of parsed setup objects.
+
+    Parameters:
+      cache_dir : string, default = ""
+        Directory holding the entries. Defaults to `default_cache_dir()`.
+        It is created on the first write.
+
+      use_hash : bool, default = False
+        If True, a content hash is stored per file. Files whose size/mtime
+        changed but whose contents did not (e.g. copied or touched device
+        directories) are then still served from the cache.
+
+      evict : bool, default = True
+        If True, `evict` runs automatically, at most once every
+        EVICT_INTERVAL seconds.
+    """
+    def __init__(self,cache_dir="",use_hash=False,evict=True,debug=False):
+        self.cache_dir = cache_dir if cache_dir else default_cache_dir()
+        self.use_hash  = use_hash
+        self.debug     = debug
+        self.hits      = 0
+        self.misses    = 0
+        if evict: self._auto_evict()
+
+    def _entry_path(self,kind,sfp):
+        key = "%s:%s"%(kind,os.path.abspath(sfp))
+        return os.path.join(self.cache_dir,"%s-%s.pkl"%(kind,hashlib.sha1(key.encode()).hexdigest()))
+
+    def _stamp(self,sfp,content_hash=True):
+        st = os.stat(sfp)
+        digest = None
+        if self.use_hash and content_hash: digest = file_hash(sfp)
+        return [os.path.abspath(sfp), st.st_size, st.st_mtime_ns, digest]
+
+    def _is_fresh(self,header):
+        """
+        Checks the header dependencies against the file system. Returns
+        (fresh, restamped) where restamped is True when a dependency only
+        matched through its content hash.
+        """
+        if header.get("version") != CACHE_VERSION: return False, False
+        restamped = False
+        for dep in header["deps"]:
+            path, size, mtime, digest = dep
+            try: st = os.stat(path)
+            except OSError: return False, False
+            if st.st_size == size and st.st_mtime_ns == mtime: continue
+            if digest is None or st.st_size != size: return False, False
+            if file_hash(path) != digest: return False, False
+            dep[2] = st.st_mtime_ns
+            restamped = True
+        return True, restamped
+
+    def _load_header(self,entry):
+        with open(entry,"rb") as fh:
+            return pickle.load(fh)
+
+    def _dump(self,entry,header,obj):
+        if not os.path.isdir(self.cache_dir): os.makedirs(self.cache_dir)
+        tmp = "%s.%s.tmp"%(entry,os.getpid())
+        with open(tmp,"wb") as fh:
+            pickle.dump(header,fh,protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(obj,fh,protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp,entry) # Atomic, concurrent readers never see partial entries
+
+    def _remove(self,entry):
+        try: os.remove(entry)
+        except OSError: pass
+
+    def get(self,kind,sfp):
+        """Returns the cached object of `sfp` or None if missing/stale."""
+        func = "st7p.cache.ParseCache.get"
+        entry = self._entry_path(kind,sfp)
+        if not os.path.isfile(entry): return None
+        obj = None
+        try:
+            with open(entry,"rb") as fh:
+                header = pickle.load(fh)
+                fresh, restamped = self._is_fresh(header)
+                if fresh: obj = pickle.load(fh) # Stale objects are never unpickled
+        except Exception as e:
+            if self.debug: print("DEBUG: (%s): Dropping unreadable entry: %s (%s)"%(func,entry,e))
+            self._remove(entry); return None
+        if not fresh:
+            if self.debug: print("DEBUG: (%s): Evicting stale entry: %s"%(func,sfp))
+            self._remove(entry); return None
+        if restamped: self._dump(entry,header,obj)
+        return obj
+
+    def _header(self,kind,sfp,deps):
+        return {"version" : CACHE_VERSION,
+                "kind"    : kind,
+                "sfp"     : os.path.abspath(sfp),
+                "created" : time.time(),
+                "deps"    : [self._stamp(dep) for dep in deps]}
+
+    def put(self,kind,sfp,obj,deps=None):
+        """Stores `obj` as the parse result of `sfp`."""
+        if kind not in KINDS: raise RuntimeError("Unsupported cache kind: %s"%(kind))
+        if deps is None: deps = [sfp]
+        self._dump(self._entry_path(kind,sfp),self._header(kind,sfp,deps),obj)
+
+    def read(self,kind,sfp,debug=False,workers=None):
+        """
+        Returns the parsed object of `sfp`, from the cache when fresh,
+        otherwise by calling the `kind` reader (e.g. `st7p.timing.read`)
+        and storing its result.
+
+        Parameters:
+          kind : string, one of KINDS
+          sfp  : string, source file path
+          workers : int, default = None
+            Passed to the POOL_KINDS readers on a cache miss.
+        """
+        func = "st7p.cache.ParseCache.read"
+        if kind not in KINDS: raise RuntimeError("Unsupported cache kind: %s"%(kind))
+        if not os.path.isfile(sfp): raise RuntimeError("Bad/No file: %s"%(sfp))
+        obj = self.get(kind,sfp)
+        if obj is not None:
+            self.hits += 1
+            if self.debug or debug: print("DEBUG: (%s): Cache hit : %s"%(func,sfp))
+            return obj
+        self.misses += 1
+        if self.debug or debug: print("DEBUG: (%s): Cache miss: %s"%(func,sfp))
+        # Stamp dependencies before parsing so edits during the parse are
+        # detected on the next read.
+        header = self._header(kind,sfp,dependencies(kind,sfp))
+        if   kind == "label":    obj = _readers()[kind](sfp,keep_program=True)
+        elif kind in POOL_KINDS: obj = _readers()[kind](sfp,debug,workers=workers)
+        else:                    obj = _readers()[kind](sfp,debug)
+        self._dump(self._entry_path(kind,sfp),header,obj)
+        return obj
+
+    def read_label(self,sfp):
+        """Cached `st7p.vectors.nvidia_vector_file_stream`. Returns (main, mpb)."""
+        return self.read("label",sfp)
+
+    # ------------------------------------------------------------------------:
+    def entries(self):
+        """Yields the paths of all entries in the cache directory."""
+        if not os.path.isdir(self.cache_dir): return
+        for fyle in os.listdir(self.cache_dir):
+            if fyle.endswith(".pkl"): yield os.path.join(self.cache_dir,fyle)
+
+    def evict(self,max_age=None):
+        """
+        Removes stale entries, i.e. entries whose dependencies changed or
+        disappeared. If `max_age` (seconds) is given, entries older than
+        that are removed too. Returns the number of removed entries.
+        """
+        removed = 0
+        now = time.time()
+        for entry in list(self.entries()):
+            try:
+                header = self._load_header(entry)
+                fresh, _ = self._is_fresh(header)
+                if max_age is not None and now - header["created"] > max_age: fresh = False
+            except Exception: fresh = False
+            if not fresh: self._remove(entry); removed += 1
+        # Leftovers of interrupted writes:
+        if os.path.isdir(self.cache_dir):
+            for fyle in os.listdir(self.cache_dir):
+                if fyle.endswith(".tmp"):
+                    self._remove(os.path.join(self.cache_dir,fyle))
+        return removed
+
+    def _auto_evict(self):
+        marker = os.path.join(self.cache_dir,".last_evict")
+        try:
+            if time.time() - os.path.getmtime(marker) < EVICT_INTERVAL: return
+        except OSError:
+            if not os.path.isdir(self.cache_dir): return
+        self.evict()
+        with open(marker,"w") as fh: fh.write("%s\n"%(time.time()))
+
+    def clear(self):
+        """Removes all entries."""
+        for entry in list(self.entries()): self._remove(entry)
+
+# ----------------------------------------------------------------------------:
+def __handle_cmdline_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cache-dir", default="",
+                        help="cache directory (default: $%s or ~/.cache/st7p)"%(CACHE_DIR_ENV))
+    parser.add_argument("--clear", action="store_true",
+                        help="remove all entries")
+    parser.add_argument("--max-age", type=float, default=None,
+                        help="also evict entries older than this many days")
+    args = parser.parse_args()
+    return args
+# ----------------------------------------------------------------------------:
+if __name__ == "__main__":
+    args = __handle_cmdline_args()
+    cache = ParseCache(cache_dir=args.cache_dir,evict=False)
+    if args.clear:
+        cache.clear()
+    else:
+        max_age = None
+        if args.max_age is not None: max_age = args.max_age * 24 * 3600
+        print("Evicted %s entries from %s"%(cache.evict(max_age=max_age),cache.cache_dir))
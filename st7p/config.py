@@ -12,7 +12,9 @@ checking the front of the line.
 """
 import os, sys, re, argparse
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import st7putils 
+from st7p import lazy
 # ----------------------------------------------------------------------------:
 def dut_interface(): 
     x = """
@@ -68,43 +70,44 @@ types of cards to meet specific test requirements.
 # the pin configuration file using the FW command DFDM'
 
 
-RE_HP93000_CONFIG = re.compile("^hp93000,config,\d\.\d$")
-RE_DDCH = re.compile("^DDCH\s+(?P<dps>[\d]+),\s*(?P<channels>[\d]+)$") 
-RE_PSTE = re.compile("^PSTE\s(?P<sites>[\d]+)$")
-RE_NOOP = re.compile("^NOOP (?P<param_1>\"[a-zA-Z\d\_.\s]{0,128}\"|\d*|(?!\s*)*),(?P<param_2>\"[a-zA-Z\d\_.]{0,128}\"|\d*|(?!\s*)*),(?P<param_3>\"[a-zA-Z\d\_.]{0,128}\"|\d*|(?!\s*)*),(?P<param_4>\"[a-zA-Z\d\_.]{0,128}\"|\d*|(?!\s*)*)$")
+RE_HP93000_CONFIG = lazy.compile("^hp93000,config,\d\.\d$")
+RE_DDCH = lazy.compile("^DDCH\s+(?P<dps>[\d]+),\s*(?P<channels>[\d]+)$") 
+RE_PSTE = lazy.compile("^PSTE\s(?P<sites>[\d]+)$")
+RE_NOOP = lazy.compile("^NOOP (?P<param_1>\"[a-zA-Z\d\_.\s]{0,128}\"|\d*|(?!\s*)*),(?P<param_2>\"[a-zA-Z\d\_.]{0,128}\"|\d*|(?!\s*)*),(?P<param_3>\"[a-zA-Z\d\_.]{0,128}\"|\d*|(?!\s*)*),(?P<param_4>\"[a-zA-Z\d\_.]{0,128}\"|\d*|(?!\s*)*)$")
 # TDC: 98664
-RE_DDIC = re.compile("^DDIC ")
+RE_DDIC = lazy.compile("^DDIC ")
 # TODO:
-RE_PSSL = re.compile("^PSSL\s+(?P<minV>[OFF0-9\.]+)\s*,\s*(?P<maxV>[OFF0-9\.]+)\s*,\s*(?P<maxSourceI>[OFF0-9\.]+)\s*,\s*(?P<maxSinkI>[OFF0-9\.]+)\s*,\s*\((?P<pins>.*)\)")
+RE_PSSL = lazy.compile("^PSSL\s+(?P<minV>[OFF0-9\.]+)\s*,\s*(?P<maxV>[OFF0-9\.]+)\s*,\s*(?P<maxSourceI>[OFF0-9\.]+)\s*,\s*(?P<maxSinkI>[OFF0-9\.]+)\s*,\s*\((?P<pins>.*)\)")
 # TODO: Power Supply Safety Limits TDC: 143177
 
 # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-RE_PALS_NO_CHN3 = re.compile("PALS\s*(?P<site>\d+)\s*,\s*(?P<chns1>[\d,\(\)]+)\s*,\s*(?P<chns>[\d,]*)\s*,\s*\((?P<name>[\w\/]+)\)")
+RE_PALS_NO_CHN3 = lazy.compile("PALS\s*(?P<site>\d+)\s*,\s*(?P<chns1>[\d,\(\)]+)\s*,\s*(?P<chns>[\d,]*)\s*,\s*\((?P<name>[\w\/]+)\)")
 # TODO: Channel 3 is typically for FVI16 HW
 
-RE_UPAS = re.compile("UPAS\s+(?P<site>\d+)\s*,\s*\"(?P<data>[01Xx]+)\"\s*,\s*\((?P<name>[\w\/]+)\)")
+RE_UPAS = lazy.compile("UPAS\s+(?P<site>\d+)\s*,\s*\"(?P<data>[01Xx]+)\"\s*,\s*\((?P<name>[\w\/]+)\)")
 
 
-RE_DFPN_TYP = re.compile("^DFPN\s+(?P<channelNo>\d+)\s*,\s*\"(?P<pinNo>[\w\s]*)\"\s*,\s*\((?P<pinName>[\w\/\[\]]+)\)$")
-RE_DFPN_GNG = re.compile("^DFPN\s+\((?P<channelNo>[\d\,\s]+)\),\"(?P<pinNo>[\w\s]*)\",\((?P<pinName>[\w\/]+)\)$")
+RE_DFPN_TYP = lazy.compile("^DFPN\s+(?P<channelNo>\d+)\s*,\s*\"(?P<pinNo>[\w\s]*)\"\s*,\s*\((?P<pinName>[\w\/\[\]]+)\)$")
+RE_DFPN_GNG = lazy.compile("^DFPN\s+\((?P<channelNo>[\d\,\s]+)\),\"(?P<pinNo>[\w\s]*)\",\((?P<pinName>[\w\/]+)\)$")
 
-RE_DFPS_SNG_CHN = re.compile("^DFPS\s*(?P<chn>\d+),(?P<polarity>[\w]+),\((?P<name>[\w\/]+)\)$")
-RE_DFPS_GNG_RNG = re.compile("^DFPS\s*\((?P<start>\d+)\-(?P<end>\d+)\),(?P<polarity>[\w]+),\((?P<name>[\w\/]+)\)$")
-RE_DFPS_GNG_LST = re.compile("^DFPS\s*\((?P<chns>[\d,]+)\),(?P<polarity>[\w]+),\((?P<name>[\w\/]+)\)$") 
+RE_DFPS_SNG_CHN = lazy.compile("^DFPS\s*(?P<chn>\d+),(?P<polarity>[\w]+),\((?P<name>[\w\/]+)\)$")
+RE_DFPS_GNG_RNG = lazy.compile("^DFPS\s*\((?P<start>\d+)\-(?P<end>\d+)\),(?P<polarity>[\w]+),\((?P<name>[\w\/]+)\)$")
+RE_DFPS_GNG_LST = lazy.compile("^DFPS\s*\((?P<chns>[\d,]+)\),(?P<polarity>[\w]+),\((?P<name>[\w\/]+)\)$") 
 
-RE_DFGP = re.compile("^DFGP (?P<pinType>[\w]+),\s*\((?P<pinList>[\w,\/\s\[\]]+)\),\((?P<pinGroup>[\w\d\_\/]+)\)$")
-RE_DFGE = re.compile("^DFGE (?P<groupType>[\w]+),\"(?P<groupExp>[\s\w\d\+\-\*]+)\",\((?P<pinGroup>[\w\d\_]+)\)$")
+RE_DFGP = lazy.compile("^DFGP (?P<pinType>[\w]+),\s*\((?P<pinList>[\w,\/\s\[\]]+)\),\((?P<pinGroup>[\w\d\_\/]+)\)$")
+RE_DFGE = lazy.compile("^DFGE (?P<groupType>[\w]+),\"(?P<groupExp>[\s\w\d\+\-\*\(\)\/]+)\",\((?P<pinGroup>[\w\d\_]+)\)$")
+RE_DFGE_TOKEN = lazy.compile(r"\s*(?:(?P<name>[\w\/]+)|(?P<op>[-+*()]))")
 
-RE_CONF_CTX = re.compile("^CONF \"(?P<ctx>\w+)\"\s*,\s*(?P<pinType>[\w]+),(?P<pinOperMode>[\w\d]+),\((?P<pinList>[\w,\/\[\]]+)\)$")
-RE_CONF_REG = re.compile("^CONF (?P<pinType>[\w]+),(?P<pinOperMode>[\w\d]+),\((?P<pinList>[\w,\/\[\]]+)\)$")
+RE_CONF_CTX = lazy.compile("^CONF \"(?P<ctx>\w+)\"\s*,\s*(?P<pinType>[\w]+),(?P<pinOperMode>[\w\d]+),\((?P<pinList>[\w,\/\[\]]+)\)$")
+RE_CONF_REG = lazy.compile("^CONF (?P<pinType>[\w]+),(?P<pinOperMode>[\w\d]+),\((?P<pinList>[\w,\/\[\]]+)\)$")
 
-RE_DFPT = re.compile("^DFPT\s*\((?P<pinList>[\w\,\s\@\[\]]+)\),\s*\((?P<port>[\w]+)\)$")
+RE_DFPT = lazy.compile("^DFPT\s*\((?P<pinList>[\w\,\s\@\[\]]+)\),\s*\((?P<port>[\w]+)\)$")
 
-RE_DFUP = re.compile("^DFUP \((?P<chNoList>[\d\s,]+)\)\s*,\s*\"(?P<setting>[01xX]+)\"\s*,\s*\((?P<name>[\w\/]+)\)$")
-RE_UPTI = re.compile("^UPTI (?P<time>[\d\.]+),\((?P<name>[\w\,]+)\)$")
+RE_DFUP = lazy.compile("^DFUP \((?P<chNoList>[\d\s,]+)\)\s*,\s*\"(?P<setting>[01xX]+)\"\s*,\s*\((?P<name>[\w\/]+)\)$")
+RE_UPTI = lazy.compile("^UPTI (?P<time>[\d\.]+),\((?P<name>[\w\,]+)\)$")
 
-RE_RDIV = re.compile("^RDIV\s+(?P<val>[\d\.]+),\((?P<pinlist>[\w,\@]+)\)")  
-RE_PSLC = re.compile("^PSLC\s+(?P<val>[\d\.]+),\((?P<pinlist>[\w,\@]+)\)")  
+RE_RDIV = lazy.compile("^RDIV\s+(?P<val>[\d\.]+),\((?P<pinlist>[\w,\@]+)\)")  
+RE_PSLC = lazy.compile("^PSLC\s+(?P<val>[\d\.]+),\((?P<pinlist>[\w,\@]+)\)")  
 
 
 
@@ -118,126 +121,131 @@ CONF_PIN_OP_MODES = ['DCSIGNAL','POWER','F160','F330','FAST','HV','STDDIFF','FAS
 # defined within the CONF command. 
 
 
+# ----------------------------------------------------------------------------:
+# Opcode handlers. Each handler receives the Config object under
+# construction, the stripped line, its line number and the debug flag. 
+def _read_header(obj,line,ln,debug): 
+    if not RE_HP93000_CONFIG.search(line): 
+        raise RuntimeError("Couldn't handle line: %s, %s"%(ln,line))
+
+def _read_dfpn(obj,line,ln,debug): obj.add_pin(Pins.process_dfpn(line,debug=debug))
+def _read_dfps(obj,line,ln,debug): obj.supplies.add(Supplies.process_dfps(line,debug=debug))
+def _read_dfgp(obj,line,ln,debug): obj.add_group(Groups.process_dfgp(line,debug=debug))
+def _read_dfge(obj,line,ln,debug): obj.add_group(Groups.process_dfge(line,cfo=obj,debug=debug))
+def _read_dfup(obj,line,ln,debug): obj.utility_purposes.add(UtilityPurposes.process_dfup(line,debug=debug))
+def _read_pste(obj,line,ln,debug): obj.sites = int(line[4:].strip())
+def _read_pals(obj,line,ln,debug): obj._process_pals(line,debug=debug)
+def _read_upas(obj,line,ln,debug): obj._process_upas(line,debug=debug)
+
+def _read_dfpt(obj,line,ln,debug): 
+    pinlist, name = RE_DFPT.search(line).groups()
+    obj.ports.add(Port(name,[x.strip() for x in pinlist.split(",")]))
+
+def _read_upti(obj,line,ln,debug): 
+    time, names = RE_UPTI.search(line).groups()
+    for name in names.split(","): 
+        obj.utility_purposes[name.strip()].settling_time = time
+
+def _read_conf(obj,line,ln,debug): 
+    ctx = RE_CONF_CTX.search(line)
+    cnf = RE_CONF_REG.search(line)
+    if   ctx: context,pintype,pin_op_mode,pinlist = ctx.groups() 
+    elif cnf: context = "DEFAULT"; pintype,pin_op_mode,pinlist = cnf.groups()
+    else: raise RuntimeError("Bad CONF cmd: %s"%(line))
+    if pintype == "DC": 
+        for supply in pinlist.split(","):
+            supply = supply.strip()
+            obj.supplies[supply].context = context
+            obj.supplies[supply].pin_type = pintype
+            obj.supplies[supply].pin_op_mode = pin_op_mode
+        return 
+    elif pintype in ["IO","I","O"]: 
+        for pin in pinlist.split(","): 
+            pin = pin.strip()
+            obj.pins[pin].context  = context
+            obj.pins[pin].pin_type = pintype
+            obj.pins[pin].pin_op_mode= pin_op_mode
+        return 
+    raise RuntimeError("CONF pintype (%s) not supported"%(pintype))
+
+def _read_rdiv(obj,line,ln,debug): 
+    match = RE_RDIV.search(line)
+    if not match: raise RuntimeError("Couldn't handle line: %s, %s"%(ln,line))
+    val, pinlist = match.groups()
+    if    pinlist =="@": pinlist = obj.pins.names()
+    else: pinlist = pinlist.split(',')
+    for pin in pinlist: obj.pins[pin.strip()].rdiv = float(val)
+
+def _read_pslc(obj,line,ln,debug): 
+    match = RE_PSLC.search(line)
+    if not match: 
+        print("TODO: %s: Skipping instances of PSLC: %s"%("st7p.pins.read",line)); return 
+    val, pinlist = match.groups()
+    if    pinlist =="@": pinlist = obj.supplies.names()
+    else: pinlist = pinlist.split(',')
+    for supply in pinlist: obj.supplies[supply.strip()].load_cap = float(val)
+
+def _read_noop(obj,line,ln,debug): 
+    if debug: print("DEBUG: (%s): Skipping instances of 'NOOP'"%("st7p.pins.read"))
+
+def _read_pssl(obj,line,ln,debug): 
+    match = RE_PSSL.search(line) 
+    if not match: raise RuntimeError("problem with PSSL line: [%s] %s"%(ln,line))
+    minV, maxV, maxSourceI, maxSinkI, pinlist = match.groups()
+    for pin in pinlist.split(","): 
+        pin = pin.strip()
+        obj.supplies[pin].minV = minV
+        obj.supplies[pin].maxV = maxV
+        obj.supplies[pin].maxSourceI = maxSourceI
+        obj.supplies[pin].maxSinkI = maxSinkI
+
+def _skip_todo(obj,line,ln,debug): 
+    print("TODO: %s: Skipping instances of %s: %s"%("st7p.pins.read",line[:4],line))
+
+# [opcode] -> handler. The opcode is the first four characters of a line.
+CONFIG_OPCODES = {"hp93" : _read_header,
+                  "DFPN" : _read_dfpn,
+                  "DFPS" : _read_dfps,
+                  "DFGP" : _read_dfgp,
+                  "DFGE" : _read_dfge,
+                  "DFUP" : _read_dfup,
+                  "PSTE" : _read_pste,
+                  "PALS" : _read_pals,
+                  "UPAS" : _read_upas,
+                  "DFPT" : _read_dfpt,
+                  "UPTI" : _read_upti,
+                  "CONF" : _read_conf,
+                  "RDIV" : _read_rdiv,
+                  "PSLC" : _read_pslc,
+                  "NOOP" : _read_noop,
+                  "PSSL" : _read_pssl}
+# Opcodes that are recognized but not processed (yet):
+CONFIG_TODO_OPCODES = ["UDEF","DFAN","UDAN","UDPS","DFUT","UDUT","UDUP","DFPR",
+                       "UDPR","PACT","PQFC","PSFC","STME","DDCH","DDIC","PSVR",
+                       "DDSL","DFDM","PSRG","PSVD","PSSF","noop"]
+for _opcode in CONFIG_TODO_OPCODES: CONFIG_OPCODES[_opcode] = _skip_todo
+
 # ----------------------------------------------------------------------------:
 def read(sfp,debug=False):
     """ 
     This method will read the provided pinconfig file and return 
     the parsed object. 
+
+    The file is streamed line by line; each line is dispatched to its
+    handler through CONFIG_OPCODES by its four character opcode.
     """
     func = "st7p.pins.read"
     if debug: print("DEBUG: %s: Recieved file: %s"%(func,sfp))
     obj = Config(sfp=sfp)
+    opcodes = CONFIG_OPCODES
     with open(sfp,"r") as fh: 
-        lines = fh.readlines()
-        for ln, line in enumerate(lines, start=1): 
+        for ln, line in enumerate(fh, start=1): 
             line = line.strip()
             if debug: print("DEBUG: (%s): [%d] %s"%(func,ln,line))
-            #print("DEBUG: (%s): [%d] %s"%(func,ln,line))
             if not line: continue 
-            match = RE_HP93000_CONFIG.search(line)
-            if match: continue  
-
-            if line.startswith("DFPN"): obj.pins.add(Pins.process_dfpn(line,debug=debug));continue 
-            if line.startswith("DFPS"): obj.supplies.add(Supplies.process_dfps(line,debug=debug));continue 
-            if line.startswith("DFGP"): obj.groups.add(Groups.process_dfgp(line,debug=debug));continue
-            if line.startswith("DFGE"): obj.groups.add(Groups.process_dfge(line,cfo=obj,debug=debug));continue
-            if line.startswith("DFUP"): obj.utility_purposes.add(UtilityPurposes.process_dfup(line,debug=debug));continue
-            if line.startswith("PSTE"): obj.sites = int(line[4:].strip()); continue 
-            if line.startswith("PALS"): obj._process_pals(line,debug=debug); continue 
-            if line.startswith("UPAS"): obj._process_upas(line,debug=debug); continue 
-
-            if line.startswith("DFPT"): 
-                pinlist, name = RE_DFPT.search(line).groups()
-                obj.ports.add(Port(name,[x.strip() for x in pinlist.split(",")]))
-                continue 
-
-            if line.startswith("UPTI"): 
-                time, names = RE_UPTI.search(line).groups()
-                for name in names.split(","): 
-                    obj.utility_purposes[name.strip()].settling_time = time
-                continue 
-
-            if line.startswith("CONF"): 
-                ctx = RE_CONF_CTX.search(line)
-                cnf = RE_CONF_REG.search(line)
-                if   ctx: context,pintype,pin_op_mode,pinlist = ctx.groups() 
-                elif cnf: context = "DEFAULT"; pintype,pin_op_mode,pinlist = cnf.groups()
-                else: raise RuntimeError("Bad CONF cmd: %s"%(line))
-                if pintype == "DC": 
-                    for supply in pinlist.split(","):
-                        pin = pin.strip()
-                        obj.supplies[supply].context = context
-                        obj.supplies[supply].pin_type = pintype
-                        obj.supplies[supply].pin_op_mode = pin_op_mode
-                    continue 
-                elif pintype in ["IO","I","O"]: 
-                    for pin in pinlist.split(","): 
-                        pin = pin.strip()
-                        obj.pins[pin].context  = context
-                        obj.pins[pin].pin_type = pintype
-                        obj.pins[pin].pin_op_mode= pin_op_mode
-                    continue 
-                raise RuntimeError("CONF pintype (%s) not supported"%(pintype))
-
-            match = RE_RDIV.search(line)
-            if match: 
-                val, pinlist = match.groups()
-                if    pinlist =="@": pinlist = obj.pins.names()
-                else: pinlist = pinlist.split(',')
-                for pin in pinlist: obj.pins[pin.strip()].rdiv = float(val)
-                continue 
-            match = RE_PSLC.search(line)
-            if match: 
-                val, pinlist = match.groups()
-                if    pinlist =="@": pinlist = obj.supplies.names()
-                else: pinlist = pinlist.split(',')
-                for supply in pinlist: obj.supplies[supply.strip()].load_cap = float(val)
-                continue 
-
-            if line.startswith("NOOP"): 
-                if debug: print("DEBUG: (%s): Skipping instances of 'NOOP'"%(func))
-                continue 
-
-            # ================================================================: 
-            # RECENT UPDATES =================================================: 
-            if line.startswith("PSSL"): 
-                match = RE_PSSL.search(line) 
-                if not match: raise RuntimeError("problem with PSSL line: [%s] %s"%(ln,line))
-                minV, maxV, maxSourceI, maxSinkI, pinlist = match.groups()
-                for pin in pinlist.split(","): 
-                    pin = pin.strip()
-                    obj.supplies[pin].minV = minV
-                    obj.supplies[pin].maxV = maxV
-                    obj.supplies[pin].maxSourceI = maxSourceI
-                    obj.supplies[pin].maxSinkI = maxSinkI
-                continue 
-            # TODO Section ---------------------------------------------------:
-            if line.startswith("UDEF"): print("TODO: %s: Skipping instances of UDEF: %s"%(func,line));continue  # TODO: 
-            if line.startswith("DFAN"): print("TODO: %s: Skipping instances of DFAN: %s"%(func,line));continue  # TODO: 
-            if line.startswith("UDAN"): print("TODO: %s: Skipping instances of UDAN: %s"%(func,line));continue  # TODO: 
-            if line.startswith("UDPS"): print("TODO: %s: Skipping instances of UDPS: %s"%(func,line));continue  # TODO: 
-            if line.startswith("DFUT"): print("TODO: %s: Skipping instances of DFUT: %s"%(func,line));continue  # TODO: 
-            if line.startswith("UDUT"): print("TODO: %s: Skipping instances of UDUT: %s"%(func,line));continue  # TODO: 
-            if line.startswith("UDUP"): print("TODO: %s: Skipping instances of UDUP: %s"%(func,line));continue  # TODO: 
-            #if line.startswith("UPAS"): print("TODO: %s: Skipping instances of UPAS: %s"%(func,line));continue  # TODO: 
-            if line.startswith("DFPR"): print("TODO: %s: Skipping instances of DFPR: %s"%(func,line));continue  # TODO: 
-            if line.startswith("UDPR"): print("TODO: %s: Skipping instances of UDPR: %s"%(func,line));continue  # TODO: 
-            if line.startswith("PACT"): print("TODO: %s: Skipping instances of PACT: %s"%(func,line));continue  # TODO: 
-            #if line.startswith("PALS"): print("TODO: %s: Skipping instances of PALS: %s"%(func,line));continue  # TODO: 
-            if line.startswith("PQFC"): print("TODO: %s: Skipping instances of PQFC: %s"%(func,line));continue  # TODO: 
-            if line.startswith("PSFC"): print("TODO: %s: Skipping instances of PSFC: %s"%(func,line));continue  # TODO: 
-            if line.startswith("STME"): print("TODO: %s: Skipping instances of STME: %s"%(func,line));continue  # TODO: 
-            if line.startswith("DDCH"): print("TODO: %s: Skipping instances of DDCH: %s"%(func,line));continue  # TODO: 
-            if line.startswith("DDIC"): print("TODO: %s: Skipping instances of DDIC: %s"%(func,line));continue  # TODO
-            if line.startswith("PSVR"): print("TODO: %s: Skipping instances of PSVR: %s"%(func,line));continue  # TODO
-            if line.startswith("DDSL"): print("TODO: %s: Skipping instances of DDSL: %s"%(func,line));continue  # TODO
-            if line.startswith("PSLC"): print("TODO: %s: Skipping instances of PSLC: %s"%(func,line));continue  # TODO
-            if line.startswith("DFDM"): print("TODO: %s: Skipping instances of DFDM: %s"%(func,line));continue  # TODO
-            if line.startswith("PSRG"): print("TODO: %s: Skipping instances of PSRG: %s"%(func,line));continue  # TODO
-            if line.startswith("PSVD"): print("TODO: %s: Skipping instances of PSVD: %s"%(func,line));continue  # TODO
-            if line.startswith("PSSF"): print("TODO: %s: Skipping instances of PSSF: %s"%(func,line));continue  # TODO
-            if line.startswith("noop"): print("TODO: %s: Skipping instances of noop: %s"%(func,line));continue
-            raise RuntimeError("Couldn't handle line: %s, %s"%(ln,line))
+            handler = opcodes.get(line[:4])
+            if handler is None: raise RuntimeError("Couldn't handle line: %s, %s"%(ln,line))
+            handler(obj,line,ln,debug)
     ## Add '@' port
     obj.ports.add(Port("@",pins=obj.pins.names()))
     return obj
@@ -431,7 +439,75 @@ class Ports(st7putils.Container):
         
 
 # ----------------------------------------------------------------------------:
-# TODO: Expand expression
+def tokenize_dfge(expr): 
+    """Returns the list of (kind, value) tokens of a DFGE expression; kind is 'name' or 'op'."""
+    tokens = []
+    pos = 0 
+    end = len(expr.rstrip())
+    while pos < end: 
+        match = RE_DFGE_TOKEN.match(expr,pos)
+        if not match: raise RuntimeError("Bad character at %s in DFGE expression: %s"%(pos,expr))
+        kind = match.lastgroup
+        tokens.append((kind,match.group(kind)))
+        pos = match.end()
+    return tokens
+
+def eval_dfge(expr,cfo): 
+    """ 
+    Evaluates a DFGE group expression against the pins and groups of a
+    Config object and returns the resulting pins, in pin (DFPN) order.
+
+    Terms are pin or group names. '+' is the union, '-' the difference 
+    and '*' the intersection; '*' binds tighter than '+' and '-', which
+    are applied left to right. Parentheses group sub-expressions. 
+
+    Each term is a single lookup in `Config._names`; groups resolve to 
+    their memoized pin set (`Config.group_pin_set`), so a nested group 
+    reference costs no more than the pins it contributes.
+    """
+    tokens = tokenize_dfge(expr)
+    if not tokens: raise RuntimeError("Empty DFGE expression")
+    pos = [0]
+
+    def peek(): 
+        if pos[0] < len(tokens): return tokens[pos[0]]
+        return (None,"<end>")
+
+    def atom(): 
+        kind, value = peek(); pos[0] += 1
+        if kind == "name": 
+            obj = cfo._names.get(value)
+            if obj is None: raise RuntimeError("Pin item %s in not a Pin or Group"%(value))
+            if isinstance(obj,Pin): return set([value])
+            return set(cfo.group_pin_set(value))
+        if value == "(": 
+            pins = union()
+            if peek()[1] != ")": raise RuntimeError("Expecting ')', found '%s' in DFGE expression: %s"%(peek()[1],expr))
+            pos[0] += 1
+            return pins 
+        raise RuntimeError("Unexpected token '%s' in DFGE expression: %s"%(value,expr))
+
+    def intersection(): 
+        pins = atom()
+        while peek()[1] == "*": 
+            pos[0] += 1; pins &= atom()
+        return pins 
+
+    def union(): 
+        pins = intersection()
+        while peek()[1] in ["+","-"]: 
+            op = peek()[1]; pos[0] += 1 
+            if op == "+": pins |= intersection()
+            else:         pins -= intersection()
+        return pins 
+
+    pins = union()
+    if pos[0] != len(tokens): 
+        raise RuntimeError("Unexpected token '%s' in DFGE expression: %s"%(peek()[1],expr))
+    rows = cfo._rows; last = len(rows)
+    return sorted(pins,key=lambda pin: rows.get(pin,last))
+
+# ----------------------------------------------------------------------------:
 class Group(object): 
    def __init__(self, name, pin_type, pins, expr=False):
        self.name = name 
@@ -508,41 +584,7 @@ class Groups(st7putils.Container):
             print("WARNING: (%s): No Config object provided. Just storing expr as pins for DFGE."%(func))
             return Group(name=gn.strip(),pin_type=pt,pins=pe,expr=True)
 
-        else: 
-            pins_dict = OrderedDict()
-            queue = [ ]
-            flag = "+"
-            for char in pe:  
-                if char == '': continue  
-                if re.search("\w|\/",char): queue.append(char); continue 
-                if char == "+" or char == "-":  
-                    pins_dict["".join(queue)] = flag; queue = []; flag = char; continue 
-            pins_dict["".join(queue)] = flag; queue = []; flag = char 
-    
-            pins = set()
-            for item, flag in pins_dict.items(): 
-                if item in cfo.pins.names(): 
-                    if flag == "+": pins.add(item)
-                    elif flag == "-": pins.remove(item)
-                    else: raise RuntimeError("Unsupported flag type: %s"%(flag))
-                elif item in cfo.groups.names():  
-                    _pins = cfo.groups[item].pins 
-                    if flag == "+": 
-                        for _pin in _pins: pins.add(_pin)
-                    if flag == "-":
-                        for _pin in _pins: 
-                            if _pin in pins: pins.remove(_pin)
-                            else: pass 
-                else: raise RuntimeError("Pin item %s in not a Pin or Group"%(item))
-            return Group(name=gn.strip(),pin_type=pt,pins=list(pins),expr=True)
-   
-                    
-  
-        
-        # TODO: Create kernal to parse the expression and use the obj.groups 
-        # to build the actuall pin list. 
-        # Thus `pins` get properly set, then we pass the expr so that it is stored.
-        
+        return Group(name=gn.strip(),pin_type=pt,pins=eval_dfge(pe,cfo),expr=True)
 
 
 
@@ -631,6 +673,13 @@ class Config(object):
         self.groups    = Groups()
         self.utility_purposes = UtilityPurposes() 
         self.sites     = 0 # Set by PSTE
+        # Indexes, maintained by `add_pin`, `add_group` and PALS: 
+        self._names    = {} # [name] -> Pin or Group (pins take precedence)
+        self._rows     = {} # [pin name] -> row within the channel matrix
+        self._channels = {} # [channel] -> (pin name, site), digital pins only; first writer wins
+        self._channel_conflicts = [] # (channel, pin name, site) reusing an indexed channel
+        self._group_sets = {} # [group name] -> frozenset of pins, see `group_pin_set`
+        self._matrix   = None # Built by the first `channel_matrix`
 
 
 
@@ -662,15 +711,14 @@ class Config(object):
         match = RE_PALS_NO_CHN3.search(line)
         if match: 
             site, chns1, chns2, name = match.groups(); site = int(site);
-            print(site,chns1,chns2,name)
             if name in self.pins: 
                 #if site in self.pins[pin].channels: raise RuntimeError("Site is already configured for %s"%(name))
                 if len(chns1.split(",")) > 1: raise RuntimeError("Not expecting ganged channels on digital pin (this might be fro DC Scale channel). %s"%(line)) 
                 if chns1.startswith("("): raise RuntimeError("Not expecting ganged channels on digital pin (this might be fro DC Scale channel). %s"%(line)) 
-                self.pins[name].channels[site] = [chns1]
+                self._index_channels(self.pins[name],site,[chns1])
                 # Sanity checks: 
                 if chns2 != "": raise RuntimeError("Expecting empty chns2 slot for Digital pin entry: %s"%(line))
-                print("DEBUG: (%s): Added site %s channels %s to pin %s"%(func,site,chns1,name))
+                if debug: print("DEBUG: (%s): Added site %s channels %s to pin %s"%(func,site,chns1,name))
 
             if name in self.supplies: 
                 if len(chns1.split(",")) > 1: 
@@ -680,11 +728,93 @@ class Config(object):
                 else: chns1 = [chns1]
                 self.supplies[name].channels[site] = chns1
                 if chns2 != "": raise RuntimeError("Expecting empty chns2 slot for DPS pin entry (unless DC Scale): %s"%(line))
-                print("DEBUG: (%s): Added site %s channels %s to supply %s"%(func,site,chns1,name))
+                if debug: print("DEBUG: (%s): Added site %s channels %s to supply %s"%(func,site,chns1,name))
         else: raise RuntimeError("PALS line cannot be processed: %s"%(line))
         
         
 
+    # ------------------------------------------------------------------------: 
+    def add_pin(self,pin): 
+        """Adds a Pin (DFPN) and indexes its name and channels."""
+        self.pins.add(pin)
+        self._names[pin.name] = pin 
+        self._rows[pin.name] = len(self._rows)
+        for site, channels in pin.channels.items(): 
+            self._index_channels(pin,site,channels)
+
+    def add_group(self,group): 
+        """Adds a Group (DFGP/DFGE), merging with a same-named group."""
+        self.groups.add(group)
+        self._group_sets.pop(group.name,None)
+        if group.name not in self.pins: 
+            self._names[group.name] = self.groups[group.name]
+
+    def group_pin_set(self,name): 
+        """Returns the pins of group `name` as a frozenset, memoized until the group changes."""
+        pins = self._group_sets.get(name)
+        if pins is None: 
+            pins = frozenset(self.groups[name].pins)
+            self._group_sets[name] = pins 
+        return pins 
+
+    def _index_channels(self,pin,site,channels): 
+        """Sets the `site` channels of `pin` and updates the channel index."""
+        for channel in pin.channels.get(site,[]): 
+            self._release_channel(int(channel),pin.name,site)
+        pin.channels[site] = channels
+        for channel in channels: 
+            self._claim_channel(int(channel),pin.name,site)
+        self._matrix = None 
+
+    def _claim_channel(self,channel,name,site): 
+        """
+        Indexes `channel` to (name, site). The first pin written keeps the
+        channel; later ones are recorded in `_channel_conflicts` and warned.
+        """
+        func = "st7p.config.Config._claim_channel"
+        owner = self._channels.get(channel)
+        if owner is None: 
+            self._channels[channel] = (name,site)
+            return 
+        if owner == (name,site): return 
+        self._channel_conflicts.append((channel,name,site))
+        print("WARNING: (%s): Channel %s is being reused on site %s for pin %s (used by pin %s on site %s)"%(
+              func,channel,site,name,owner[0],owner[1]))
+
+    def _release_channel(self,channel,name,site): 
+        """Drops (name, site) from the index of `channel`; the first conflicting pin takes over."""
+        entry = (channel,name,site)
+        if entry in self._channel_conflicts: 
+            self._channel_conflicts.remove(entry)
+            return 
+        if self._channels.get(channel) != (name,site): return 
+        del self._channels[channel]
+        for i, conflict in enumerate(self._channel_conflicts): 
+            if conflict[0] == channel: 
+                del self._channel_conflicts[i]
+                self._channels[channel] = conflict[1:]
+                return 
+
+    def channel_conflicts(self): 
+        """Returns the (channel, pin name, site) entries reusing a channel of another pin/site."""
+        return list(self._channel_conflicts)
+
+    def reindex(self): 
+        """
+        Rebuilds the name and channel indexes. Only needed after modifying
+        `pins`, `groups` or `Pin.channels` directly.
+        """
+        self._names = {}; self._rows = {}; self._channels = {}; self._matrix = None 
+        self._channel_conflicts = []
+        self._group_sets = {}
+        for grp in self.groups: self._names[grp.name] = grp 
+        for row, pin in enumerate(self.pins): 
+            self._names[pin.name] = pin 
+            self._rows[pin.name] = row 
+            for site, channels in pin.channels.items(): 
+                for channel in channels: 
+                    self._claim_channel(int(channel),pin.name,site)
+
     #def add_dfpn(self,name,pogo,pinNo): 
     #    self.pins.add(Pin(name=name,pogo=pogo,pinNo=pinNo))
     def add_dfps(self,pogos,name,polarity): 
@@ -743,15 +873,50 @@ class Config(object):
 
           If name is not found, and empty list and string will be returned.
         """
-        # Search DFPNs first 
-        for pin in self.pins: 
-            if name == pin.name: return [pin.name], "pin"
-        # Search the DGGP and DFGE second 
-        for grp in self.groups: 
-            if grp.name == name:  
-                return grp.pins, "group" 
-        return [],""
-      
+        obj = self._names.get(name)
+        if obj is None: return [],""
+        if isinstance(obj,Pin): return [obj.name], "pin"
+        return obj.pins, "group" 
+
+    def get_channel(self,channel): 
+        """
+        Returns (pin name, site) of a digital channel, or ("",0) if the
+        channel is not assigned. `channel` can be an int or string. For a
+        reused channel the pin written first is returned, see
+        `channel_conflicts`.
+        """
+        return self._channels.get(int(channel),("",0))
+
+    def pin_row(self,name): 
+        """Returns the row of pin `name` within `channel_matrix`."""
+        return self._rows[name]
+
+    def channel_matrix(self): 
+        """
+        Returns the digital channels as an integer array of shape
+        (pins, sites); row `pin_row(name)` holds the channels of a pin,
+        column site-1 those of a site. The array is stored site-major 
+        (Fortran order), so per-site columns are contiguous. Unassigned
+        entries are 0; for ganged pins the first channel is stored. 
+
+        The array is built once and shared until the channels change; 
+        copy it before modifying.
+        """
+        func = "st7p.config.Config.channel_matrix"
+        np = lazy.numpy()
+        if np is None: raise RuntimeError("(%s): NumPy is required"%(func))
+        if self._matrix is None: 
+            sites = self.sites
+            for pin in self.pins: 
+                if pin.channels: sites = max(sites,max(pin.channels))
+            matrix = np.zeros((len(self._rows),sites),dtype=np.int64,order="F")
+            for pin in self.pins: 
+                row = self._rows[pin.name]
+                for site, channels in pin.channels.items(): 
+                    if channels: matrix[row,site-1] = int(channels[0])
+            self._matrix = matrix 
+        return self._matrix
+
     # ------------------------------------------------------------------------: 
     def summary(self,mask=False): 
         """ 
@@ -783,15 +948,7 @@ class Config(object):
 
 
 def _dump_digital_pogos(cfo):
-    pogos = {} 
-    sites = cfo.sites
-    for pin in cfo.pins:
-        for site in range(1,cfo.sites + 1): 
-            _pogos = pin.channels[site]
-            for pogo in _pogos:  
-                pogos[int(pogo)] = {"name":pin.name}
-    pogos.keys().sort()
-    for pogo in pogos: 
+    for pogo in sorted(cfo._channels): 
         print(pogo)
     return 
             
@@ -804,201 +961,189 @@ def write_pogo_report(cfo,digHW= "PS1600", ):
         print("%s -> %s, %s"%(pin.channel,pin.name,digHW))
     
 
+def _smt8_sites(cfo,sites=None): 
+    """Returns the list of source sites to export (default: all of PSTE)."""
+    if sites is None: return list(range(1,int(cfo.sites)+1))
+    sites = [int(site) for site in sites]
+    for site in sites: 
+        if site < 1 or site > int(cfo.sites): 
+            raise RuntimeError("Site %s is not within the %s configured sites"%(site,cfo.sites))
+    if len(set(sites)) != len(sites): raise RuntimeError("Duplicate sites: %s"%(sites))
+    return sites
+
+def _smt8_block(header,lines,pad="  "): 
+    yield "%s%s\n"%(pad,header)
+    for line in lines: yield "%s%s\n"%(pad*2,line)
+    yield "%s}\n"%(pad)
+
+def _smt8_pin_lines(cfo,pin,sites): 
+    for new_site, site in enumerate(sites,start=1): 
+        channels = pin.channels.get(site)
+        if channels is None: 
+            raise RuntimeError("No site %s for pin %s: %s -> %s"%(site,pin.name,pin.name,pin.channels))
+        if len(channels) > 1: raise RuntimeError("Not supporting ganged digtial channels yet: %s -> %s"%(pin.name, pin.channels))
+        channel = channels[0]
+        yield "site %s { pogo = %s; }"%(new_site,channel)
+
+def _smt8_supply_lines(supply,sites): 
+    for new_site, site in enumerate(sites,start=1): 
+        channels = supply.channels.get(site)
+        if channels is None: 
+            raise RuntimeError("No site %s for supply %s: %s -> %s"%(site,supply.name,supply.name,supply.channels))
+        yield "site %s { pogo = %s; }"%(new_site,"|".join(channels))
+
+def smt8_dbd_lines(cfo,name,sites=None): 
+    """ 
+    Yields the lines of the SMT8 dut board (.dbd) file: digital pins, 
+    supplies and utility lines, read directly from the Config object.
+    """
+    sites = _smt8_sites(cfo,sites)
+    pad = "  "
+    yield "dutboard %s {\n"%(name)
+    yield "%ssites = %s;\n"%(pad,len(sites))
+    yield "\n%s// Digital Pins -------------------------------------------------:\n"%(pad)
+    for pin in cfo.pins: 
+        for line in _smt8_block("signal %s {"%(pin.name),_smt8_pin_lines(cfo,pin,sites)): yield line
+    yield "\n%s// Supply Pins -------------------------------------------------:\n"%(pad)
+    # TODO: how to store: PSLC, DFDM, PSRG, PSVD, PSSF
+    for supply in cfo.supplies: 
+        for line in _smt8_block("signal %s {"%(supply.name),_smt8_supply_lines(supply,sites)): yield line
+    yield "\n%s// Utility Lines: -------------------------------------------------:\n"%(pad)
+    # All channels are defined in DFUP. Nothing addded in UPAS
+    seen = set()
+    for utp in cfo.utility_purposes: 
+        for channel in utp.channel_settings[1]: 
+            if channel in seen: continue 
+            seen.add(channel)
+            lines = ("site %s { @Shared pogo = %s; }"%(new_site,channel) for new_site in range(1,len(sites)+1))
+            for line in _smt8_block("signal UTI_%s {"%(channel),lines): yield line
+    yield "}\n" # Close dbd
+
+def smt8_fixture_delay_lines(cfo,chn_attrs,name,base_name,sites=None): 
+    """Yields the lines of the dbd file adding fixture delays to `base_name`."""
+    sites = _smt8_sites(cfo,sites)
+    pad = "  "
+    yield "import configuration.%s;\n"%(base_name)
+    yield "dutboard %s {\n"%(name)
+    yield "%sproperty fixtureDelay {\n"%(pad)
+    for pin in cfo.pins: 
+        yield "%s%s {\n"%(2*pad,pin.name)
+        for new_site, site in enumerate(sites,start=1): 
+            yield "%ssite %d {\n"%(3*pad,new_site)
+            yield "%sfixtureDelay = %s ns;\n"%(4*pad,chn_attrs[pin.channels[site][0]])
+            yield "%s}\n"%(3*pad)
+        yield "%s}\n"%(2*pad)
+    yield "%s}\n"%(pad)
+    yield "}\n"
+
+def smt8_ports_and_groups_lines(cfo): 
+    """Yields the lines of the ports_and_groups spec."""
+    yield "spec ports_and_groups {\n"
+    for port in cfo.ports: 
+        if port.name == "@": continue 
+        yield "  group %s = %s;\n"%(port.name,"+".join(port.pins))
+    for grp in cfo.groups: 
+        yield "  group %s = %s;\n"%(grp.name,"+".join(grp.pins))
+    yield "}\n"
+
+def smt8_utility_purpose_lines(up,sites): 
+    """Yields the lines of a utility-purpose spec."""
+    yield "spec %s {\n"%(up.name)
+    for site in sites: 
+        for channel, value in up.channel_settings.get(site,{}).items(): 
+            if (value == "X" or value == "x"): continue
+            yield "  setup utility UTI_%s { value = %s; }\n"%(channel,value)
+    yield "}\n"
+
+def _write_lines(path,lines): 
+    """Streams `lines` into `path`. The file only appears once complete."""
+    tmp = "%s.%s.tmp"%(path,os.getpid())
+    try: 
+        with open(tmp,"w",buffering=1<<16) as writer: 
+            writer.writelines(lines)
+        os.replace(tmp,path)
+    except BaseException: 
+        if os.path.isfile(tmp): os.remove(tmp)
+        raise 
+    return path 
+
 # ----------------------------------------------------------------------------:
 # Using the utility instrument: TDC: 342460
 # -----------------------------------------
 # First of all, you need to define the utitliy lines in the DUT board file
 # as DUT signals  (not as utilityLines signals). 
 #
-def write_smt8(cfo,chn_attrs=None,name="",directory=""):
+def write_smt8(cfo,chn_attrs=None,name="",directory="",sites=None,workers=None,debug=False):
     """ 
     This funciton creates a SMT8 dut board description file
     from the `st7p.config.Config` object.
-    """
-    func = "st7p.config.write_smt8"
-    if not isinstance(cfo,Config): 
-        raise ValueError("'cfo' must be of type st7p.config.Config")
-    #if name == "": name = "smt8_config.dbd"; name_wo_suffix = "smt8_config"
-    #else: 
-    #    if not name.endswith(".dbd"): name += ".dbd"
-    #    name_wo_suffix = name.replace(".dbd","")
 
+    Each output file is streamed from the Config object through a line
+    generator (see `smt8_dbd_lines` and friends), so memory use does not
+    grow with the number of signals. 
 
-    if directory == "": 
-        directory = "configuration" # os.getcwd()
-        os.mkdir(directory)
-        
-    else: pass # TODO: Should flush this out 
+    Parameters: 
+      cfo : st7p.config.Config 
 
+      chn_attrs : dictionary, default = None 
+        [channel] -> fixture delay (see `read_channel_attribute_file`). If 
+        given, '<name>_without_fxd.dbd' and '<name>_with_fxd.dbd' are 
+        written, otherwise '<name>.dbd'. 
 
-    if chn_attrs: 
-         if not name: 
-             basename = "smt8_config"
-             wo_fxd = basename + "_without_fxd"
-             wi_fxd = basename + "_with_fxd"
-             dbd_wo_suffix = wo_fxd
-             dbd = os.path.join(directory,wo_fxd + ".dbd")  
-             dbd_wi_fxd = os.path.join(directory,wi_fxd + ".dbd")
+      name : string, default = "smt8_config"
+        Base name of the dbd files. 
 
-    #print("Creating dbd file at: %s"%(dbd)) 
-    sites = int(cfo.sites) 
+      directory : string, default = "configuration"
+        Output directory, created if missing. 
 
+      sites : list of int, default = None 
+        Sites to export. The selected sites are renumbered 1..N in the 
+        given order. None exports all sites. 
 
-    channelToName = {}
-    pinToSiteChannels = OrderedDict() 
+      workers : int, default = None 
+        Number of files written concurrently. None uses os.cpu_count(), 
+        1 writes them one after the other.
 
-    # cache al DFPN lines 
-    digpins = []
-    for pin in cfo.pins: 
-        digpins.append(["signal %s {"%(pin.name)])
-  
-        pinToSiteChannels[pin.name] = OrderedDict()
-
-        for site in range(1,sites+1): 
-            try: 
-                channels = pin.channels[site]
-            except:
-                raise RuntimeError("No site %s for pin %s: %s -> %s"%(site,pin.name,pin.name,pin.channels))
-      
-            if len(pin.channels[site]) > 1: raise RuntimeError("Not supporting ganged digtial channels yet: %s -> %s"%(pin.name, pin.channels))
-            channel = pin.channels[site][0]
-            digpins[-1].append("site %s { pogo = %s; }"%(site,channel))
-
-            if channel in channelToName: 
-                print("WARNING: Channel %s is being resued on site %s for pin %s"%(channel,site,pin.name))
-            channelToName[channel] = pin.name 
-            
-            pinToSiteChannels[pin.name][site] = channel
+      debug : bool, default = False 
+        If true, the size of the digital channel index is reported. 
 
-        digpins.append(["}"]) 
-    # cache all the supplies: 
-    dpspins = []
-    for supply in cfo.supplies: 
-        dpspins.append(["signal %s {"%(supply.name)])
-        for site in range(1,sites+1): 
-            try: 
-                channels = supply.channels[site]
-            except:
-                raise RuntimeError("No site %s for supply %s: %s -> %s"%(site,supply.name,supply.name,supply.channels))
-            if len(channels) > 1: channels = "|".join(supply.channels[site])
-            else: channels = supply.channels[site][0]
-            dpspins[-1].append("site %s { pogo = %s; }"%(site,channels))
-        dpspins.append(["}"]) 
-    # TODO: how to store: PSLC, DFDM, PSRG, PSVD, PSSF
-    
-
-    # cache all your utility lines
-    utillines = []; util_channels = set()
-    for utp in cfo.utility_purposes:
-        channels = list(utp.channel_settings[1].keys())# All channels are defined in DFUP. Nothing addded in UPAS
-        util_channels.update(channels)
-    for channel in util_channels: 
-        utillines.append(["signal UTI_%s {"%(channel)])
-        for site in range(1,sites+1): 
-            utillines[-1].append("site %s { @Shared pogo = %s; }"%(site,channel))
-        utillines.append(["}"]) 
-
-    # cache all port defintions: 
-    portlines = []
-    for port in cfo.ports: 
-        if port.name == "@": continue 
-        portlines.append("group %s = %s;"%(port.name, "+".join(port.pins)))
-
-    # cache all group defintions
-    grouplines = [] 
-    for grp in cfo.groups: 
-        grouplines.append("group %s = %s;"%(grp.name,"+".join(grp.pins)))
-    
-    
-
-    ## Write the dbdb file 
-    pad = "  "
-    with open(dbd,"w") as writer: 
-        writer.write("dutboard %s {\n"%(dbd_wo_suffix))
-        writer.write("%ssites = %s;\n"%(pad,sites))
-        # Write digital pins 
-        writer.write("\n%s// Digital Pins -------------------------------------------------:\n"%(pad))
-        for pin in digpins: 
-            for i,line in enumerate(pin,start=0):
-                if i == 0 or i == len(pin):  
-                    writer.write("%s%s\n"%(pad,line))
-                else: 
-                    writer.write("%s%s\n"%(pad*2,line))
-
-        writer.write("\n%s// Supply Pins -------------------------------------------------:\n"%(pad))
-        # Write digital pins 
-        for supplyblock in dpspins: 
-            for i,line in enumerate(supplyblock,start=0):
-                if i == 0 or i == len(supplyblock):  
-                    writer.write("%s%s\n"%(pad,line))
-                else: 
-                    writer.write("%s%s\n"%(pad*2,line))
-
-        writer.write("\n%s// Utility Lines: -------------------------------------------------:\n"%(pad))
-        # Write util lines 
-        for utl in utillines: 
-            for i,line in enumerate(utl,start=0):
-                if i == 0 or i == len(utl):  
-                    writer.write("%s%s\n"%(pad,line))
-                else: 
-                    writer.write("%s%s\n"%(pad*2,line))
-        # Close the dbd
-        writer.write("}\n") # Close dbd
-
-
-    # Write DBD with fixture delay details -----------------------------------:
-    if chn_attrs:
-        with open(dbd_wi_fxd,"w") as writer: 
-            writer.write("import configuration.%s;\n"%(wo_fxd))
-            writer.write("dutboard %s {\n"%(wi_fxd))
-            writer.write("%sproperty fixtureDelay {\n"%(pad))
-            
-            for pin, site_chn_dict in pinToSiteChannels.items(): 
-                writer.write("%s%s {\n"%(2*pad,pin))
-                for site,channel in site_chn_dict.items(): 
-                    writer.write("%ssite %d {\n"%(3*pad,site))
-                    writer.write("%sfixtureDelay = %s ns;\n"%(4*pad,chn_attrs[channel]))
-                    writer.write("%s}\n"%(3*pad))
-                writer.write("%s}\n"%(2*pad))
-            writer.write("%s}\n"%(pad))           
-            writer.write("}\n")
-
- 
-
-     
-        
-
-    ## TODO: write ports_and_groups.spec
-    with open(os.path.join(directory,"ports_and_groups.spec"),"w") as writer: 
-        writer.write("spec ports_and_groups {\n")
-        for l in portlines: 
-            writer.write("%s%s\n"%(pad,l))
-        for l in grouplines: 
-            writer.write("%s%s\n"%(pad,l))
-        writer.write("}\n") # Close dbd
-
-    ## TODO: write the utility-purpose specs
+    Returns: 
+      list of the written file paths
+    """
+    func = "st7p.config.write_smt8"
+    if not isinstance(cfo,Config): 
+        raise ValueError("'cfo' must be of type st7p.config.Config")
+    if not directory: directory = "configuration"
+    if not os.path.isdir(directory): os.makedirs(directory)
+    basename = name[:-4] if name.endswith(".dbd") else name 
+    if not basename: basename = "smt8_config"
+    sites = _smt8_sites(cfo,sites)
+
+    # [path] -> line generator 
+    outputs = OrderedDict()
+    if chn_attrs: 
+        wo_fxd = basename + "_without_fxd"
+        wi_fxd = basename + "_with_fxd"
+        outputs[os.path.join(directory,wo_fxd + ".dbd")] = smt8_dbd_lines(cfo,wo_fxd,sites)
+        outputs[os.path.join(directory,wi_fxd + ".dbd")] = smt8_fixture_delay_lines(cfo,chn_attrs,wi_fxd,wo_fxd,sites)
+    else: 
+        outputs[os.path.join(directory,basename + ".dbd")] = smt8_dbd_lines(cfo,basename,sites)
+    outputs[os.path.join(directory,"ports_and_groups.spec")] = smt8_ports_and_groups_lines(cfo)
     if cfo.utility_purposes.__len__() != 0: 
-        os.mkdir(os.path.join(directory,"utility_purposes"))
-    for up in cfo.utility_purposes: 
-        with open(os.path.join(directory,"utility_purposes","%s.spec"%(up.name)),"w") as writer: 
-            writer.write("spec %s {\n"%(up.name))
-            for site,setting in up.channel_settings.items():
-                for channel,value in setting.items(): 
-                    if (value == "X" or value == "x"): continue
-                    writer.write("  setup utility UTI_%s { value = %s; }\n"%(channel,value))
-            writer.write("}\n")
-
-    
-
-
-
-    print("DEBUG: (%s): Size of digital channel-to-signal: %s"%(func,channelToName.__len__()))
-    # Read it out for debug:
-    if False:  
-        with open(dbd,"r") as reader: 
-            for x in reader: 
-                print(x.rstrip())
+        up_dir = os.path.join(directory,"utility_purposes")
+        if not os.path.isdir(up_dir): os.makedirs(up_dir)
+        for up in cfo.utility_purposes: 
+            outputs[os.path.join(up_dir,"%s.spec"%(up.name))] = smt8_utility_purpose_lines(up,sites)
+
+    if workers is None: workers = os.cpu_count() or 1
+    if workers <= 1 or len(outputs) == 1: 
+        written = [_write_lines(path,lines) for path, lines in outputs.items()]
+    else: 
+        with ThreadPoolExecutor(max_workers=min(workers,len(outputs))) as executor: 
+            written = list(executor.map(_write_lines,outputs.keys(),outputs.values()))
+
+    if debug: print("DEBUG: (%s): Size of digital channel-to-signal: %s"%(func,cfo._channels.__len__()))
+    return written 
 
 
 
@@ -0,0 +1,146 @@
+"""
+This module loads the setups of a device directory: the testflow and the
+config, timing, levels and vectors (PMF) files named in its context 
+section. Only the context is read up front; the five files are then 
+parsed concurrently in a process pool, so a full load takes about as 
+long as the slowest file.
+
+Usage:
+    import st7p.device
+    dev = st7p.device.load(tf_sfp)
+    dev.testflow.summary()
+    dev.timing.summary()
+"""
+import os, sys, gc, time, argparse
+from collections import OrderedDict
+from st7p import testflow, parallel
+
+DEVICE_KINDS = ["testflow","config","timing","levels","vectors"]
+POOL_KINDS   = ["timing","levels"] # Readers with a process pool of their own
+
+# ----------------------------------------------------------------------------:
+def _readers():
+    """Returns [kind] -> reader function. Imported lazily."""
+    from st7p import config, levels, timing, vectors
+    return {"testflow" : testflow.read,
+            "config"   : config.read,
+            "timing"   : timing.read,
+            "levels"   : levels.read,
+            "vectors"  : vectors.read}
+
+def _load_file(task): 
+    """Process pool worker of `load`. task = (kind, sfp, cache, workers, debug)"""
+    kind, sfp, cache, workers, debug = task
+    start = time.time()
+    gc_enabled = gc.isenabled()
+    gc.disable() # NOTE: Parsing allocates many long-lived objects; see `parallel.parallel_map`
+    try: 
+        if cache is not None:    obj = cache.read(kind,sfp,debug,workers=workers)
+        elif kind in POOL_KINDS: obj = _readers()[kind](sfp,debug,workers=workers)
+        else:                    obj = _readers()[kind](sfp,debug)
+    finally: 
+        if gc_enabled: gc.enable()
+    return obj, time.time() - start
+
+# ----------------------------------------------------------------------------:
+class Device(object): 
+    """
+    Parsed setups of a device directory, see `load`. 
+
+    Attributes: 
+      testflow, config, timing, levels, vectors : parsed objects, None if 
+        the file is not named in the testflow context.
+      paths : OrderedDict, [kind] -> source file path ("" if not named)
+      times : OrderedDict, [kind] -> parse time in seconds
+    """
+    def __init__(self,paths): 
+        self.paths    = paths 
+        self.times    = OrderedDict()
+        self.testflow = None 
+        self.config   = None 
+        self.timing   = None 
+        self.levels   = None 
+        self.vectors  = None 
+
+    def get_dd_path(self): 
+        if self.testflow is None: return ""
+        return self.testflow.get_dd_path()
+
+    def summary(self,mask=False): 
+        """Calls the `summary` method of each parsed setup."""
+        for kind in DEVICE_KINDS: 
+            obj = getattr(self,kind)
+            if obj is not None: obj.summary(mask=mask)
+
+def load(sfp,workers=None,cache=None,debug=False): 
+    """
+    Loads the testflow `sfp` and the setup files named in its context 
+    section. 
+
+    Parameters: 
+      workers : int, default = None 
+        Process budget, None uses os.cpu_count(). One process is used per
+        file (at most `workers`); the timing and levels readers each get 
+        workers // files processes for the files of a master file, so the
+        pools are not nested at full width. 1 parses within the current 
+        process. 
+
+      cache : st7p.cache.ParseCache, default = None 
+        If given, files are read through the cache. 
+
+    Returns: 
+      Device
+    """
+    func = "st7p.device.load"
+    if not os.path.isfile(sfp): raise RuntimeError("Bad/No file: %s"%(sfp))
+    context = testflow.read_context(sfp,debug=debug)
+    paths = OrderedDict([("testflow", sfp),
+                         ("config",   context.get_config_path()),
+                         ("timing",   context.get_timing_path()),
+                         ("levels",   context.get_levels_path()),
+                         ("vectors",  context.get_vectors_path())])
+    if workers is None: workers = os.cpu_count() or 1
+    count   = len([path for path in paths.values() if path])
+    inner   = max(1,workers // max(1,count))
+    workers = min(count,workers)
+    tasks = [(kind,path,cache,inner,debug) for kind, path in paths.items() if path]
+    if debug: print("DEBUG: (%s): %s files, %s workers, %s per reader"%(func,len(tasks),workers,inner))
+
+    dev = Device(paths)
+    results = parallel.parallel_map(_load_file,tasks,workers)
+    for task, (obj, seconds) in zip(tasks,results): 
+        setattr(dev,task[0],obj)
+        dev.times[task[0]] = seconds
+        if debug: print("DEBUG: (%s): %-8s %.3fs %s"%(func,task[0],seconds,task[1]))
+    return dev 
+
+# ----------------------------------------------------------------------------:
+def __handle_cmdline_args(): 
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-debug", 
+                        help="Increase console logging", 
+                        action="store_true")
+    parser.add_argument("-workers", type=int, default=None,
+                        help="process budget (default: cpu count, 1: in-process)")
+    parser.add_argument("-no_cache",
+                        help="always re-parse, bypassing the st7p parse cache",
+                        action="store_true")
+    parser.add_argument("testflow", help="Testflow file path")
+    args = parser.parse_args()
+    if not os.path.isfile(args.testflow): 
+        raise ValueError("Invalid file")
+    return args
+# ----------------------------------------------------------------------------:
+if __name__ == "__main__": 
+    args = __handle_cmdline_args()
+    cache = None 
+    if not args.no_cache: 
+        from st7p import cache as st7p_cache
+        cache = st7p_cache.ParseCache(debug=args.debug)
+    start = time.time()
+    dev = load(args.testflow,workers=args.workers,cache=cache,debug=args.debug)
+    dev.summary()
+    print("")
+    for kind, seconds in dev.times.items(): 
+        print("%-8s : %.3fs"%(kind,seconds))
+    print("%-8s : %.3fs"%("total",time.time() - start))
@@ -0,0 +1,327 @@
+"""
+This module compiles SmarTest 7 equation expressions (EQNSET equations,
+timing edge/period expressions and levels pin/DPS settings) into Python
+functions. Each distinct expression string is parsed only once; the
+compiled form is cached and evaluated against a dictionary of variable
+bindings.
+
+Supported syntax:
+  - numbers (1, 0.5, .5, 1e-9) and variables
+  - binary + - * /, unary + - !
+  - comparisons < > <= >= == !=, logical && ||
+  - conditionals: cond ? a : b
+  - functions: fract(num,den,scale) = (num/den)*scale, min, max, abs,
+    sqrt, exp, log, log10, pow, ceil, floor
+
+With NumPy installed, `Expression.evaluate_array` evaluates an expression
+column-wise, i.e. against bindings holding one array of values per
+variable (conditionals and logic become element-wise).
+
+Usage:
+    from st7p import expressions
+    expressions.evaluate("2*( -0.25*UPHY_VIDiff + vcc)", total_vars)
+"""
+import re, math
+from functools import reduce
+from st7p import lazy # NOTE: NumPy is only needed by `Expression.evaluate_array`
+
+RE_TOKEN = lazy.compile(r"""
+    \s*(?:
+      (?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+     |(?P<name>[A-Za-z_@][\w@]*)
+     |(?P<op><=|>=|==|!=|&&|\|\||[-+*/(),?:<>!])
+    )""", re.VERBOSE)
+
+def _fract(num,den,scale):
+    return (num/den)*scale
+
+FUNCTIONS = {"fract" : _fract,
+             "min"   : min,
+             "max"   : max,
+             "abs"   : abs,
+             "sqrt"  : math.sqrt,
+             "exp"   : math.exp,
+             "log"   : math.log,
+             "log10" : math.log10,
+             "pow"   : math.pow,
+             "ceil"  : math.ceil,
+             "floor" : math.floor}
+
+_COMPARISONS = ["<",">","<=",">=","==","!="]
+
+# ----------------------------------------------------------------------------:
+def tokenize(text):
+    """Returns a list of (kind, value) tokens; kind is 'num', 'name' or 'op'."""
+    tokens = []
+    pos = 0
+    end = len(text.rstrip())
+    while pos < end:
+        match = RE_TOKEN.match(text,pos)
+        if not match or match.end() == pos:
+            raise RuntimeError("Bad character at %s in expression: %s"%(pos,text))
+        kind = match.lastgroup
+        tokens.append((kind,match.group(kind)))
+        pos = match.end()
+    return tokens
+
+class Parser(object):
+    """
+    Recursive descent parser producing a tuple based AST:
+      ('num', value), ('var', name), ('neg', a), ('not', a),
+      ('bin', op, a, b), ('cmp', op, a, b), ('and', a, b), ('or', a, b),
+      ('cond', c, a, b), ('call', name, [args])
+
+    Precedence, low to high: ?:, ||, &&, comparisons, + -, * /, unary.
+    """
+    def __init__(self,text):
+        self.text   = text
+        self.tokens = tokenize(text)
+        self.pos    = 0
+
+    def _peek(self):
+        if self.pos < len(self.tokens): return self.tokens[self.pos]
+        return (None,"<end>")
+
+    def _next(self):
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def _expect(self,op):
+        kind, value = self._next()
+        if kind != "op" or value != op:
+            raise RuntimeError("Expecting '%s', found '%s' in expression: %s"%(op,value,self.text))
+
+    def _accept(self,*ops):
+        kind, value = self._peek()
+        if kind == "op" and value in ops:
+            self.pos += 1
+            return value
+        return None
+
+    def parse(self):
+        if not self.tokens: raise RuntimeError("Empty expression")
+        node = self.conditional()
+        if self.pos != len(self.tokens):
+            raise RuntimeError("Unexpected token '%s' in expression: %s"%(self._peek()[1],self.text))
+        return node
+
+    def conditional(self):
+        cond = self.logical_or()
+        if self._accept("?"):
+            a = self.conditional()
+            self._expect(":")
+            b = self.conditional()
+            return ("cond",cond,a,b)
+        return cond
+
+    def logical_or(self):
+        node = self.logical_and()
+        while self._accept("||"): node = ("or",node,self.logical_and())
+        return node
+
+    def logical_and(self):
+        node = self.comparison()
+        while self._accept("&&"): node = ("and",node,self.comparison())
+        return node
+
+    def comparison(self):
+        node = self.additive()
+        while True:
+            op = self._accept(*_COMPARISONS)
+            if not op: return node
+            node = ("cmp",op,node,self.additive())
+
+    def additive(self):
+        node = self.term()
+        while True:
+            op = self._accept("+","-")
+            if not op: return node
+            node = ("bin",op,node,self.term())
+
+    def term(self):
+        node = self.unary()
+        while True:
+            op = self._accept("*","/")
+            if not op: return node
+            node = ("bin",op,node,self.unary())
+
+    def unary(self):
+        op = self._accept("-","+","!")
+        if op == "-": return ("neg",self.unary())
+        if op == "+": return self.unary()
+        if op == "!": return ("not",self.unary())
+        return self.primary()
+
+    def primary(self):
+        kind, value = self._next()
+        if kind == "num": return ("num",float(value))
+        if kind == "name":
+            if self._accept("("):
+                if value not in FUNCTIONS:
+                    raise RuntimeError("Unsupported function '%s' in expression: %s"%(value,self.text))
+                args = []
+                if not self._accept(")"):
+                    args.append(self.conditional())
+                    while self._accept(","): args.append(self.conditional())
+                    self._expect(")")
+                return ("call",value,args)
+            return ("var",value)
+        if kind == "op" and value == "(":
+            node = self.conditional()
+            self._expect(")")
+            return node
+        raise RuntimeError("Unexpected token '%s' in expression: %s"%(value,self.text))
+
+# ----------------------------------------------------------------------------:
+def to_python(node,vector=False):
+    """
+    Returns the python source of an AST node. Variables read from `_v`.
+    If vector is True, conditionals, logic and functions are emitted as
+    their element-wise NumPy counterparts.
+    """
+    kind = node[0]
+    if kind == "num":  return repr(node[1])
+    if kind == "var":  return "_v[%r]"%(node[1])
+    args = [to_python(arg,vector) for arg in node[1:] if isinstance(arg,tuple)]
+    if kind == "neg":  return "(-%s)"%(args[0])
+    if kind == "bin" or kind == "cmp":
+        return "(%s %s %s)"%(args[0],node[1],args[1])
+    if kind == "call":
+        return "_f_%s(%s)"%(node[1],", ".join(to_python(arg,vector) for arg in node[2]))
+    if vector:
+        if kind == "not":  return "_np_not(%s)"%(args[0])
+        if kind == "and":  return "_np_and(%s, %s)"%(args[0],args[1])
+        if kind == "or":   return "_np_or(%s, %s)"%(args[0],args[1])
+        if kind == "cond": return "_np_where(%s, %s, %s)"%(args[0],args[1],args[2])
+    else:
+        if kind == "not":  return "(not %s)"%(args[0])
+        if kind == "and":  return "(%s and %s)"%(args[0],args[1])
+        if kind == "or":   return "(%s or %s)"%(args[0],args[1])
+        if kind == "cond": return "(%s if %s else %s)"%(args[1],args[0],args[2])
+    raise RuntimeError("Bad AST node: %s"%(kind,))
+
+def variables(node,found=None):
+    """Returns the variable names referenced by an AST node (in order)."""
+    if found is None: found = []
+    kind = node[0]
+    if kind == "var":
+        if node[1] not in found: found.append(node[1])
+    elif kind == "call":
+        for arg in node[2]: variables(arg,found)
+    elif kind in ["neg","not"]: variables(node[1],found)
+    elif kind in ["bin","cmp"]:
+        variables(node[2],found); variables(node[3],found)
+    elif kind in ["and","or"]:
+        variables(node[1],found); variables(node[2],found)
+    elif kind == "cond":
+        variables(node[1],found); variables(node[2],found); variables(node[3],found)
+    return found
+
+_NAMESPACE = {"__builtins__" : {}}
+for _name, _function in FUNCTIONS.items(): _NAMESPACE["_f_" + _name] = _function
+
+_VNAMESPACE = None
+def _vector_namespace():
+    global _VNAMESPACE
+    if _VNAMESPACE is None:
+        np = lazy.numpy()
+        if np is None: raise RuntimeError("NumPy is required for array evaluation")
+        _VNAMESPACE = {"__builtins__" : {},
+                       "_np_not"      : np.logical_not,
+                       "_np_and"      : np.logical_and,
+                       "_np_or"       : np.logical_or,
+                       "_np_where"    : np.where,
+                       "_f_fract"     : _fract,
+                       "_f_min"       : lambda *args: reduce(np.minimum,args),
+                       "_f_max"       : lambda *args: reduce(np.maximum,args),
+                       "_f_abs"       : np.abs,
+                       "_f_sqrt"      : np.sqrt,
+                       "_f_exp"       : np.exp,
+                       "_f_log"       : np.log,
+                       "_f_log10"     : np.log10,
+                       "_f_pow"       : np.power,
+                       "_f_ceil"      : np.ceil,
+                       "_f_floor"     : np.floor}
+    return _VNAMESPACE
+
+class Expression(object):
+    """
+    A compiled expression. Call `evaluate(bindings)` (or the object itself)
+    with a dictionary of variable values.
+
+    Attributes:
+      text      : the source expression
+      ast       : tuple based AST (see `Parser`)
+      source    : generated python source
+      variables : list of referenced variable names
+    """
+    def __init__(self,text):
+        self.text      = text
+        self.ast       = Parser(text).parse()
+        self.source    = to_python(self.ast)
+        self.variables = variables(self.ast)
+        self._function = eval(compile("lambda _v: %s"%(self.source),"<st7p-expr>","eval"),_NAMESPACE)
+        self._vfunction = None # Built by the first `evaluate_array`
+
+    def evaluate(self,bindings):
+        try:
+            return self._function(bindings)
+        except KeyError as e:
+            raise RuntimeError("Undefined variable %s in expression: %s"%(e,self.text))
+        except ZeroDivisionError:
+            raise RuntimeError("Division by zero in expression: %s"%(self.text))
+
+    __call__ = evaluate
+
+    def evaluate_array(self,bindings,size=None):
+        """
+        Evaluates the expression element-wise against `bindings`, a mapping
+        of variable names to 1-D arrays (scalars broadcast). Division by 
+        zero yields inf/nan instead of raising.
+
+        Parameters:
+          size : int, default = None
+            If given, the result is broadcast to this length (constant
+            expressions otherwise return a scalar).
+
+        Returns:
+          numpy float array
+        """
+        np = lazy.numpy()
+        if self._vfunction is None:
+            source = to_python(self.ast,vector=True)
+            self._vfunction = eval(compile("lambda _v: %s"%(source),"<st7p-vexpr>","eval"),_vector_namespace())
+        try:
+            with np.errstate(divide="ignore",invalid="ignore"):
+                result = np.asarray(self._vfunction(bindings),dtype=float)
+        except KeyError as e:
+            raise RuntimeError("Undefined variable %s in expression: %s"%(e,self.text))
+        if size is not None and result.shape != (size,):
+            result = np.broadcast_to(result,(size,))
+        return result
+
+    # Compiled functions do not pickle; they are rebuilt on load.
+    def __getstate__(self):
+        return {"text" : self.text}
+
+    def __setstate__(self,state):
+        self.__init__(state["text"])
+
+# ----------------------------------------------------------------------------:
+_CACHE = {} # [text] -> Expression
+
+def compile_expr(text):
+    """Returns the cached Expression of `text`, compiling it on first use."""
+    expr = _CACHE.get(text)
+    if expr is None:
+        expr = Expression(text.strip())
+        _CACHE[text] = expr
+    return expr
+
+def evaluate(text,bindings):
+    """Evaluates expression `text` against `bindings` (compiled + cached)."""
+    return compile_expr(text).evaluate(bindings)
+
+def clear_cache():
+    _CACHE.clear()
@@ -0,0 +1,60 @@
+"""
+This module defers work that the parser modules would otherwise do at
+import time. Module level regex patterns are compiled on first use and
+NumPy is only imported by the first function that needs it, so
+importing a single parser (e.g. for one CLI command) stays cheap.
+
+Usage:
+    from st7p import lazy
+    RE_HEADER = lazy.compile("^hp93000,config,0.1$")
+    np = lazy.numpy() # None if NumPy is not installed
+"""
+import re
+
+# Attributes of a compiled pattern bound onto LazyPattern on first use.
+PATTERN_ATTRS = ["search","match","fullmatch","findall","finditer","sub",
+                 "subn","split","scanner","groups","groupindex","flags"]
+
+class LazyPattern(object):
+    """
+    Stand-in for a compiled regex. The pattern is compiled on the first
+    attribute access; the attributes of the compiled pattern are then
+    stored on the instance, so later calls (e.g. `search`) cost the same
+    as on the compiled pattern itself.
+    """
+    def __init__(self,pattern,flags=0):
+        self.pattern = pattern
+        self._flags  = flags
+
+    def compile(self):
+        """Compiles the pattern (once) and returns the re.Pattern."""
+        compiled = re.compile(self.pattern,self._flags)
+        for attr in PATTERN_ATTRS: setattr(self,attr,getattr(compiled,attr))
+        return compiled
+
+    def __getattr__(self,name):
+        if name.startswith("__") or name not in PATTERN_ATTRS: raise AttributeError(name)
+        return getattr(self.compile(),name)
+
+    def __reduce__(self):
+        return (LazyPattern,(self.pattern,self._flags))
+
+    def __repr__(self):
+        return "lazy.compile(%r)"%(self.pattern)
+
+def compile(pattern,flags=0):
+    """Same as re.compile, but compiles on first use."""
+    return LazyPattern(pattern,flags)
+
+# ----------------------------------------------------------------------------:
+_NUMPY = []
+
+def numpy():
+    """Returns the numpy module, imported on the first call, or None if missing."""
+    if not _NUMPY:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        _NUMPY.append(np)
+    return _NUMPY[0]
@@ -1,39 +1,40 @@
 import os, sys, re, argparse
 from collections import OrderedDict
 import st7putils
+from st7p import expressions, memo, blocks, parallel, lazy
 
 
 
 # ----------------------------------------------------------------------------: 
-RE_HP93000_LEVELS    = re.compile("^hp93000,level,\d\.\d$")
-RE_EQSP_EQN      = re.compile("^EQSP LEV,EQN")
-RE_EQSP_SPS      = re.compile("^EQSP LEV,SPS")
-RE_EQNSET            = re.compile("^EQNSET\s+(?P<num>\d+)\s*(?P<name>[\"\w\s]*)")
-RE_SPECS             = re.compile("^SPECS")
-RE_SPEC_ENTRY        = re.compile("(?P<spec>\w+)\s*(?P<unit>\[[\w\s]*\])?")
+RE_HP93000_LEVELS    = lazy.compile("^hp93000,level,\d\.\d$")
+RE_EQSP_EQN      = lazy.compile("^EQSP LEV,EQN")
+RE_EQSP_SPS      = lazy.compile("^EQSP LEV,SPS")
+RE_EQNSET            = lazy.compile("^EQNSET\s+(?P<num>\d+)\s*(?P<name>[\"\w\s]*)")
+RE_SPECS             = lazy.compile("^SPECS")
+RE_SPEC_ENTRY        = lazy.compile("(?P<spec>\w+)\s*(?P<unit>\[[\w\s]*\])?")
 
 
-RE_SPEC_VALUES       = re.compile("(?P<spec>\w+)\s+(?P<act>[\d\.\-\+]+)\s*(?P<min>[\d\.\-\+]*)\s*(?P<max>[\d\.\-\+]*)\s*(?P<unit>[\[\]\w\s]*)\s*#?(?P<comment>.*)")
-RE_DPSPINS           = re.compile("^DPSPINS\s+(?P<pins>[\w\s]+)")
-RE_DPS_SETTING       = re.compile("^(?P<setting>[\w]+)\s*=\s*(?P<value>.*)") # TODO: Bad, this will pick up comments
-RE_LEVELSET          = re.compile("^LEVELSET\s+(?P<num>\d+)\s*(?P<name>[\"\w]*)")
-RE_PINS              = re.compile("^PINS\s+(?P<pins>[\w\s\@]+)")
-RE_PINLEVEL_ENTRY    = re.compile("^(?P<lvl>\w+)\s*=\s*(?P<expr>[\w\s\.\(\)\/\*\+]+)")
-RE_EQUATIONS         = re.compile("^EQUATIONS")
-RE_SPECSET           = re.compile("^SPECSET\s+(?P<num>\d+)\s+(?P<name>[\w\s\"]*)")
+RE_SPEC_VALUES       = lazy.compile("(?P<spec>\w+)\s+(?P<act>[\d\.\-\+]+)\s*(?P<min>[\d\.\-\+]*)\s*(?P<max>[\d\.\-\+]*)\s*(?P<unit>[\[\]\w\s]*)\s*#?(?P<comment>.*)")
+RE_DPSPINS           = lazy.compile("^DPSPINS\s+(?P<pins>[\w\s]+)")
+RE_DPS_SETTING       = lazy.compile("^(?P<setting>[\w]+)\s*=\s*(?P<value>.*)") # TODO: Bad, this will pick up comments
+RE_LEVELSET          = lazy.compile("^LEVELSET\s+(?P<num>\d+)\s*(?P<name>[\"\w]*)")
+RE_PINS              = lazy.compile("^PINS\s+(?P<pins>[\w\s\@]+)")
+RE_PINLEVEL_ENTRY    = lazy.compile("^(?P<lvl>\w+)\s*=\s*(?P<expr>[\w\s\.\(\)\/\*\+]+)")
+RE_EQUATIONS         = lazy.compile("^EQUATIONS")
+RE_SPECSET           = lazy.compile("^SPECSET\s+(?P<num>\d+)\s+(?P<name>[\w\s\"]*)")
 
 
 
 
 
-RE_EQSIGN_ENTRY    = re.compile("^(?P<var>\w+)\s*=\s*(?P<expr>[\=\w\s\.\(\)\/\*\+\-\<\>\?\:]+)")
+RE_EQSIGN_ENTRY    = lazy.compile("^(?P<var>\w+)\s*=\s*(?P<expr>[\=\w\s\.\(\)\/\*\+\-\<\>\?\:]+)")
 # This can be used for both DPSPINS and PINS. When matched we have to have a 
 # function that can sift it. 
-RE_IOPIN_TERM      = re.compile("term\s+(?P<val>\w+)")
+RE_IOPIN_TERM      = lazy.compile("term\s+(?P<val>\w+)")
 
 # ----------------------------------------------------------------------------:
-RE_MODULATION        = re.compile("^MODULATION\s+(?P<num>\d+)\s+(?P<name>[\"\w]*)")
-RE_PIN_ALIAS_SET     = re.compile("^PIN_ALIAS_SET")
+RE_MODULATION        = lazy.compile("^MODULATION\s+(?P<num>\d+)\s+(?P<name>[\"\w]*)")
+RE_PIN_ALIAS_SET     = lazy.compile("^PIN_ALIAS_SET")
 
 
 
@@ -107,10 +108,10 @@ class LevelsMasterFile(object):
 # ============================================================================:
 # ============================================================================:
 # Level MASTER FILE REGEX: 
-RE_LMF_HEADER     = re.compile("^hp93000,level_master_file,0\.1")
-RE_LMF_TESTERFILE = re.compile("^testerfile\s*:\s*(?P<testerfile>[\w\.]+)") 
-RE_LMF_EQNSET     = re.compile("^EQNSET\s+(?P<num>\d+)\s*\:\s*(?P<sfp>[\w\/\.]+)")
-RE_LMF_TESTDATA   = re.compile("^TESTDATA\s+(?P<td>[\w\"\s]+)\s*:\s*(?P<sfp>[\w\/\.]+)")
+RE_LMF_HEADER     = lazy.compile("^hp93000,level_master_file,0\.1")
+RE_LMF_TESTERFILE = lazy.compile("^testerfile\s*:\s*(?P<testerfile>[\w\.]+)") 
+RE_LMF_EQNSET     = lazy.compile("^EQNSET\s+(?P<num>\d+)\s*\:\s*(?P<sfp>[\w\/\.]+)")
+RE_LMF_TESTDATA   = lazy.compile("^TESTDATA\s+(?P<td>[\w\"\s]+)\s*:\s*(?P<sfp>[\w\/\.]+)")
 def read_levels_master_file(sfp,debug=False): 
     """ 
     This functions parses a timing master setup file and return a single 
@@ -156,7 +157,44 @@ def read_levels_master_file(sfp,debug=False):
 # ============================================================================:
 
 
-def read_levels_file(sfp,debug=False): 
+# Lines of these keywords are reported and skipped.
+LEVELS_SKIPPED_KEYWORDS = ["PSLV","PSLR","PSFI","DRLV","RCLV","TERM","CLMP","LSUX","SLDO"]
+
+def _split_key(line): 
+    """
+    Splits a stripped line into its first token and the remainder. The 
+    token ends at the first whitespace or '=' (e.g. 'vih=1.2' -> 'vih').
+    """
+    parts = line.split(None,1)
+    if len(parts) == 2: return parts[0].partition("=")[0], parts[1]
+    return parts[0].partition("=")[0], ""
+
+def _split_num(rest): 
+    """Splits '<num> <desc>' into (num, desc)."""
+    parts = rest.split(None,1)
+    if len(parts) == 2: return parts[0], parts[1].strip()
+    return parts[0], ""
+
+def _strict_match(regex,ln,line): 
+    match = regex.search(line)
+    if not match: 
+        raise RuntimeError("Line does not adhere to strict form: [%d] %s"%(ln,line))
+    return match
+
+def read_levels_file(sfp,debug=False,strict=False): 
+    """
+    Reads a levels (equation and/or specification) file. 
+
+    Each line is dispatched on its first token (see `_split_key`) straight
+    to the handler of the current EQSP section; fields are extracted with
+    plain string operations.
+
+    Parameters: 
+      strict : bool, default = False
+        If True, every dispatched line is additionally validated against 
+        its RE_* regular expression and the fields are taken from the 
+        match. Lines that do not match raise a RuntimeError.
+    """
     func = "st7p.levels.read_levels_file"
     lvo = Levels(sfp=sfp)
     in_eqsp_sps=False;in_eqsp_eqn =False;
@@ -166,70 +204,80 @@ def read_levels_file(sfp,debug=False):
             if not line: continue 
             if line.startswith("#"): continue 
             if debug: print("DEBUG: (%s) [%s] %s"%(func,ln,line))
-            #if ln > 130: print("ENDING EARLY"); break
+            key, rest = _split_key(line)
             # ----------------------------------------------------------------:
             # Blocks not translated yet: -------------------------------------:
-            match = RE_MODULATION.search(line)
-            if match: raise RuntimeError("MODULATION is currently not supported: [%d]: %s"%(ln,line))
-            #match = RE_MODECONTEXT.search(line)
-            #if match: raise RuntimeError("MODECONTEXT is currently not supported: [%d]: %s"%(ln,line))
-            match = RE_PIN_ALIAS_SET.search(line)
-            if match: raise RuntimeError("PIN_ALIAS_SET is currently not supported: [%d]: %s"%(ln,line))
+            if key == "MODULATION": raise RuntimeError("MODULATION is currently not supported: [%d]: %s"%(ln,line))
+            if key.startswith("PIN_ALIAS_SET"): raise RuntimeError("PIN_ALIAS_SET is currently not supported: [%d]: %s"%(ln,line))
+            if key == "NOOP": continue 
             # ----------------------------------------------------------------:
 
             if in_eqsp_eqn: 
-                match = RE_EQNSET.search(line)
-                if match: eqnset,desc=match.groups();lvo.eqnsets.add(EQNSET(eqnset,desc,sfp=sfp));continue 
-                match = RE_LEVELSET.search(line)
-                if match: lvlset,desc=match.groups();lvo.eqnsets[eqnset].levelsets.add(LEVELSET(lvlset,desc));continue 
-                match = RE_DPSPINS.search(line) 
-                if match: 
-                    dpsb = match.group("pins");dpsbID = lvo.eqnsets[eqnset].dpsblocks._get_next_id()
-                    lvo.eqnsets[eqnset].dpsblocks.add(DPSBlock(dpsb,dpsb.split(),dpsbID)); continue 
-                match = RE_PINS.search(line)
-                if match: 
-                    pinsb = match.group("pins"); pinsbID = lvo.eqnsets[eqnset].levelsets[lvlset].pinblocks._get_next_id()
-                    lvo.eqnsets[eqnset].levelsets[lvlset].pinblocks.add(PinBlock(pinsb,pinsb.split(),pinsbID)); continue 
-                match = RE_EQSIGN_ENTRY.search(line)
-                if match: 
-                    var, expr = match.groups() 
-                    if is_dps_setting(var):   
-                        if debug: print("DEBUG: (%s): loading DSPPINS '%s' with '%s = %s'."%(func,dpsb,var,expr))
-                        lvo.eqnsets[eqnset].dpsblocks[dpsb].settings[var] = expr.strip(); continue  
-                    elif is_pin_setting(var):
-                        lvo.eqnsets[eqnset].levelsets[lvlset].pinblocks[pinsb].settings[var] = expr.strip(); continue  
-                    elif lvo.eqnsets[eqnset].dpsblocks.__len__() == 0 and lvo.eqnsets[eqnset].levelsets.__len__() == 0:
-                        lvo.eqnsets[eqnset].equations[var] = expr.strip(); continue 
-                    else: raise RuntimeError("Var %s does not match with DPS or PINS settings and is not in proper location for EQUATIONS: [%d]: %s"%(var,ln,line))
-                if line.startswith("term "): 
+                if key == "EQNSET" and rest: 
+                    if strict: eqnset,desc=_strict_match(RE_EQNSET,ln,line).groups()
+                    else:      eqnset,desc=_split_num(rest)
+                    eqnset_obj=EQNSET(eqnset,desc,sfp=sfp);lvo.eqnsets.add(eqnset_obj);continue 
+                if key == "LEVELSET" and rest: 
+                    if strict: lvlset,desc=_strict_match(RE_LEVELSET,ln,line).groups()
+                    else:      lvlset,desc=_split_num(rest)
+                    lvlset_obj=LEVELSET(lvlset,desc);eqnset_obj.levelsets.add(lvlset_obj);continue 
+                if key == "DPSPINS" and rest: 
+                    if strict: rest = _strict_match(RE_DPSPINS,ln,line).group("pins")
+                    dpsb = rest;dpsbID = eqnset_obj.dpsblocks._get_next_id()
+                    dpsb_obj = DPSBlock(dpsb,dpsb.split(),dpsbID)
+                    eqnset_obj.dpsblocks.add(dpsb_obj); continue 
+                if key == "PINS" and rest: 
+                    if strict: rest = _strict_match(RE_PINS,ln,line).group("pins")
+                    pinsb = rest; pinsbID = lvlset_obj.pinblocks._get_next_id()
+                    pinsb_obj = PinBlock(pinsb,pinsb.split(),pinsbID)
+                    lvlset_obj.pinblocks.add(pinsb_obj); continue 
+                if "=" in line: 
+                    var, _, expr = line.partition("=")
+                    var = var.strip()
+                    if var.isidentifier(): 
+                        if strict: var, expr = _strict_match(RE_EQSIGN_ENTRY,ln,line).groups() 
+                        else:      expr = expr.partition("#")[0]
+                        if is_dps_setting(var):   
+                            if debug: print("DEBUG: (%s): loading DSPPINS '%s' with '%s = %s'."%(func,dpsb,var,expr))
+                            dpsb_obj.settings[var] = expr.strip(); continue  
+                        elif is_pin_setting(var):
+                            pinsb_obj.settings[var] = expr.strip(); continue  
+                        elif eqnset_obj.dpsblocks.__len__() == 0 and eqnset_obj.levelsets.__len__() == 0:
+                            eqnset_obj.equations[var] = expr.strip(); continue 
+                        else: raise RuntimeError("Var %s does not match with DPS or PINS settings and is not in proper location for EQUATIONS: [%d]: %s"%(var,ln,line))
+                if key == "term" and rest: 
                     match = RE_IOPIN_TERM.search(line)
-                    if match: lvo.eqnsets[eqnset].levelsets[lvlset].pinblocks[pinsb].settings["term"] = match.group("val").strip(); continue
+                    if match: pinsb_obj.settings["term"] = match.group("val").strip(); continue
                     raise RuntimeError("Term setting with unsupported setting. [%d] %s"%(ln,line))
-
-                match = RE_SPEC_ENTRY.search(line) 
-                if match: 
-                    spec,unit=match.groups();
-                    if not unit: unit = ""
-                    else: unit = unit.strip() 
-                    if line == "protect": 
-                        if lvo.eqnsets[eqnset].dpsblocks.__len__() == 0: raise RuntimeError("Found 'protect' keyword but no DPS pins configured")
-                        lvo.eqnsets[eqnset].dpsblocks[dpsb].settings["protect"] = True; continue  
-
+                if key == "SPECS": continue 
+                if key == "EQUATIONS": continue 
+                if line == "protect": 
+                    if eqnset_obj.dpsblocks.__len__() == 0: raise RuntimeError("Found 'protect' keyword but no DPS pins configured")
+                    dpsb_obj.settings["protect"] = True; continue  
+
+                # Spec declaration: <spec> [<unit>]
+                if strict: 
+                    match = RE_SPEC_ENTRY.search(line)
+                    spec,unit = match.groups() if match else ("",None)
+                else: 
+                    spec = key.partition("[")[0]
+                    unit = line[len(spec):].lstrip()
+                    if not unit.startswith("["): unit = ""
+                if not unit: unit = ""
+                else: unit = unit.strip() 
+                if st7putils.is_valid_spec_name(spec) and spec != 'EQSP': 
                     if debug: print("DEBUG: (%s): Found SPEC '%s' for EQNSET %s"%(func,spec,eqnset))
-                    if st7putils.is_valid_spec_name(spec) and spec != 'EQSP': 
-                        # print("DEBUG: Adding spec %s. [%d] %s"%(spec,ln,line))
-                        lvo.eqnsets[eqnset].add_spec(spec,unit.strip("[] \t")); continue 
-                    else: pass 
-                match = RE_SPECS.search(line)
-                if match: continue 
-                match = RE_EQUATIONS.search(line)
-                if match: continue 
+                    eqnset_obj.add_spec(spec,unit.strip("[] \t")); continue 
                 #print("WARNING: (%s): No placement for line: [%d] : %s"%(func,ln,line))
             if in_eqsp_sps: 
-                match = RE_EQNSET.search(line)
-                if match: eqnset, _ = match.groups(); continue 
-                match = RE_SPECSET.search(line)
-                if match: specset,desc = match.groups(); lvo.specsets.add(SPECSET(eqnset=int(eqnset),num=specset,desc=desc,sfp=sfp)); continue 
+                if key == "EQNSET" and rest: 
+                    if strict: eqnset, _ = _strict_match(RE_EQNSET,ln,line).groups()
+                    else:      eqnset, _ = _split_num(rest)
+                    continue 
+                if key == "SPECSET" and rest: 
+                    if strict: specset,desc = _strict_match(RE_SPECSET,ln,line).groups()
+                    else:      specset,desc = _split_num(rest)
+                    lvo.specsets.add(SPECSET(eqnset=int(eqnset),num=specset,desc=desc,sfp=sfp)); continue 
                 match = RE_SPEC_VALUES.search(line)    
                 if match: 
                     sn,sa,smn,smx,su,sc = match.groups();
@@ -237,30 +285,70 @@ def read_levels_file(sfp,debug=False):
                         lvo.specsets.__last__().specs.add(SPEC(name=sn,actual=sa.strip(),minimum=smn.strip(),maximum=smx.strip(),unit=su.strip("[] "),comment=sc.strip()));continue
                 else: pass 
             ## FREELANCE 
-            match = RE_EQSP_EQN.search(line)
-            if match: clear_eqsp(ln,line);in_eqsp_eqn=True; in_eqsp_sps=False;continue 
-            match = RE_EQSP_SPS.search(line)
-            if match: clear_eqsp(ln,line);in_eqsp_eqn=False; in_eqsp_sps=True;continue 
+            if key == "EQSP": 
+                clear_eqsp(ln,line)
+                in_eqsp_eqn = line.startswith("EQSP LEV,EQN")
+                in_eqsp_sps = line.startswith("EQSP LEV,SPS")
+                if in_eqsp_eqn or in_eqsp_sps: continue 
 
-
-            if RE_HP93000_LEVELS.search(line): continue 
             if line == "@": continue 
-            if line.startswith("NOOP "): continue 
-            if line.startswith("PSLV"): print("WARNING: (levels): not processing PSLV commands."); continue 
-            if line.startswith("PSLR"): print("WARNING: (levels): not processing PSLR commands."); continue 
-            if line.startswith("PSFI"): print("WARNING: (levels): not processing PSLI commands."); continue 
-            if line.startswith("DRLV"): print("WARNING: (levels): not processing DRLV commands."); continue 
-            if line.startswith("RCLV"): print("WARNING: (levels): not processing RCLV commands."); continue 
-            if line.startswith("TERM"): print("WARNING: (levels): not processing TERM commands."); continue 
-            if line.startswith("CLMP"): print("WARNING: (levels): not processing CLMP commands."); continue 
-            if line.startswith("LSUX"): print("WARNING: (levels): not processing LSUX commands."); continue 
-            if line.startswith("SLDO"): print("WARNING: (levels): not processing SLDO commands."); continue 
+            if key[:4] in LEVELS_SKIPPED_KEYWORDS: print("WARNING: (levels): not processing %s commands."%(key[:4])); continue 
+            if RE_HP93000_LEVELS.search(line): continue 
             raise RuntimeError("No placement for line: [%d] %s"%(ln,line))
     return lvo
   
 
 
-def read(sfp,debug=False):  
+def _resolve_master_path(dir_path,eqnset,path): 
+    """
+    Resolves the `path` of a levels master file EQNSET: leading '../' are
+    relative to the master file directory `dir_path`, other paths are 
+    joined to it. Raises if the file does not exist.
+    """
+    relative_count = path.count("../")
+    if relative_count >= 1: 
+        if not path.startswith("../"*relative_count): 
+            raise RuntimeError("Expecting %d '../' at the start: %s"%(relative_count,path))
+        act_sfp = os.path.join("/".join(dir_path.split("/")[:-relative_count]),path[3*relative_count:])
+        if not os.path.isfile(act_sfp): 
+            raise RuntimeError("Bad/No file: %s"%(act_sfp)) 
+        return act_sfp
+    act_sfp = os.path.join(dir_path,path)
+    if not os.path.isfile(act_sfp): 
+        raise RuntimeError("Bad/No file: EQNSET %s : %s"%(eqnset,path))
+    return act_sfp
+
+def _read_levels_file_task(task): 
+    """Process pool worker of `read_levels_files`. task = (sfp, debug, strict)"""
+    sfp, debug, strict = task
+    return read_levels_file(sfp,debug=debug,strict=strict)
+
+def read_levels_files(sfps,debug=False,strict=False,workers=None): 
+    """
+    Parses the levels files `sfps` with `read_levels_file`, concurrently 
+    in a process pool. 
+
+    Parameters: 
+      workers : int, default = None 
+        Number of processes. None uses os.cpu_count(); 1 parses within 
+        the current process. 
+
+    Returns: 
+      OrderedDict : [sfp] -> Levels 
+    """
+    tasks = [(sfp,debug,strict) for sfp in sfps]
+    return OrderedDict(zip(sfps,parallel.parallel_map(_read_levels_file_task,tasks,workers)))
+
+def read(sfp,debug=False,strict=False,workers=None):  
+    """
+    Reads a levels file or a levels master file. The files referenced by
+    a master file are parsed concurrently, see `read_levels_files`.
+
+    Parameters: 
+      workers : int, default = None 
+        Number of processes used for the files of a master file. None 
+        uses os.cpu_count(); 1 parses within the current process. 
+    """
     func = "st7p.levels.read"
     print("DEBUG: (%s): Recieved: %s"%(func,sfp))
     if not os.path.isfile(sfp): 
@@ -283,33 +371,24 @@ def read(sfp,debug=False):
                       "header line. line = %s, file = %s"%(line,sfp))
             break
     # -----------------------------------------------------------------------: 
-    if not levels_master_file: return read_levels_file(sfp=sfp,debug=debug)
+    if not levels_master_file: return read_levels_file(sfp=sfp,debug=debug,strict=strict)
     if levels_master_file: 
         lmf = read_levels_master_file(sfp = sfp,debug=debug)
         lvo = Levels()
         # --------------------------------------------------------------------:
-        # EQNSET: Parse each file within the lmf
-        _cnt = 0
+        # Resolve the file of every EQNSET. Each file is parsed once, even 
+        # if referenced by several EQNSETs. 
+        eqnset_sfps = OrderedDict() # [eqnset] -> file 
         for eqnset, eqnset_dict in lmf.eqnsets.items(): 
-            _cnt += 1
-            eqnset_sfp = eqnset_dict["path"]
-            act_eqnset_sfp = "" 
-            # Resolve the eqnset path: 
-            relative_count = eqnset_sfp.count("../")
-            if relative_count >= 1: 
-                if not eqnset_sfp.startswith("../"*relative_count): 
-                    raise RuntimeError("Expecting %d '../' at the start: %s"%(relative_count,eqnset_sfp))
-                act_eqnset_sfp = os.path.join("/".join(dir_path.split("/")[:-relative_count]),eqnset_sfp[3*relative_count:])
-                if not os.path.isfile(act_eqnset_sfp): 
-                    raise RuntimeError("Bad/No file: %s"%(act_eqnset_sfp)) 
-            else: 
-                tmppath =  os.path.join(dir_path,eqnset_dict['path'])
-                if not os.path.isfile(tmppath): 
-                    raise RuntimeError("Bad/No file: EQNSET %s : %s"%(eqnset,eqnset_sfp))
-                act_eqnset_sfp = tmppath
-            print("DEBUG: (%s): Searching: EQNSET %s : %s"%(func,eqnset,act_eqnset_sfp))
-            # Parsing timng file: 
-            _lvo = read_levels_file(act_eqnset_sfp,debug=debug) 
+            eqnset_sfps[eqnset] = _resolve_master_path(dir_path,eqnset,eqnset_dict["path"])
+            print("DEBUG: (%s): Searching: EQNSET %s : %s"%(func,eqnset,eqnset_sfps[eqnset]))
+        sfps = list(OrderedDict.fromkeys(eqnset_sfps.values()))
+        if debug: print("DEBUG: (%s): Parsing %s files (%s references)"%(func,len(sfps),len(eqnset_sfps)))
+        parsed = read_levels_files(sfps,debug=debug,strict=strict,workers=workers)
+        # --------------------------------------------------------------------:
+        # EQNSET: 
+        for eqnset, act_eqnset_sfp in eqnset_sfps.items(): 
+            _lvo = parsed[act_eqnset_sfp]
             lvo.eqnsets.add(_lvo.eqnsets[eqnset])
             # NOTE: I suppose we add every SPECSET that is pointing to the EQNSET 
 
@@ -320,7 +399,6 @@ def read(sfp,debug=False):
                 print("WARNING:   - Extra SPECSET: %s"%(specset.name))
  
             #print("TODO: Not sure how to handle SPECSET here. Revisit when necessary (if referenced from TestSuite)")
-            #if _cnt == 1: sys.exit(1) 
         # --------------------------------------------------------------------:
     return lvo
     
@@ -338,6 +416,12 @@ def complete_specset(specset):
     if "specs"   not in specset: return False
     return True
 
+# ----------------------------------------------------------------------------:
+# Results of eval_specset are memoized per Levels object and version; any 
+# change to the Levels object invalidates its results (see memo.py). Results
+# are read-only, memo.copy_result returns a mutable copy. 
+EVAL_MEMO = memo.LRUMemo(maxsize=1024)
+
 def eval_specset(lvo,specset,lvlset,debug=False): 
     """ 
     Evaluate SPECSET. 
@@ -355,8 +439,14 @@ def eval_specset(lvo,specset,lvlset,debug=False):
 
       pinsettings: OrderDict of period and pin-edge-delays settings
 
+    Results are memoized in EVAL_MEMO, see memo.py.
     """
     func = "st7p.levels.eval_specset"
+    memo_key = ("specset",str(specset),str(lvlset))
+    result = EVAL_MEMO.get(lvo,memo_key)
+    if result is not None: 
+        if debug: print("DEBUG: (%s): Memoized: specset %s, levelset %s"%(func,specset,lvlset))
+        return result
 
     if str(specset) not in lvo.specsets.names(): 
         print(lvo.specsets.names())
@@ -378,17 +468,10 @@ def eval_specset(lvo,specset,lvlset,debug=False):
     # ------------------------------------------------------------------------:
     # ------------------------------------------------------------------------:
     # Loop through the EQUATIONS if present
+    # NOTE: Unary signs, fract(...) and ?: conditionals are handled by the 
+    # expression engine (see expressions.py). 
     for var,expr in lvo.eqnsets[eqnset].equations.items():
-        if expr.startswith("2*( +0.25*UPHY_VIDiff +"): 
-            expr = expr.replace("2*( +0.25*UPHY_VIDiff +","2*( 0.25*UPHY_VIDiff +") 
-            print("WARNING: (%s): Altered expr: %s"%(func,expr))
-        if expr.startswith("2*( -0.25*UPHY_VIDiff"): 
-            expr = expr.replace("2*( -0.25*UPHY_VIDiff","2*( (0 - 0.25)*UPHY_VIDiff") 
-            print("WARNING: (%s): Altered expr: %s"%(func,expr))
-        total_vars[var] = st7putils.compute(expr,total_vars,debug=debug)
-    # TODO: Note these hacks. Handling the sign before value is a current 
-    #       issue. However, if not properly handled, it will (most likely)
-    #       throw and error. 
+        total_vars[var] = expressions.evaluate(expr,total_vars)
     # ------------------------------------------------------------------------:
     # ------------------------------------------------------------------------:
     if debug: 
@@ -425,21 +508,9 @@ def eval_specset(lvo,specset,lvlset,debug=False):
                 #    print(s,v)
 
                 if debug: print("DEBUG: (%s): DPSPINS '%s' %s = %s"%(func,dps,setting,expr))     
-                if re.search("[\?]",expr): 
-                    if debug: print("DEBUG: (%s): DPS settings contains conditional operation in expresssion"%(func))
-                    pinsettings['dps'][dps][setting] = 0.0; # TODO: Fix!
-                    print("WARNING: (%s): Skipping conditional exprs: '%s' %s = %s"%(func,dps,setting,expr))
-                    continue 
-
-                #if expr.startswith("-0.2"): 
-                #    expr.replace("-0.2","(-0.2)") 
-                #    print("DEBUG: (%s): Altered expr: %s"%(expr))
-
-
                 if expr in total_vars: pinsettings['dps'][dps][setting] = float(total_vars[expr])
                 else: 
-                    if debug: print("DEBUG: DPS setting %s = %s"%(setting,expr))
-                    pinsettings['dps'][dps][setting] = st7putils.compute(expr,total_vars,debug=debug)
+                    pinsettings['dps'][dps][setting] = float(expressions.evaluate(expr,total_vars))
 
     if debug: 
         for dps in pinsettings['dps']: 
@@ -457,31 +528,134 @@ def eval_specset(lvo,specset,lvlset,debug=False):
 
                 if setting == "term": pinsettings['pins'][pin][setting] = expr; continue # THIS IS NOT A COMPUTATION
 
-                if expr.startswith("-0.2"): 
-                    expr = expr.replace("-0.2","(0 - 0.2)") 
-                    print("WARNING: (%s): Altered expr: %s"%(func,expr))
-                if expr.startswith("-0.4"): 
-                    expr = expr.replace("-0.4","(0 - 0.4)") 
-                    print("WARNING: (%s): Altered expr: %s"%(func,expr))
-
-
                 if expr in total_vars: pinsettings['pins'][pin][setting] = float(total_vars[expr])
                 else: 
                     if debug: print("DEBUG: PIN %s setting %s = %s; %s"%(pin,setting,expr,eqnset_sfp))
-                    pinsettings['pins'][pin][setting] = st7putils.compute(expr,total_vars,debug=debug)
+                    pinsettings['pins'][pin][setting] = float(expressions.evaluate(expr,total_vars))
 
     if debug: 
         for pin in pinsettings['pins']: 
             for var,val in pinsettings['pins'][pin].items(): 
                 print("%s : %s = %s"%(pin,var,val))
                 
-    return total_vars, pinsettings
+    return EVAL_MEMO.put(lvo,memo_key,(total_vars,pinsettings))
+
+# ----------------------------------------------------------------------------:
+LEVEL_SETTINGS = ["vih","vil","voh","vol","vout","ilimit"]
+
+class LevelsMatrix(object): 
+    """ 
+    Dense results of `eval_levels_matrix`. Axis labels are held in the 
+    lists `combinations` ((specset, levelset) string pairs), `pins` (DPS
+    and digital pins) and `settings`. 
 
+    Attributes: 
+      values : array (combination, pin, setting); NaN where a pin does 
+               not define the setting. 
+    """
+    def __init__(self,combinations,pins,settings): 
+        self.combinations = combinations 
+        self.pins     = pins 
+        self.settings = settings 
+        np = lazy.numpy()
+        self.values   = np.full((len(combinations),len(pins),len(settings)),np.nan)
+
+    def combination(self,specset,lvlset): 
+        """Returns the (pin, setting) array of a combination."""
+        return self.values[self.combinations.index((str(specset),str(lvlset)))]
+
+    def get(self,specset,lvlset,pin,setting): 
+        """Returns a single setting value."""
+        return self.values[self.combinations.index((str(specset),str(lvlset))),
+                           self.pins.index(pin),self.settings.index(setting)]
+
+def eval_levels_matrix(lvo,combinations,settings=None,debug=False): 
+    """ 
+    Batch counterpart of `eval_specset` for many (SPECSET, LEVELSET) 
+    combinations, e.g. all combinations referenced by a testflow. 
+
+    Combinations are grouped per EQNSET. Within an EQNSET the spec and 
+    equation values are evaluated once, column-wise over its SPECSETs, 
+    and shared across LEVELSETs. DPS settings are evaluated once per 
+    EQNSET and pin settings once per LEVELSET; each distinct expression 
+    is evaluated as one vectorized operation. 
+
+    Parameters: 
+      lvo : Levels object 
+
+      combinations : list of (specset, lvlset) 
+        SPECSET identifiers are eqnset*100 + specset (as `eval_specset`).
+
+      settings : list, default = LEVEL_SETTINGS
+        Setting names to evaluate. Non-numeric settings (term, offcurr,
+        protect) are not supported. 
+
+    Returns: 
+      LevelsMatrix
+    """
+    func = "st7p.levels.eval_levels_matrix"
+    np = lazy.numpy()
+    if np is None: raise RuntimeError("(%s): NumPy is required"%(func))
+    if settings is None: settings = LEVEL_SETTINGS
+    combos = list(OrderedDict.fromkeys((str(ss),str(ls)) for ss,ls in combinations))
+    # Group rows by EQNSET and LEVELSET: ---------------------------------------:
+    groups = OrderedDict() # [eqnset][lvlset] -> [row, ...]
+    for row, (specset, lvlset) in enumerate(combos): 
+        if specset not in lvo.specsets.names(): 
+            raise RuntimeError("SPECSET '%s' is not contained within Levels object."%(specset))
+        eqnset = str(int(lvo.specsets[specset].eqnset))
+        if lvlset not in lvo.eqnsets[eqnset].levelsets.names(): 
+            raise RuntimeError("LEVELSET '%s' is not contained within EQNSET %s"%(lvlset,eqnset))
+        groups.setdefault(eqnset,OrderedDict()).setdefault(lvlset,[]).append(row)
+    # Pin axis: ----------------------------------------------------------------:
+    pins = OrderedDict()
+    for eqnset, lvlsets in groups.items(): 
+        for dpsb in lvo.eqnsets[eqnset].dpsblocks: 
+            for dps in dpsb.pins: pins[dps] = None
+        for lvlset in lvlsets: 
+            for pin in lvo.eqnsets[eqnset].levelsets[lvlset].pins(): pins[pin] = None
+    matrix = LevelsMatrix(combos,list(pins.keys()),list(settings))
+    pin_index     = dict((pin,i) for i,pin in enumerate(matrix.pins))
+    setting_index = dict((setting,i) for i,setting in enumerate(matrix.settings))
+    if debug: print("DEBUG: (%s): %s combinations, %s EQNSETs, %s pins"%(func,len(combos),len(groups),len(pins)))
+
+    for eqnset, lvlsets in groups.items(): 
+        eqn = lvo.eqnsets[eqnset]
+        # SPECS and EQUATIONS, column-wise over the EQNSET's specsets: 
+        specsets = list(OrderedDict.fromkeys(combos[row][0] for rows in lvlsets.values() for row in rows))
+        column = dict((specset,i) for i,specset in enumerate(specsets))
+        size = len(specsets)
+        columns = OrderedDict()
+        for spec in eqn.specs: 
+            columns[spec] = np.array([float(lvo.specsets[ss].specs[spec].act) for ss in specsets])
+        for var, expr in eqn.equations.items(): 
+            columns[var] = expressions.compile_expr(expr).evaluate_array(columns,size=size)
+        results = {} # [expr] -> column 
+        def _evaluate(expr): 
+            if expr not in results: 
+                results[expr] = expressions.compile_expr(expr).evaluate_array(columns,size=size)
+            return results[expr]
+        # DPS settings are shared by all LEVELSETs of the EQNSET: 
+        dps_values = OrderedDict() # [(pin, setting)] -> column
+        for dpsb in eqn.dpsblocks: 
+            for setting, expr in dpsb.settings.items(): 
+                if setting not in setting_index: continue 
+                for dps in dpsb.pins: dps_values[(dps,setting)] = _evaluate(expr)
+        for lvlset, rows in lvlsets.items(): 
+            pin_values = OrderedDict(dps_values)
+            for pinb in eqn.levelsets[lvlset].pinblocks: 
+                for setting, expr in pinb.settings.items(): 
+                    if setting not in setting_index: continue 
+                    for pin in pinb.pins: pin_values[(pin,setting)] = _evaluate(expr)
+            cols = [column[combos[row][0]] for row in rows]
+            for (pin, setting), values in pin_values.items(): 
+                matrix.values[rows,pin_index[pin],setting_index[setting]] = values[cols]
+    return matrix 
 
 
 
 # ----------------------------------------------------------------------------:
-class SPEC(object):
+class SPEC(memo.Tracked):
     def __init__(self,name,actual,minimum,maximum,unit,comment): 
         self.name    = name 
         self.act     = actual  # float(actual)
@@ -490,14 +664,15 @@ class SPEC(object):
         self.unit    = unit
         self.comment = comment.strip() 
         
-class SPECS(st7putils.Container): 
+class SPECS(memo.TrackedContainer,st7putils.Container): 
     def __init__(self): 
         super(SPECS,self).__init__()
     def add(self, spec): 
         super(SPECS,self).add(spec,SPEC)
+        memo.added(self,spec)
 # ----------------------------------------------------------------------------:
 # ----------------------------------------------------------------------------:
-class SPECSET(object): 
+class SPECSET(memo.Tracked): 
     def __init__(self,num,desc,eqnset,specs="",sfp=""):
         self.name   = "%s"%(int(eqnset)*100 + int(num))
         self.num    = num  # mandatory 
@@ -524,61 +699,37 @@ class SPECSET(object):
         return SPECSET(num=ssd['specset'],desc=ssd['specset-desc'],eqnset=int(ssd['eqnset']),specs=specs) 
       
 
-class SPECSETS(st7putils.Container): 
+class SPECSETS(memo.TrackedContainer,st7putils.Container): 
     def __init__(self): 
         super(SPECSETS,self).__init__()
     def add(self, specset): 
         super(SPECSETS,self).add(specset,SPECSET)
+        memo.added(self,specset)
     def __getitem__(self,name): 
         return self.objects[str(name)]
 # ----------------------------------------------------------------------------:
-class PinBlock(object): 
+class PinBlock(memo.Tracked): 
     def __init__(self,name,pins,ID=0): 
         self.name = name
         self.pins = pins # NOTE: pins shoud be the list of the name...
         self._id  = ID
-        self.settings = OrderedDict()
+        self.settings = memo.TrackedDict()
 
     def update(self,setting,value): 
         if setting in self.settings: 
             raise RuntimeError("Double def for setting: %s"%(setting))
         self.settings[setting] = value 
         return 
-class PinBlocks(st7putils.Container): 
-    def __init__(self): 
-        super(PinBlocks,self).__init__()
-        self._ids = [] 
-        self._ids_2_names = {}
-
+class PinBlocks(blocks.PinBlockIndex,memo.TrackedContainer,st7putils.Container): 
     def add(self,pinsb): 
+        self._index_pins(pinsb)
         super(PinBlocks,self).add(pinsb,PinBlock) 
-        self._ids.append(pinsb._id)
-        self._ids_2_names[pinsb._id] = pinsb.name
-
-    def _get_next_id(self): 
-        if len(self._ids) == 0 : return 1
-        else: return int(self._ids[-1] + 1)
-
-    def __getitem__(self,entry): 
-        return self.get(entry)
-
-    def get(self,entry):
-        if entry in self.objects: return self.objects[entry]
-        for pinsblock in self.objects:
-            pins = pinsblock.split() 
-            if entry in pins: return self.objects[pinsblock]
-            else: continue 
-        raise RuntimeError("No entry for '%s'"%(entry))
-    def pins(self): # TODO: Add functionality to PWFBlock 
-        """Return a list of all pins referenced within all edgeblocks"""
-        retlist = []
-        for pb in self.objects: 
-            retlist.extend(self.objects[pb].pins)
-        return retlist
+        memo.added(self,pinsb)
+        self._index_id(pinsb)
 # ----------------------------------------------------------------------------:
 
 # ----------------------------------------------------------------------------:
-class LEVELSET(object): 
+class LEVELSET(memo.Tracked): 
     def __init__(self,num,desc=""): 
         self.name = num
         self.num  = num
@@ -588,22 +739,23 @@ class LEVELSET(object):
     def pins(self): 
         return self.pinblocks.pins()
 
-class LEVELSETS(st7putils.Container): 
+class LEVELSETS(memo.TrackedContainer,st7putils.Container): 
     def __init__(self): 
         super(LEVELSETS,self).__init__()
     def add(self, levelset): 
         super(LEVELSETS,self).add(levelset,LEVELSET)
+        memo.added(self,levelset)
     def __getitem__(self,name): 
         return self.objects[str(name)]
 # ----------------------------------------------------------------------------:
 
 # ----------------------------------------------------------------------------:
-class DPSBlock(object): 
+class DPSBlock(memo.Tracked): 
     def __init__(self,name,pins,ID=0): 
         self.name = name
         self.pins = pins # NOTE: pins shoud be the list of the name...
         self._id  = ID
-        self.settings = OrderedDict()
+        self.settings = memo.TrackedDict()
 
     def update(self,setting,value): 
         if setting in self.settings: 
@@ -611,42 +763,23 @@ class DPSBlock(object):
         self.settings[setting] = value 
         return 
 
-class DPSBlocks(st7putils.Container): 
-    def __init__(self): 
-        super(DPSBlocks,self).__init__()
-        self._ids = [] 
-        self._ids_2_names = {}
-
+class DPSBlocks(blocks.PinBlockIndex,memo.TrackedContainer,st7putils.Container): 
     def add(self,dpsb): 
+        self._index_pins(dpsb)
         super(DPSBlocks,self).add(dpsb,DPSBlock) 
-        self._ids.append(dpsb._id)
-        self._ids_2_names[dpsb._id] = dpsb.name
-
-    def _get_next_id(self): 
-        if len(self._ids) == 0 : return 1
-        else: return int(self._ids[-1] + 1)
-
-    def __getitem__(self,entry): 
-        return self.get(entry)
-
-    def get(self,entry):
-        if entry in self.objects: return self.objects[entry]
-        for dpsblock in self.objects:
-            pins = dpsblock.split() 
-            if entry in pins: return self.objects[dpsblock]
-            else: continue 
-        raise RuntimeError("No entry for '%s'"%(entry))
+        memo.added(self,dpsb)
+        self._index_id(dpsb)
 # ----------------------------------------------------------------------------:
 
 # ----------------------------------------------------------------------------:
-class EQNSET(object): 
+class EQNSET(memo.Tracked): 
     def __init__(self,num,desc="",sfp=""):  
         self.name = num
         self.num  = num
         self.desc = desc
         self.dpsblocks = DPSBlocks()
-        self.specs     = OrderedDict()
-        self.equations = OrderedDict() 
+        self.specs     = memo.TrackedDict()
+        self.equations = memo.TrackedDict() 
         self.levelsets = LEVELSETS()
         self.sfp = sfp
 
@@ -660,16 +793,17 @@ class EQNSET(object):
         else: retstr = "EQNSET %s"%(self.num)
         return retstr
 
-class EQNSETS(st7putils.Container): 
+class EQNSETS(memo.TrackedContainer,st7putils.Container): 
     def __init__(self): 
         super(EQNSETS,self).__init__()
     def add(self, eqnset): 
         super(EQNSETS,self).add(eqnset,EQNSET)
+        memo.added(self,eqnset)
     def __getitem__(self,name): 
         return self.objects[str(name)]
 # ----------------------------------------------------------------------------:
 # ----------------------------------------------------------------------------:
-class Levels(object): 
+class Levels(memo.Root): 
     def __init__(self,sfp="",debug=False): 
         if sfp:  
           _ = st7putils._93k_file_handler(sfp, "levels")
@@ -711,6 +845,11 @@ def __handle_cmdline_args():
     parser.add_argument("-debug", 
                         help="Increase console logging", 
                         action="store_true")
+    parser.add_argument("-strict", 
+                        help="Validate every line against its full regex", 
+                        action="store_true")
+    parser.add_argument("-workers", type=int, default=None,
+                        help="number of processes for master file entries (default: cpu count)")
     parser.add_argument("levels", help="levels file path")
     args = parser.parse_args()
     if not os.path.isfile(args.levels): 
@@ -719,7 +858,7 @@ def __handle_cmdline_args():
 # ----------------------------------------------------------------------------:
 if __name__ == "__main__": 
     args = __handle_cmdline_args()
-    obj = read(sfp=args.levels, debug=args.debug) 
+    obj = read(sfp=args.levels, debug=args.debug, strict=args.strict, workers=args.workers) 
     print("\nNOTE: If in interactive mode, use variable name 'obj' to"\
           " the parsed object.")
 
@@ -0,0 +1,255 @@
+"""
+This module provides the memoization used by the timing and levels
+evaluation functions (`eval_specset`, `eval_specification`).
+
+Results are kept in a bounded LRU and keyed on the identity of the setup
+object (Timing/Levels) plus its version. Each setup object is a `Root`
+and owns a version. Once tracked (on its first memo lookup), the objects
+it holds (EQNSETs, SPECSETs, blocks, their containers, dicts and lists)
+are adopted and bump the version of their owner on every change; objects
+assigned or added later are adopted as well. A change therefore only
+invalidates the memoized results of its own setup object.
+
+Usage:
+    class Timing(memo.Root): ...
+    class EdgeBlock(memo.Tracked): ...
+    class EdgeBlocks(memo.TrackedContainer,st7putils.Container):
+        def add(self,edgeblock):
+            super(EdgeBlocks,self).add(edgeblock,EdgeBlock)
+            memo.added(self,edgeblock)
+"""
+import weakref
+from collections import OrderedDict
+
+def touch(obj):
+    """Marks `obj` as changed: bumps the version of its owner, if any."""
+    owner = obj._memo_owner
+    if owner is not None: object.__setattr__(owner,"_memo_version",owner._memo_version + 1)
+
+_ATOMS = set([str,int,float,bool,type(None)])
+
+def adopt(owner,obj):
+    """Sets `owner` as the owner of `obj` and of the tracked objects it holds."""
+    if obj.__class__ in _ATOMS or isinstance(obj,Root): return
+    if isinstance(obj,Tracked):
+        if obj._memo_owner is owner: return
+        object.__setattr__(obj,"_memo_owner",owner)
+        for value in list(vars(obj).values()):
+            if value.__class__ not in _ATOMS: adopt(owner,value)
+    elif isinstance(obj,(TrackedDict,TrackedList,TrackedContainer)):
+        if obj._memo_owner is owner: return
+        object.__setattr__(obj,"_memo_owner",owner)
+        if   isinstance(obj,TrackedDict):      items = obj.values()
+        elif isinstance(obj,TrackedContainer): items = obj.objects.values()
+        else:                                  items = obj
+        for value in list(items):
+            if value.__class__ not in _ATOMS: adopt(owner,value)
+
+def added(container,obj):
+    """Called by TrackedContainer.add overrides once `obj` is added."""
+    owner = container._memo_owner
+    if owner is not None:
+        adopt(owner,obj)
+        touch(container)
+
+# ----------------------------------------------------------------------------:
+class Tracked(object):
+    """
+    Base class whose attribute assignments count as changes of the owner.
+    Assigned lists are stored as TrackedLists.
+    """
+    _memo_owner = None
+    def __setattr__(self,name,value):
+        if type(value) is list: value = TrackedList(value)
+        object.__setattr__(self,name,value)
+        owner = self._memo_owner
+        if owner is not None:
+            if value.__class__ not in _ATOMS: adopt(owner,value)
+            object.__setattr__(owner,"_memo_version",owner._memo_version + 1)
+
+class Root(Tracked):
+    """
+    Tracked object owning a version: the Timing and Levels setups. Tracking
+    starts with the first memo lookup (see `track`), so parsing does not
+    pay for it.
+    """
+    _memo_version = 0
+    _memo_tracked = False
+    @property
+    def _memo_owner(self):
+        return self if self._memo_tracked else None
+
+def track(root):
+    """Starts tracking the changes of `root` and of the objects it holds."""
+    if root._memo_tracked: return
+    object.__setattr__(root,"_memo_tracked",True)
+    for value in list(vars(root).values()):
+        if value.__class__ not in _ATOMS: adopt(root,value)
+
+class TrackedContainer(object):
+    """
+    Mixin for st7putils.Container subclasses holding tracked objects; their
+    `add` must call `added`. Removing items (e.g. from `objects`) directly
+    must be followed by `touch(container)`.
+    """
+    _memo_owner = None
+
+class TrackedDict(OrderedDict):
+    """OrderedDict whose modifications count as changes of the owner."""
+    _memo_owner = None
+    def __setitem__(self,key,value):
+        OrderedDict.__setitem__(self,key,value)
+        owner = self._memo_owner
+        if owner is not None:
+            if value.__class__ not in _ATOMS: adopt(owner,value)
+            object.__setattr__(owner,"_memo_version",owner._memo_version + 1)
+    def __delitem__(self,key):
+        OrderedDict.__delitem__(self,key)
+        touch(self)
+    def pop(self,*args):
+        touch(self)
+        return OrderedDict.pop(self,*args)
+    def popitem(self,*args,**kwargs):
+        touch(self)
+        return OrderedDict.popitem(self,*args,**kwargs)
+    def setdefault(self,key,default=None):
+        if key not in self: self[key] = default
+        return self[key]
+    def update(self,*args,**kwargs):
+        for key, value in OrderedDict(*args,**kwargs).items(): self[key] = value
+    def move_to_end(self,*args,**kwargs):
+        touch(self)
+        OrderedDict.move_to_end(self,*args,**kwargs)
+    def clear(self):
+        touch(self)
+        OrderedDict.clear(self)
+
+class TrackedList(list):
+    """list whose modifications count as changes of the owner."""
+    _memo_owner = None
+    def _changed(self,values=()):
+        if self._memo_owner is not None:
+            for value in values: adopt(self._memo_owner,value)
+            touch(self)
+    def __setitem__(self,index,value):
+        list.__setitem__(self,index,value)
+        self._changed(value if isinstance(index,slice) else [value])
+    def __delitem__(self,index):
+        list.__delitem__(self,index); self._changed()
+    def __iadd__(self,values):
+        self.extend(values); return self
+    def __imul__(self,n):
+        list.__imul__(self,n); self._changed(); return self
+    def append(self,value):
+        list.append(self,value); self._changed([value])
+    def extend(self,values):
+        values = list(values); list.extend(self,values); self._changed(values)
+    def insert(self,index,value):
+        list.insert(self,index,value); self._changed([value])
+    def remove(self,value):
+        list.remove(self,value); self._changed()
+    def pop(self,*args):
+        value = list.pop(self,*args); self._changed(); return value
+    def clear(self):
+        list.clear(self); self._changed()
+    def sort(self,*args,**kwargs):
+        list.sort(self,*args,**kwargs); self._changed()
+    def reverse(self):
+        list.reverse(self); self._changed()
+
+# ----------------------------------------------------------------------------:
+class ReadOnlyDict(OrderedDict):
+    """OrderedDict that cannot be modified. Memoized results are frozen into these."""
+    def _read_only(self,*args,**kwargs):
+        raise TypeError("Memoized results are read-only; use memo.copy_result for a mutable copy")
+    __setitem__ = __delitem__ = pop = popitem = clear = update = setdefault = move_to_end = _read_only
+    def __reduce__(self):
+        return (_read_only_dict,(list(self.items()),))
+
+def _read_only_dict(items):
+    obj = ReadOnlyDict()
+    setitem = OrderedDict.__setitem__
+    for key, value in items: setitem(obj,key,value)
+    return obj
+
+def freeze(value):
+    """Returns `value` with its dicts as ReadOnlyDicts and its lists as tuples."""
+    cls = value.__class__
+    if cls in _ATOMS or cls is ReadOnlyDict: return value
+    if isinstance(value,dict):
+        obj = ReadOnlyDict()
+        setitem = OrderedDict.__setitem__
+        for key, item in value.items():
+            setitem(obj,key,item if item.__class__ in _ATOMS else freeze(item))
+        return obj
+    if isinstance(value,(list,tuple)): return tuple(freeze(v) for v in value)
+    return value
+
+def copy_result(value):
+    """Returns a mutable copy of a (frozen) result: OrderedDicts and lists."""
+    if isinstance(value,dict):  return OrderedDict((k,copy_result(v)) for k,v in value.items())
+    if isinstance(value,list):  return [copy_result(v) for v in value]
+    if isinstance(value,tuple): return tuple(copy_result(v) for v in value)
+    return value
+
+class LRUMemo(object):
+    """
+    Bounded LRU memo of evaluation results.
+
+    Entries are keyed on (id(obj), obj version, key). A weak reference to
+    the object is kept to guard against id reuse; the object itself is
+    not kept alive by the memo. Results are frozen (see `freeze`) by `put`,
+    so callers sharing a result cannot corrupt it.
+
+    Attributes:
+      maxsize : int, number of entries kept (0 disables the memo)
+      hits    : int
+      misses  : int
+    """
+    def __init__(self,maxsize=1024):
+        self.maxsize = maxsize
+        self.hits    = 0
+        self.misses  = 0
+        self._entries = OrderedDict()
+
+    def _key(self,obj,key):
+        if isinstance(obj,Root): track(obj)
+        return (id(obj),getattr(obj,"_memo_version",0)) + tuple(key)
+
+    def get(self,obj,key,default=None):
+        """Returns the memoized result of (obj, key) or `default`."""
+        full_key = self._key(obj,key)
+        entry = self._entries.get(full_key)
+        if entry is None or entry[0]() is not obj:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(full_key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self,obj,key,value):
+        """Memoizes `value` as the result of (obj, key). Returns the frozen value."""
+        value = freeze(value)
+        if self.maxsize <= 0: return value
+        full_key = self._key(obj,key)
+        self._entries[full_key] = (weakref.ref(obj),value)
+        self._entries.move_to_end(full_key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drops all entries and resets the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """Returns a dictionary with hits, misses, size and maxsize."""
+        return {"hits"    : self.hits,
+                "misses"  : self.misses,
+                "size"    : len(self._entries),
+                "maxsize" : self.maxsize}
+
+    def __len__(self):
+        return len(self._entries)
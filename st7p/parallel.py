@@ -0,0 +1,43 @@
+"""
+This module provides the process pool shared by the readers that parse
+several files at once: timing and levels master files, the device load
+and the label files of a PMF.
+
+Usage:
+    from st7p import parallel
+    objs = parallel.parallel_map(_read_timing_file_task,tasks,workers)
+"""
+import os, gc
+from concurrent.futures import ProcessPoolExecutor
+
+def parallel_map(fn,tasks,workers=None):
+    """
+    Applies `fn` to each of `tasks` in a pool of processes.
+
+    The collector is paused while the results are unpickled; it would
+    otherwise rescan the growing object graphs many times over.
+
+    Parameters:
+      fn : function, module level (picklable) function of one task
+
+      tasks : list, arguments of `fn`
+
+      workers : int, default = None
+        Number of processes. None uses os.cpu_count(); 1 runs `fn` within
+        the current process. At most one process is used per task.
+
+    Returns:
+      list : results of `fn`, in the order of `tasks`
+    """
+    tasks = list(tasks)
+    if workers is None: workers = os.cpu_count() or 1
+    workers = min(workers,len(tasks))
+    if workers <= 1: return [fn(task) for task in tasks]
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            return list(pool.map(fn,tasks,chunksize=chunksize))
+    finally:
+        if gc_enabled: gc.enable()
@@ -1,66 +1,226 @@
 import sys, os, re, argparse
+from array import array
 from collections import OrderedDict
+from types import MappingProxyType
 #import st7putils 
 from st7p import st7putils
-
-RE_TF_HEADER     = re.compile("^hp93000,testflow,\d\.\d")
-RE_TF_LANG_REV   = re.compile("^language_revision")
-RE_TEST_FLOW     = re.compile("^test_flow$")
-RE_INFORMATION   = re.compile("^information$")
-RE_DECLARATIONS  = re.compile("^declarations$")
-RE_IMPL_DECL     = re.compile("^implicit_declarations$")
-RE_FLAGS         = re.compile("^flags$")
-RE_TM_PARAMS     = re.compile("^testmethodparameters$")
-RE_TM_LIMITS     = re.compile("^testmethodlimits$")
-RE_TMS           = re.compile("^testmethods$")
-RE_END           = re.compile("^end$")
-RE_TSS           = re.compile("^test_suites$")
-RE_BINNING       = re.compile("^binning$")
-RE_CONTEXT       = re.compile("^context$")
-RE_HW_BIN_DESC   = re.compile("^hardware_bin_descriptions$")
-
-RE_INFO_DESC  = re.compile("^description\s*=\s*\"(?P<item>.*)\"\s*;")
-RE_INFO_DEV_NAME  = re.compile("^device_name\s*=\s*\"(?P<item>[\w\s]+)\"\s*;")
-RE_INFO_DEV_REV   = re.compile("^device_revision\s*=\s*\"(?P<item>[\w\s]+)\"\s*;")
-RE_TEST_REVISION  = re.compile("^test_revision\s*=\s*\"(?P<item>[\w\s]+)\"\s*;")
-
-RE_DECL_TF_VAR    = re.compile("^(?P<var>\@\w+)\s*=\s*(?P<val>.*);")
-RE_FLAG           = re.compile("^(?P<name>\w+)\s*=\s*(?P<val>\w+);")
-RE_USER_FLAG      = re.compile("^user\s+(?P<name>\w+)\s*=\s*(?P<val>\w+);")
-
-RE_TM_NUM         = re.compile("^(?P<tmnum>tm_\d+)\:")
-RE_STR_STR        = re.compile("\"(?P<lhs>.+)\"\s*=\s*\"(?P<rhs>.*)\";")
-RE_TM_LIMIT          = re.compile("\"(?P<var>[\w]+)\"\s*=\s*"\
+from st7p import lazy
+
+RE_TF_HEADER     = lazy.compile("^hp93000,testflow,\d\.\d")
+RE_TF_LANG_REV   = lazy.compile("^language_revision")
+RE_TEST_FLOW     = lazy.compile("^test_flow$")
+RE_INFORMATION   = lazy.compile("^information$")
+RE_DECLARATIONS  = lazy.compile("^declarations$")
+RE_IMPL_DECL     = lazy.compile("^implicit_declarations$")
+RE_FLAGS         = lazy.compile("^flags$")
+RE_TM_PARAMS     = lazy.compile("^testmethodparameters$")
+RE_TM_LIMITS     = lazy.compile("^testmethodlimits$")
+RE_TMS           = lazy.compile("^testmethods$")
+RE_END           = lazy.compile("^end$")
+RE_TSS           = lazy.compile("^test_suites$")
+RE_BINNING       = lazy.compile("^binning$")
+RE_CONTEXT       = lazy.compile("^context$")
+RE_HW_BIN_DESC   = lazy.compile("^hardware_bin_descriptions$")
+
+RE_INFO_DESC  = lazy.compile("^description\s*=\s*\"(?P<item>.*)\"\s*;")
+RE_INFO_DEV_NAME  = lazy.compile("^device_name\s*=\s*\"(?P<item>[\w\s]+)\"\s*;")
+RE_INFO_DEV_REV   = lazy.compile("^device_revision\s*=\s*\"(?P<item>[\w\s]+)\"\s*;")
+RE_TEST_REVISION  = lazy.compile("^test_revision\s*=\s*\"(?P<item>[\w\s]+)\"\s*;")
+
+RE_DECL_TF_VAR    = lazy.compile("^(?P<var>\@\w+)\s*=\s*(?P<val>.*);")
+RE_FLAG           = lazy.compile("^(?P<name>\w+)\s*=\s*(?P<val>\w+);")
+RE_USER_FLAG      = lazy.compile("^user\s+(?P<name>\w+)\s*=\s*(?P<val>\w+);")
+
+RE_TM_NUM         = lazy.compile("^(?P<tmnum>tm_\d+)\:")
+RE_STR_STR        = lazy.compile("\"(?P<lhs>.+)\"\s*=\s*\"(?P<rhs>.*)\";")
+RE_TM_LIMIT          = lazy.compile("\"(?P<var>[\w]+)\"\s*=\s*"\
                                   "\"(?P<lv>[\-\d\.]*)\"\s*:\s*\"(?P<lvcs>[GTELNA]+)\"\s*:\s*"\
                                   "\"(?P<hv>[\-\d\.]*)\"\s*:\s*\"(?P<hvcs>[GTELNA]+)\"\s*:\s*"\
                                   "\"(?P<unit>[\w]*)\"\s*:\s*"\
                                   "\"(?P<offset>[\d]*)\"\s*:\s*"\
                                   "\"(?P<incr>[\d]*)\";")
-RE_TM_NAME        = re.compile("^testmethod_class\s*=\s*\"(?P<name>.*)\"")
-RE_TS_NAME        = re.compile("^(?P<name>\w+):")
-RE_TS_SETTING     = re.compile("^(?P<setting>\w+)\s*=\s*(?P<val>.+);")
+RE_TM_NAME        = lazy.compile("^testmethod_class\s*=\s*\"(?P<name>.*)\"")
+RE_TS_NAME        = lazy.compile("^(?P<name>\w+):")
+RE_TS_SETTING     = lazy.compile("^(?P<setting>\w+)\s*=\s*(?P<val>.+);")
 # Special Test-suites: 
-RE_BIN_DISCONT    = re.compile("^bin_disconnect")
-RE_MULTI_BIN_DEC  = re.compile("^multi_bin_decision")
+RE_BIN_DISCONT    = lazy.compile("^bin_disconnect")
+RE_MULTI_BIN_DEC  = lazy.compile("^multi_bin_decision")
 
 
 
 # Binning: 
-RE_OW_BIN         = re.compile("^otherwise\s+bin\s*=")
+RE_OW_BIN         = lazy.compile("^otherwise\s+bin\s*=")
+
 
 
+RE_CONFIG         = lazy.compile("^context_config_file\s*=\s*\"(?P<file>[\w\.\/\\\]+)\";")
+RE_TIMING         = lazy.compile("^context_timing_file\s*=\s*\"(?P<file>[\w\.\/\\\]+)\";")
+RE_LEVELS         = lazy.compile("^context_levels_file\s*=\s*\"(?P<file>[\w\.\/\\\]+)\";")
+RE_VECTOR         = lazy.compile("^context_vector_file\s*=\s*\"(?P<file>[\w\.\/\\\]+)\";")
+RE_CHN_ATTR       = lazy.compile("^context_channel_attrib_file\s*=\s*\"(?P<file>[\w\.\/\\\]+)\";")
 
-RE_CONFIG         = re.compile("^context_config_file\s*=\s*\"(?P<file>[\w\.\/\\\]+)\";")
-RE_TIMING         = re.compile("^context_timing_file\s*=\s*\"(?P<file>[\w\.\/\\\]+)\";")
-RE_LEVELS         = re.compile("^context_levels_file\s*=\s*\"(?P<file>[\w\.\/\\\]+)\";")
-RE_VECTOR         = re.compile("^context_vector_file\s*=\s*\"(?P<file>[\w\.\/\\\]+)\";")
-RE_CHN_ATTR       = re.compile("^context_channel_attrib_file\s*=\s*\"(?P<file>[\w\.\/\\\]+)\";")
+# ----------------------------------------------------------------------------:
+# Line splitting helpers. Each returns the same fields as the regex named in
+# its docstring, falling back to that regex for lines of unusual form.
+def _is_word(text): 
+    """True if `text` matches '\w+'."""
+    return text.replace("_","a").isalnum()
+
+def _split_tm_num(line): 
+    """Returns the 'tm_<n>' of a 'tm_<n>:' line, else "". (RE_TM_NUM)"""
+    if not line.startswith("tm_"): return ""
+    tmnum, sep, _ = line.partition(":")
+    if sep and tmnum[3:].isdigit(): return tmnum
+    return ""
+
+def _split_str_str(line): 
+    """Splits '"<lhs>" = "<rhs>";' into [lhs, rhs], else None. (RE_STR_STR)"""
+    if line.startswith('"') and line.endswith('";'): 
+        lhs, _, rest = line[1:-2].partition('"')
+        rest = rest.lstrip()
+        if rest.startswith("="): 
+            rest = rest[1:].lstrip()
+            if rest.startswith('"'): return [lhs, rest[1:]]
+    match = RE_STR_STR.search(line)
+    if match: return list(match.groups())
+    return None
+
+def _split_setting(line): 
+    """Splits '<setting> = <val>;' into [setting, val], else None. (RE_TS_SETTING)"""
+    if line.endswith(";"): 
+        setting, sep, val = line[:-1].partition("=")
+        setting = setting.rstrip(); val = val.lstrip()
+        if sep and val and _is_word(setting): return [setting, val]
+    match = RE_TS_SETTING.search(line)
+    if match: return list(match.groups())
+    return None
 
-def read(sfp,debug=False):
+# ----------------------------------------------------------------------------:
+# Section handlers. Each receives the Testflow object, the reader state, the 
+# line number and the stripped line of its section (excluding the 'end').
+def _tf_test_flow(obj,state,ln,line): 
+    state["flow_lines"].append(line); state["flow_lns"].append(ln)
+
+def _tf_information(obj,state,ln,line): 
+    match = RE_INFO_DESC.search(line)
+    if match: obj.info.description = match.group("item"); return
+    match = RE_INFO_DEV_NAME.search(line)
+    if match: obj.info.device_name = match.group("item"); return 
+    match = RE_INFO_DEV_REV.search(line)
+    if match: obj.info.device_revision = match.group("item"); return 
+    match = RE_TEST_REVISION.search(line)
+    if match: obj.info.test_revision = match.group("item");return 
+    raise RuntimeError("Unsupported line in information: [%d] %s"%(ln,line)) 
+
+def _tf_declarations(obj,state,ln,line): 
+    match = RE_DECL_TF_VAR.search(line)
+    if match: obj.decl.add_var(match.group("var"),match.group("val").strip()); return  
+    raise RuntimeError("Unsupported line in declarations: [%d] %s"%(ln,line)) 
+
+def _tf_implicit_declarations(obj,state,ln,line): 
+    raise RuntimeError("Unsupported line in implicit_declarations: [%d] %s"%(ln,line)) 
+
+def _tf_flags(obj,state,ln,line): 
+    match = RE_FLAG.search(line)
+    if match: obj.flags.add(Flag(user=False,name=match.group("name").strip(),val=match.group("val").strip())); return 
+    match = RE_USER_FLAG.search(line)
+    if match: obj.flags.add(Flag(user=True,name=match.group("name").strip(),val=match.group("val").strip())); return 
+    raise RuntimeError("Unsupported line in flags: [%d] %s"%(ln,line)) 
+
+def _tf_testmethodparameters(obj,state,ln,line): 
+    if not line.startswith('"'): 
+        tmnum = _split_tm_num(line)
+        if tmnum: state["tmnum"] = tmnum; obj.tms.add(tmnum); return 
+    lhs_rhs = _split_str_str(line)
+    if lhs_rhs: obj.tms[state["tmnum"]].add_param(lhs_rhs[0].strip(),lhs_rhs[1].strip()); return 
+    raise RuntimeError("Unsupported line in testmethodparameters: [%d] %s"%(ln,line)) 
+
+def _tf_testmethodlimits(obj,state,ln,line): 
+    tmnum = _split_tm_num(line)
+    if tmnum: state["tmnum"] = tmnum; obj.tms.add(tmnum); return 
+    match = RE_TM_LIMIT.search(line)
+    if match: obj.tms[state["tmnum"]].add_limit(*match.groups()); return 
+    raise RuntimeError("Unsupported line in testmethodlimits: [%d] %s"%(ln,line)) 
+
+def _tf_testmethods(obj,state,ln,line): 
+    tmnum = _split_tm_num(line)
+    if tmnum: state["tmnum"] = tmnum; obj.tms.add(tmnum); return 
+    match = RE_TM_NAME.search(line)
+    if match: obj.tms[state["tmnum"]].add_name(match.group("name")); return 
+    raise RuntimeError("Unsupported line in testmethods: [%d] %s"%(ln,line)) 
+
+def _tf_test_suites(obj,state,ln,line): 
+    if line.endswith(";"): # Fast path of _split_setting
+        setting, sep, val = line[:-1].partition("=")
+        setting = setting.rstrip(); val = val.lstrip()
+        if sep and val and _is_word(setting): state["ts"].add_setting(setting,val); return 
+    tsname, sep, _ = line.partition(":")
+    if sep and _is_word(tsname): 
+        state["ts"] = TestSuite(name=tsname,settings={}); obj.tss.add(state["ts"]); return 
+    setting = _split_setting(line)
+    if setting: state["ts"].add_setting(*setting); return 
+    raise RuntimeError("Unsupported line in testsuites: [%d] %s"%(ln,line)) 
+
+def _tf_special_test_suite(obj,state,ln,line): 
+    # bin_disconnect and multi_bin_decision
+    setting = _split_setting(line)
+    if setting: state["ts"].add_setting(*setting); return 
+    raise RuntimeError("Unsupported line in special-testsuites %s: [%d] %s"%(state["ts"].name,ln,line)) 
+
+def _tf_binning(obj,state,ln,line): 
+    match = RE_OW_BIN.search(line)
+    if match: print("WARNING: (%s): Skipping instance of 'otherwise bin': [%d] %s"%("st7p.testflow.read",ln,line)); return
+    if line.startswith("\""): print("TODO: Skipping Bin defines in binning."); return 
+    raise RuntimeError("Unsupported line in binning: [%d] %s"%(ln,line)) 
+
+def _tf_context(obj,state,ln,line): 
+    match = RE_TIMING.search(line)
+    if match: obj.timing = match.group("file").strip();return 
+    match = RE_LEVELS.search(line)
+    if match: obj.levels = match.group("file").strip();return 
+    match = RE_CONFIG.search(line)
+    if match: obj.config = match.group("file").strip();return
+    match = RE_VECTOR.search(line)
+    if match: obj.vector = match.group("file").strip();return 
+    match = RE_CHN_ATTR.search(line)
+    if match: obj.channel_attribute= match.group("file").strip();return
+    raise RuntimeError("Unsupported line in context: [%d] %s"%(ln,line)) 
+
+def _tf_hardware_bin_descriptions(obj,state,ln,line): 
+    sline = line.split()
+    if int(sline[0]) in [1,2,3,4,5,6,7,8,9,10]: # TODO:
+        print("TODO: Skipping hardware_bin_descriptions instance: [%d] %s"%(ln,line))
+        return 
+    raise RuntimeError("Unsupported line in hardware_bin_descriptions: [%d] %s"%(ln,line)) 
+
+# [section header] -> handler. Sections are closed by 'end'. 
+TF_SECTIONS = {"test_flow"                 : _tf_test_flow,
+               "information"               : _tf_information,
+               "declarations"              : _tf_declarations,
+               "implicit_declarations"     : _tf_implicit_declarations,
+               "flags"                     : _tf_flags,
+               "testmethodparameters"      : _tf_testmethodparameters,
+               "testmethodlimits"          : _tf_testmethodlimits,
+               "testmethods"               : _tf_testmethods,
+               "test_suites"               : _tf_test_suites,
+               "binning"                   : _tf_binning,
+               "context"                   : _tf_context,
+               "hardware_bin_descriptions" : _tf_hardware_bin_descriptions}
+# Special test suites; the header line opens a test suite of that name. 
+TF_SPECIAL_TEST_SUITES = ["bin_disconnect","multi_bin_decision"]
+
+def read(sfp,debug=False,flow=True):
     """ 
-    This method will read the provided pinconfig file and return 
-    context_section = False 
+    This method will read the provided testflow file and return 
     the parsed object. 
+
+    The file is streamed. Only one section handler (see TF_SECTIONS) is 
+    active at a time; it is switched on section headers and 'end'.
+
+    Parameters: 
+      flow : bool, default = True
+        If true, the test_flow section is tokenized and built into 
+        `obj.flow` (see `tokenize_flow` and `build_flow`). 
     """
     func = "st7p.testflow.read"
     if debug: print("DEBUG: %s: Recieved file: %s"%(func,sfp))
@@ -68,155 +228,32 @@ def read(sfp,debug=False):
     obj = Testflow(sfp)
     # WE will parse in tow passes: (1) everything but the teestflow (2) then the test flow 
 
-    tf_lines = {"start":-1,"end":-1}
-    tf_section = False; 
-    info_section = False 
-    decl_section = False 
-    impl_decl_section = False 
-    flags_section = False 
-    tm_params_section = False 
-    tm_limits_section = False 
-    tms_section = False 
-    ts_section  = False 
-    binning_section = False 
-    context_section = False 
-    bin_disconnect_section = False
-    multi_bin_decision_section = False 
-    hw_bin_desc_section = False 
+    state = {"tmnum" : "", "ts" : None, "flow_lines" : [], "flow_lns" : []}
+    handler = None # Handler of the current section
     # ------------------------------------------------------------------------:
     with open(sfp,"r") as fh: 
-        lines = [line.strip() for line in fh.readlines()]
-        for ln, line in enumerate(lines,start=1): 
-            if line == '' or line.isspace(): continue 
+        for ln, line in enumerate(fh,start=1): 
+            line = line.strip()
+            if not line: continue 
             if line.startswith("--"): continue 
             if debug: print("DEBUG: (%s): [%d]  %s"%(func,ln,line))
             ## STATE-SECTION
             ## ---------------------------------------------------------------: 
-
-
-            # Special Testsuites: 
-            if bin_disconnect_section: 
-                if RE_END.search(line): bin_disconnect_section=False;continue 
-                match = RE_TS_SETTING.search(line)
-                if match: obj.tss[tsname].add_setting(*match.groups()); continue 
-                raise RuntimeError("Unsupported line in special-testsuites bin_disconnect: [%d] %s"%(ln,line)) 
-            if multi_bin_decision_section: 
-                if RE_END.search(line): multi_bin_decision_section=False;continue 
-                match = RE_TS_SETTING.search(line)
-                if match: obj.tss[tsname].add_setting(*match.groups()); continue 
-                raise RuntimeError("Unsupported line in special-testsuites multi_bin_decision: [%d] %s"%(ln,line)) 
-            # Special Testsuites: END
-
-            if hw_bin_desc_section: 
-                if RE_END.search(line): hw_bin_desc_section=False;continue 
-                sline = line.split()
-                if int(sline[0]) in [1,2,3,4,5,6,7,8,9,10]: # TODO:
-                    print("TODO: Skipping hardware_bin_descriptions instance: [%d] %s"%(ln,line))
-                    continue 
-                raise RuntimeError("Unsupported line in hardware_bin_descriptions: [%d] %s"%(ln,line)) 
-            
-
-            if tf_section: 
-                if RE_END.search(line): tf_lines['end']=ln-1;tf_section=False;continue 
-                else: continue 
-            if info_section: 
-                if RE_END.search(line): info_section=False;continue 
-                match = RE_INFO_DESC.search(line)
-                if match: obj.info.description = match.group("item"); continue
-                match = RE_INFO_DEV_NAME.search(line)
-                if match: obj.info.device_name = match.group("item"); continue 
-                match = RE_INFO_DEV_REV.search(line)
-                if match: obj.info.device_revision = match.group("item"); continue 
-                match = RE_TEST_REVISION.search(line)
-                if match: obj.info.test_revision = match.group("item");continue 
-                raise RuntimeError("Unsupported line in information: [%d] %s"%(ln,line)) 
-            if decl_section: 
-                if RE_END.search(line): decl_section=False;continue 
-                match = RE_DECL_TF_VAR.search(line)
-                if match: obj.decl.add_var(match.group("var"),match.group("val").strip()); continue  
-                raise RuntimeError("Unsupported line in declarations: [%d] %s"%(ln,line)) 
-            if impl_decl_section: 
-                if RE_END.search(line): impl_decl_section=False;continue 
-                raise RuntimeError("Unsupported line in implicit_declarations: [%d] %s"%(ln,line)) 
-            if flags_section: 
-                if RE_END.search(line): flags_section=False;continue 
-                match = RE_FLAG.search(line)
-                if match: obj.flags.add(Flag(user=False,name=match.group("name").strip(),val=match.group("val").strip())); continue 
-                match = RE_USER_FLAG.search(line)
-                if match: obj.flags.add(Flag(user=True,name=match.group("name").strip(),val=match.group("val").strip())); continue 
-                raise RuntimeError("Unsupported line in flags: [%d] %s"%(ln,line)) 
-            if tm_params_section: 
-                if RE_END.search(line): tm_params_section=False;continue 
-                match = RE_TM_NUM.search(line)
-                if match: tmnum=match.group("tmnum").strip();obj.tms.add(tmnum);continue 
-                match = RE_STR_STR.search(line)
-                if match: obj.tms[tmnum].add_param(match.group("lhs").strip(),match.group("rhs").strip()); continue 
-                raise RuntimeError("Unsupported line in testmethodparameters: [%d] %s"%(ln,line)) 
-            if tm_limits_section: 
-                if RE_END.search(line): tm_limits_section=False;continue 
-                match = RE_TM_NUM.search(line)
-                if match: tmnum=match.group("tmnum").strip();obj.tms.add(tmnum);continue 
-                match = RE_TM_LIMIT.search(line)
-                if match: obj.tms[tmnum].add_limit(*match.groups()); continue 
-                raise RuntimeError("Unsupported line in testmethodlimits: [%d] %s"%(ln,line)) 
-            if tms_section: 
-                if RE_END.search(line): tms_section=False;continue 
-                match = RE_TM_NUM.search(line)
-                if match: tmnum=match.group("tmnum").strip();obj.tms.add(tmnum);continue 
-                match = RE_TM_NAME.search(line)
-                if match: obj.tms[tmnum].add_name(match.group("name")); continue 
-                raise RuntimeError("Unsupported line in testmethods: [%d] %s"%(ln,line)) 
-            if ts_section: 
-                if RE_END.search(line): ts_section=False;continue 
-                match = RE_TS_NAME.search(line)
-                if match: tsname = match.group("name"); obj.tss.add(TestSuite(name=tsname,settings={}));continue 
-                match = RE_TS_SETTING.search(line)
-                if match: obj.tss[tsname].add_setting(*match.groups()); continue 
-                raise RuntimeError("Unsupported line in testsuites: [%d] %s"%(ln,line)) 
-            if binning_section: 
-                if RE_END.search(line): binning_section=False;continue 
-                match = RE_OW_BIN.search(line)
-                if match: print("WARNING: (%s): Skipping instance of 'otherwise bin': [%d] %s"%(func,ln,line)); continue
-                if line.startswith("\""): print("TODO: Skipping Bin defines in binning."); continue 
-                raise RuntimeError("Unsupported line in binning: [%d] %s"%(ln,line)) 
-            if context_section: 
-                if RE_END.search(line): context_section=False;continue 
-                match = RE_TIMING.search(line)
-                if match: obj.timing = match.group("file").strip();continue 
-                match = RE_LEVELS.search(line)
-                if match: obj.levels = match.group("file").strip();continue 
-                match = RE_CONFIG.search(line)
-                if match: obj.config = match.group("file").strip();continue
-                match = RE_VECTOR.search(line)
-                if match: obj.vector = match.group("file").strip();continue 
-                match = RE_CHN_ATTR.search(line)
-                if match: obj.channel_attribute= match.group("file").strip();continue
-                raise RuntimeError("Unsupported line in context: [%d] %s"%(ln,line)) 
+            if handler is not None: 
+                if line == "end": handler = None; continue 
+                handler(obj,state,ln,line); continue 
             # FREELANCE: 
-            if RE_TEST_FLOW.search(line):    tf_section=True;tf_lines['start']=ln-1;continue  
-            if RE_INFORMATION.search(line):  info_section=True; continue 
-            if RE_DECLARATIONS.search(line): decl_section=True;continue 
-            if RE_IMPL_DECL.search(line):    impl_decl_section=True;continue 
-            if RE_FLAGS.search(line):        flags_section=True;continue 
-            if RE_TM_PARAMS.search(line):    tm_params_section=True;continue 
-            if RE_TM_LIMITS.search(line):    tm_limits_section=True;continue 
-            if RE_TMS.search(line):          tms_section=True;continue 
-            if RE_TSS.search(line):          ts_section=True;continue 
-            if RE_BINNING.search(line):      binning_section=True;continue 
-            if RE_CONTEXT.search(line):      context_section=True;continue 
-            if RE_HW_BIN_DESC.search(line):  hw_bin_desc_section = True; continue 
-
-            if RE_BIN_DISCONT.search(line):  
-                bin_disconnect_section=True; 
-                tsname= "bin_disconnect"
-                obj.tss.add(TestSuite(name=tsname,special=True,settings={})) 
+            handler = TF_SECTIONS.get(line)
+            if handler is not None: 
+                if handler is _tf_test_flow: handler(obj,state,ln,line)
                 continue 
-            if RE_MULTI_BIN_DEC.search(line): 
-                multi_bin_decision_section = True
-                tsname = "multi_bin_decision"
-                obj.tss.add(TestSuite(name=tsname,special=True,settings={})) 
-                continue
-         
+            for tsname in TF_SPECIAL_TEST_SUITES: 
+                if line.startswith(tsname): 
+                    state["ts"] = TestSuite(name=tsname,special=True,settings={})
+                    obj.tss.add(state["ts"]) 
+                    handler = _tf_special_test_suite 
+                    break 
+            if handler is not None: continue 
 
             if RE_TF_HEADER.search(line):    continue  # NOTE: Not need to store (?)
             if RE_TF_LANG_REV.search(line):  continue  # NOTE: Not need to store (?)
@@ -228,250 +265,279 @@ def read(sfp,debug=False):
         ts.params = obj.get_tm_params(ts.name)
         ts.limits = obj.get_tm_limits(ts.name)
 
-
     ## Second pass over the test_flow structure 
     # The reason for havinga second pass on the Testflow file structure 
     # is to no link the module with a 'bad' pasring method. If I separate
     # and solidify the strucutre, then someone else can come in and rewrite
     # the structure.
-    print("testflow structure: ",tf_lines)
-
-    # Line-by-line processing
-    i = tf_lines["start"]; iend = tf_lines["end"]
-    #while i <= iend: 
-    #    print(lines[i])
-    #    i+=1  
-
-
-    print("WARNING: Skipping testflow structure processing.")
+    if flow and state["flow_lines"]: 
+        tokens = tokenize_flow(state["flow_lines"],state["flow_lns"])
+        obj.flow = build_flow(tokens,debug=debug)
+        obj.tss.update_bypassed(obj.flow)
     return obj 
 
-    ## Full string processing
-    ## ----------------------
-    special_chars = ["{","}","(",")",",",";","!","=","@",'.','-','+',"<",">"] 
-    space_chars   = [" ","\n","\t"]
-    lower  = ['a','b','c','d','e','f','g','h','i','j','k','l','m','n','o','p','q','r','s','t','u','v','w','x','y','z'] 
-    upper  = ['A','B','C','D','E','F','G','H','I','J','K','L','M','N','O','P','Q','R','S','T','U','V','W','X','Y','Z']
-    number = ['0','1','2','3','4','5','6','7','8','9']
-    alphanumeric = lower + upper + number + ['_'] 
-    re_digits = re.compile("^\d+$")
-    keywords = ["groupbypass","open","closed","if","else","then","or","and",
-                "run_and_branch","run",
-                
-                "stop_bin"]
-
-
-    RE_CLOSED_GRP = re.compile("closed\s*,\s*\"(?P<name1>.*)\"\s*,\s*\"(?P<name2>.*)\"")
-    RE_OPEN_GRP   = re.compile("open\s*,\s*\"(?P<name1>.*)\"\s*,\s*\"(?P<name2>.*)\"")
-
-    RE_RUN_AND_BRANCH = re.compile("run_and_branch\((?P<name>\w+)\)")
+def read_context(sfp,debug=False): 
+    """ 
+    Reads only the context section of the testflow file. Returns a 
+    Testflow object holding the context file names, so the setup paths
+    (`Testflow.get_config_path`, etc.) are available without parsing the
+    whole testflow. The other sections are left empty. 
+    """
+    func = "st7p.testflow.read_context"
+    if debug: print("DEBUG: %s: Recieved file: %s"%(func,sfp))
+    obj = Testflow(sfp)
+    in_context = False
+    with open(sfp,"r") as fh: 
+        for ln, line in enumerate(fh,start=1): 
+            line = line.strip()
+            if not in_context: 
+                if line == "context": in_context = True
+                continue 
+            if line == "end": break 
+            if not line or line.startswith("--"): continue 
+            _tf_context(obj,None,ln,line)
+    return obj 
 
+# ----------------------------------------------------------------------------:
+# test_flow lexer. A single master pattern is scanned with `re.finditer`; 
+# every match is one token (whitespace and '--' comments are dropped). 
+RE_FLOW_TOKEN = lazy.compile(r"""
+    (?P<space>\s+)
+   |(?P<comment>--.*)
+   |(?P<string>"(?:[^"\\]|\\.)*")
+   |(?P<word>\w+)
+   |(?P<special>[{}()\[\],;:!=@.+\-*/<>&|])
+   |(?P<bad>.)""", re.VERBOSE)
+
+FLOW_KEYWORDS = set(["groupbypass","open","closed","if","else","then","or","and",
+                     "run_and_branch","run","stop_bin"])
+FLOW_BRACES   = {"}" : "{", ")" : "("}
+
+class FlowTokens(object): 
+    """
+    Token arrays of the test_flow section, see `tokenize_flow`. All 
+    attributes are indexed by token number.
+
+    Attributes: 
+      values : list of token strings. String literals keep their quotes.
+      tags   : list of token tags; the keyword itself, 'identifier', 
+               'digits', 'string' or the special character.
+      lines  : array of source line numbers
+      match  : array holding the index of the matching brace/parenthesis 
+               for '{', '}', '(' and ')', -1 otherwise. 
+    """
+    def __init__(self): 
+        self.values = []
+        self.tags   = []
+        self.lines  = array("l")
+        self.match  = array("l")
 
+    def __len__(self): 
+        return len(self.values)
 
-    def stringify_tokens(tokens,start,stop): 
-        
-        i = start; iend = stop   
-        retstr = []
-        while i <= iend: 
-            retstr.append(tokens[i]['token'])
-            i+=1
-        return "".join(retstr)
-
-    def classify_token(token): 
-        if token in keywords: return token
-        if re_digits.search(token): return 'digits'
-        return 'identifier'
-
-
-
-    string = "\n".join(lines[tf_lines["start"]:tf_lines["end"]])
-    ln = int(tf_lines['start']); 
-    charOnLineIndex = 1
-    lastchar = ''
-    nextchar =''
-    inputLength = len(string) - 1
-
-    tokens = []; token = []
-    sytbl = {
-        "run_and_branch" : [],
-        "run" : [],
-        "ocb" : [],
-        "ccb" : [],
-        "cb-sets": OrderedDict(),
-        "semicolon": []
-    }
-    last_ocb = []
-    cbs = 0
-
-    in_str_literal = False 
-    char_handled   = False
-
-    for i, char in enumerate(string): 
-        if debug: print("DEBUG: [%s]: %s"%(i,char))
-        # Infastructure for lookahead: 
-        if i == inputLength: nextchar = ''
-        else: nextchar = string[i+1]
-        # Infastructure for reporting: 
-        if char == '\n': 
-            ln += 1
-            charOnLineIndex = 1
-        else: charOnLineIndex += 1
-
-        # States Seciton: 
-        # ---------------
-        if in_str_literal: 
-            if char == '\"' and lastchar != '\\': # TODO: I dont think '//' is needed
-                if debug: print('DEBUG:  - closing string-literal state')
-                in_str_literal = False; 
-                token.append(char) # NOTE: We are keeping the double quotes. 
-                _token = "".join(token)
-                if _token:
-                    tokens.append({'token':_token, 'tag':'identifier'})
-                    token = []
-                else: print("WARNING: Empty double qoutes found.")
-            else: token.append(char)
-            lastchar = char; continue;    
-
-        # Freelance section: 
-        # ------------------          
-        if char == '\"':  # Catch string-literals...
-            if debug: print('DEBUG: (%s): - setting string-literal state'%(func))
-            in_str_literal = True
-            token.append(char) # NOTE: We are keeping the double quotes. 
-            lastchar = char; continue; 
-
-        if char in space_chars: 
-            if lastchar in space_chars: # chained spaces
-                lastchar = char; continue; 
-            if token:
-                if debug: print("DEBUG: - pushing token on space, %s"%("".join(token)))     
-                _token = "".join(token)
-                if _token:
-                    tag = classify_token(_token)
-                    tokens.append({'token':_token, 'tag':tag})
-                    if tag == "run_and_branch":
-                        sytbl['run_and_branch'].append(len(tokens)-1)
-                    elif tag == "run": 
-                        sytbl['run'].append(len(tokens)-1)
-                    token = []
-            else: lastchar = char; continue;            
-
-        elif char in special_chars: 
-            _token = "".join(token)
-            if _token: 
-                tag = classify_token(_token)
-                tokens.append({'token':_token,'tag':tag})
-                token = []
-                if tag == "run_and_branch":
-                    sytbl['run_and_branch'].append(len(tokens)-1)
-                elif tag == "run": 
-                    sytbl['run'].append(len(tokens)-1)
-            tokens.append({'token':char,'tag':char})
-
-            if char == "{": 
-                cbs += 1
-                sytbl['ocb'].append(len(tokens)-1)
-                last_ocb.append(len(tokens)-1)
-                
-            elif char == "}": 
-                cbs -= 1
-                sytbl['ccb'].append(len(tokens)-1)
-                #sytbl['cb-sets'].append([last_ocb.pop(),sytbl['ccb'][-1]])
-                sytbl['cb-sets'][last_ocb.pop()] = sytbl['ccb'][-1]
-
-            elif char == ";": 
-                sytbl['semicolon'].append(char)
-            
-            continue 
-      
-        elif char in alphanumeric: 
-            token.append(char)
-        else: 
-            raise RuntimeError("BAd char: %s, token = %s, ln = %s"%(char,token,ln))
+    def text(self,start,stop): 
+        """Returns the tokens start..stop (inclusive) joined into a string."""
+        return "".join(self.values[start:stop+1])
 
-    ## build 
-    for i in sytbl['run_and_branch']: 
-        #print("run_and_branch",i,tokens[i])
-        pass 
+def tokenize_flow(lines,lns=None): 
+    """
+    Tokenizes the lines of the test_flow section (including the 
+    'test_flow' header). 
 
-    breakval = 40000
+    Parameters: 
+      lines : list of strings
+      lns   : list of int, default = None
+        Source line numbers of `lines`, used in error messages. Defaults 
+        to counting from 1.
 
-    grps = []
-    tss  = OrderedDict()
-    grp_range = [] # [start,stop] or the latest group 
+    Returns: 
+      FlowTokens
+    """
+    tokens = FlowTokens()
+    values = tokens.values; tags = tokens.tags
+    lines_ = tokens.lines;  match = tokens.match
+    keywords = FLOW_KEYWORDS
+    stack = [] # Indexes of the open braces/parentheses
+    for k, line in enumerate(lines): 
+        ln = lns[k] if lns else k + 1
+        for m in RE_FLOW_TOKEN.finditer(line): 
+            kind = m.lastgroup
+            if kind == "space" or kind == "comment": continue 
+            value = m.group()
+            if kind == "word": 
+                if value in keywords: tag = value 
+                elif value.isdigit(): tag = "digits"
+                else:                 tag = "identifier"
+            elif kind == "special": 
+                tag = value 
+                if value == "{" or value == "(": stack.append(len(values))
+                elif value == "}" or value == ")": 
+                    if not stack or values[stack[-1]] != FLOW_BRACES[value]: 
+                        raise RuntimeError("Unbalanced '%s' in test_flow: [%s] %s"%(value,ln,line))
+                    j = stack.pop()
+                    match[j] = len(values)
+                    values.append(value); tags.append(tag); lines_.append(ln); match.append(j)
+                    continue 
+            elif kind == "string": tag = "string"
+            else: raise RuntimeError("Bad character '%s' in test_flow: [%s] %s"%(value,ln,line))
+            values.append(value); tags.append(tag); lines_.append(ln); match.append(-1)
+    if stack: 
+        raise RuntimeError("Unclosed '%s' in test_flow: [%s]"%(values[stack[-1]],lines_[stack[-1]]))
+    return tokens
+
+def _flow_group(tokens,i): 
+    """
+    Returns the Group opened by the '{' at token `i`, or None if the 
+    brace is not a group, i.e. not closed by one of:
+      }, open,"<name>",""
+      }, closed,"<name>",""
+      }, groupbypass, open|closed,"<name>",""
+    """
+    values = tokens.values
+    ccb = tokens.match[i]
+    k = ccb + 1
+    n = len(values)
+    if k + 1 >= n or values[k] != "," : return None 
+    k += 1
+    bypass = values[k] == "groupbypass"
+    if bypass: k += 2 
+    if k + 2 >= n or values[k] not in ["open","closed"] or tokens.tags[k+2] != "string": 
+        if bypass: 
+            raise RuntimeError("Group has bad form: [%s] %s"%(tokens.lines[k-2],tokens.text(k-3,k+3)))
+        return None 
+    return Group(values[k+2][1:-1],status=values[k],start=i,stop=ccb,bypass=bypass)
+
+FLOW_GROUP_TRAILER = set([",","open","closed","groupbypass","string"])
+
+def _flow_block_end(tokens,j): 
+    """Returns the token after the '}' at `j`, skipping a group trailer."""
+    tags = tokens.tags; n = len(tags)
+    k = j + 1
+    if k < n and tags[k] == ",": 
+        while k < n and tags[k] in FLOW_GROUP_TRAILER: k += 1
+    return k
+
+def _flow_statements(tokens,lo,hi): 
+    """
+    Returns the statements of the tokens lo..hi-1 as (kind, index, blocks)
+    where index is the first token and blocks are (lo, hi) token ranges:
+      run            : run(<ts>);
+      run_and_branch : blocks = [then, else], either may be None
+      branch         : if <cond> then {..} else {..}, blocks as above
+      block          : a '{..}' block or group, blocks = [body]
+      stop           : stop_bin; terminates the flow
+      other          : any other statement. Its blocks (e.g. loop bodies)
+                       are treated as optional. 
+    """
+    tags = tokens.tags; match = tokens.match
+    stmts = []
+    i = lo
+    while i < hi: 
+        tag = tags[i]
+        if tag == ";": i += 1; continue 
+        if tag == "{": 
+            stmts.append(("block",i,[(i+1,match[i])]))
+            i = _flow_block_end(tokens,match[i]); continue 
+        if tag == "run": 
+            stmts.append(("run",i,[])); i += 4; continue 
+        if tag == "run_and_branch" or tag == "if": 
+            if tag == "if": 
+                k = i + 1
+                while k < hi and tags[k] not in ["then",";","{"]: 
+                    k = (match[k] if tags[k] == "(" else k) + 1
+                kind = "branch"
+            else: k = i + 4; kind = tag 
+            blocks = [None,None]
+            if k + 1 < hi and tags[k] == "then" and tags[k+1] == "{": 
+                blocks[0] = (k+2,match[k+1]); k = _flow_block_end(tokens,match[k+1])
+                if k + 1 < hi and tags[k] == "else" and tags[k+1] == "{": 
+                    blocks[1] = (k+2,match[k+1]); k = _flow_block_end(tokens,match[k+1])
+            stmts.append((kind,i,blocks))
+            i = k; continue 
+        blocks = []
+        k = i
+        while k < hi and tags[k] != ";": 
+            if tags[k] == "(": k = match[k] + 1; continue 
+            if tags[k] == "{": 
+                blocks.append((k+1,match[k])); k = _flow_block_end(tokens,match[k])
+                if k < hi and tags[k] != "else": break 
+                continue 
+            k += 1
+        stmts.append(("stop" if tag == "stop_bin" else "other",i,blocks))
+        i = k
+    return stmts
 
-    flow = Flow(tokens = tokens) 
+def _union(ids,other): 
+    return ids + [ID for ID in other if ID not in ids]
 
-    i = 0; iend = len(tokens) - 1
-    while i <= iend: 
-        token = tokens[i]['token']
-        tag   = tokens[i]['tag']
-        #print(i,token,tag)
+def _link_block(flow,at,block,cont): 
+    """
+    Sets the pass/fail pointers of the nodes within `block` (a token 
+    range, see `_flow_statements`), where `cont` are the node ids run
+    after the block. Returns the node ids entering the block.
+    """
+    if block is None: return cont
+    for kind, i, blocks in reversed(_flow_statements(flow.tokens,block[0],block[1])): 
+        if kind == "run": 
+            node = at[i]
+            node.pass_ptr = node.fail_ptr = cont
+            cont = [node._id]
+        elif kind == "run_and_branch": 
+            node = at[i]
+            node.pass_ptr = _link_block(flow,at,blocks[0],cont)
+            node.fail_ptr = _link_block(flow,at,blocks[1],cont)
+            cont = [node._id]
+        elif kind == "block": 
+            cont = _link_block(flow,at,blocks[0],cont)
+        elif kind == "branch": 
+            cont = _union(_link_block(flow,at,blocks[0],cont),_link_block(flow,at,blocks[1],cont))
+        elif kind == "stop": 
+            cont = []
+        else: 
+            entry = cont
+            for blk in blocks: entry = _union(entry,_link_block(flow,at,blk,cont))
+            cont = entry
+    return cont
 
-        if i == 0: 
-            if token != 'test_flow': 
-                raise RuntimeError("First token should be 'test_flow'")
-            i+=1; continue 
-        
-        
-        if token == "{": 
-            #print(token,i,sytbl['cb-sets'][i])
-            ccb = sytbl['cb-sets'][i]
-            if tokens[ccb+2]['token'] == "groupbypass": 
-                tstr = stringify_tokens(tokens,ccb+1,ccb+1+7) 
-                closed = RE_CLOSED_GRP.search(tstr)
-                opened = RE_OPEN_GRP.search(tstr)
-                if closed: grpname = closed.group("name1")
-                elif opened: grpname = opened.group("name1")
-                else: raise RuntimeError("Group has bad form: %s"%(tstr))
-                print("DEBUG: GROUP(byp):  %s"%(name))
-                grps.append({'name':grpname,"start":i,"stop":ccb})
-                grp = flow.add_group(Group(grpname,status=status,start=i,stop=ccb))
-                grp_range = [i,ccb]
-            if tokens[ccb+2]['token'] in ["closed",'open']: 
-                tstr = stringify_tokens(tokens,ccb+1,ccb+1+5)
-                closed = RE_CLOSED_GRP.search(tstr)
-                opened = RE_OPEN_GRP.search(tstr)
-                if closed: grpname = closed.group("name1"); status = 'closed'
-                elif opened: grpname = opened.group("name1"); status = 'open'
-                else: raise RuntimeError("Group has bad form: %s"%(tstr))
-                print("DEBUG: GROUP: %s"%(grpname))
-                grps.append({'name':grpname,"start":i,"stop":ccb})
-                grp = flow.add_group(Group(grpname,status=status,start=i,stop=ccb))
-                grp_range = [i,ccb]
- 
-        if token == "run_and_branch": 
-            tstr = stringify_tokens(tokens,i,i+3)
-            match = RE_RUN_AND_BRANCH.search(tstr)
-            if match: 
-                tsname = match.group('name')                
-                if tsname in tss: raise RuntimeError("Double ts instance: %s"%(tsname))
-                else: tss[tsname] = i + 2
-                print("DEBUG: TESTSUITE: %s"%(tsname))
-                if grp_range: 
-                    if i > grp_range[0] and i < grp_range[1]: 
-                        node = flow.add_node(Node(name=tsname,index=i+2),grp.name)
-                    else: node = flow.add_node(Node(name=tsname,index=i+2))
-                else: node = flow.add_node(Node(name=tsname,index=i+2))
-
-
-                #sys.exit(1)
-
-
-            else:
-                raise RuntimeError("Run-and-branch bad form: %s"%(tstr))
-        
-        #if i == breakval: break
-        i +=1
+def build_flow(tokens,debug=False): 
+    """
+    Builds the Flow graph of the test_flow tokens: its groups, the test 
+    suites run within them (nodes) and their pass/fail pointers, see 
+    `_link_block`. The effective-bypass bitmap is computed last, see 
+    `Flow.update_bypassed`.
 
-    print("i",i)
-    for i,grp in enumerate(grps,start=1): 
-        print("%-3d.) %-30s, start = %-6s, stop = %-6s "%(i,grp['name'],grp['start'],grp['stop']))
+    Parameters: 
+      tokens : FlowTokens, see `tokenize_flow`
 
-    for ts,i in tss.items(): 
-        print("%-90s, %s"%(ts,i)) 
-    return obj
-             
+    Returns: 
+      Flow
+    """
+    func = "st7p.testflow.build_flow"
+    values = tokens.values; tags = tokens.tags; match = tokens.match
+    if not values or values[0] != "test_flow": 
+        raise RuntimeError("First token should be 'test_flow'")
+    flow = Flow(tokens=tokens)
+    groups = [] # Stack of the enclosing groups
+    at     = {} # [keyword token] -> node
+    for i in range(1,len(values)): 
+        tag = tags[i]
+        if tag == "{": 
+            grp = _flow_group(tokens,i)
+            if grp is None: continue 
+            if groups: grp.parent = groups[-1]._id
+            if debug: print("DEBUG: (%s): GROUP: %s (%s%s)"%(func,grp.name,grp.status,", bypass" if grp.bypass else ""))
+            groups.append(flow.add_group(grp))
+        elif tag == "}": 
+            if groups and groups[-1].stop == i: groups.pop()
+        elif tag == "run_and_branch" or tag == "run": 
+            if values[i+1] != "(" or match[i+1] != i + 3: 
+                raise RuntimeError("%s bad form: [%s] %s"%(tag,tokens.lines[i],tokens.text(i,i+3)))
+            tsname = values[i+2]
+            if debug: print("DEBUG: (%s): TESTSUITE: %s"%(func,tsname))
+            at[i] = flow.add_node(Node(name=tsname,index=i+2,kind=tag),groups[-1] if groups else None)
+    flow.entry = _link_block(flow,at,(1,len(values)),[])
+    flow.update_bypassed()
+    return flow
 
 # ----------------------------------------------------------------------------: 
 class Bin(object): 
@@ -494,44 +560,106 @@ class Bins(st7putils.Container):
 class Flow(object): 
     def __init__(self,tokens):
         """ 
-          tokens : list of dictionaries
-           this parameter should be built during the read method.  
+          tokens : FlowTokens
+           this parameter should be built during the read method, 
+           see `tokenize_flow`.  
         """
         self.tokens = tokens 
     
         self.groups = Groups()
         self.nodes  = Nodes() 
+        self.entry  = []  # ids of the nodes run first 
+        self.bypassed = bytearray() # [id] -> 1 if bypassed, see `update_bypassed`
         self._ids   = 0 
+        self._objects = [None] # [id] -> group/node
    
     def add_group(self, group): 
         self._ids += 1
         group.set_id(self._ids)
-        self.groups.add(group)
-        return self.groups.__last__()
+        self.groups.add(group,group.start)
+        self._objects.append(group)
+        return group 
 
 
     def add_node(self,node,grp=None): 
+        """Adds `node`, run within the Group `grp` (None at the top level)."""
         self._ids += 1
         node.set_id(self._ids)
-        self.nodes.add(node)
-        if grp: self.groups[grp].nodes.append(self._ids)
-        return self.nodes.__last__()
-        
-  
+        if grp: 
+            node.group = grp._id
+            grp.nodes.append(self._ids)
+        self.nodes.add(node,node.index)
+        self._objects.append(node)
+        return node 
+
+    def get(self,ID): 
+        """Returns the group/node of the id."""
+        return self._objects[ID]
+
+    def update_bypassed(self): 
+        """
+        Computes the effective-bypass bitmap `bypassed`, indexed by id. A 
+        group is bypassed if it, or any enclosing group, is a groupbypass; 
+        a node is bypassed if its group is.  
+        """
+        bits = bytearray(self._ids + 1)
+        for grp in self.groups: # NOTE: Enclosing groups are added first 
+            if grp.bypass or (grp.parent and bits[grp.parent]): 
+                bits[grp._id] = 1
+        for node in self.nodes: 
+            if node.group and bits[node.group]: 
+                bits[node._id] = 1
+        self.bypassed = bits
+
+    def is_bypassed(self,name): 
+        """
+        True if testsuite `name` is run within a bypassed group. A 
+        testsuite run at several places is bypassed only if all of them
+        are. 
+        """
+        ids = self.nodes.ids(name)
+        if not ids: return False 
+        for ID in ids: 
+            if self.bypassed[ID] != 1: return False 
+        return True 
 
 
-class Groups(st7putils.Container): 
+
+class FlowItems(object): 
+    """
+    Groups or nodes of a Flow, keyed by their token index. Names may 
+    repeat (a testsuite run in both branches, two groups of the same 
+    name), thus `ids` returns every id of a name. 
+    """
     def __init__(self, ): 
-        super(Groups,self).__init__()
-    def add(self,group): 
-        super(Groups,self).add(group,Group)
+        self.objects = OrderedDict() # [token index] -> group/node
+        self._ids    = {} # [name] -> [ids]
+    def add(self,obj,index): 
+        self.objects[index] = obj 
+        self._ids.setdefault(obj.name,[]).append(obj._id)
+    def ids(self,name): 
+        """Returns the ids of the groups/nodes named `name`."""
+        return self._ids.get(name,[])
+    def names(self): 
+        return list(self._ids)
+    def __contains__(self,name): 
+        return name in self._ids
+    def __iter__(self): 
+        return iter(self.objects.values())
+    def __len__(self): 
+        return len(self.objects)
+
+class Groups(FlowItems): 
+    pass 
 
 class Group(object): 
-    def __init__(self,name,status,start,stop): 
+    def __init__(self,name,status,start,stop,bypass=False): 
         self.name   = name 
         self.status = status # open / closed
         self.start  = start   # start token 
         self.stop   = stop     # stop token 
+        self.bypass = bypass   # groupbypass
+        self.parent = None     # id of the enclosing group 
         self._id    = -1 
 
         self.nodes = []
@@ -540,17 +668,16 @@ class Group(object):
         self._id = ID
 
 
-class Nodes(st7putils.Container): 
-    def __init__(self, ): 
-        super(Nodes,self).__init__()
-    def add(self,node): 
-        super(Nodes,self).add(node,Node)
+class Nodes(FlowItems): 
+    pass 
 
 class Node(object): 
-    def __init__(self,name,index): 
+    def __init__(self,name,index,kind="run_and_branch"): 
         self.name = name 
         self.index = index
-        self.pass_ptr = None # Pointers to Nodes, Bins, etc... 
+        self.kind  = kind # run / run_and_branch
+        self.group = None # id of the enclosing group 
+        self.pass_ptr = None # ids of the nodes run next, [] ends the flow 
         self.fail_ptr = None 
         self._id    = -1 
     def set_id(self,ID): 
@@ -691,19 +818,35 @@ class TestSuite(object):
         self.tm     = None # NOTE: Set during second pass w/in read method
         self.limits = None # NOTE: Set during second pass w/in read method
         self.params = None # NOTE: Set during second pass w/in read method
+        self.group_bypass = False # NOTE: Set by `TestSuites.update_bypassed`
+        self._bypassed    = None  
+        self._owner       = None # TestSuites holding this testsuite 
 
     def add_setting(self,setting,val): 
         if setting in self.settings: 
             raise RuntimeError("Testsuite '%s' setting '%s' is already declared."%(self.name,setting))
         self.settings[setting] = val
+        if setting == "local_flags": self._bypassed = None
+        if self._owner is not None: self._owner.reindex(self)
+
+    def index_keys(self): 
+        """
+        Returns the keys of this testsuite within the `TestSuites` indexes
+        (see TS_INDEXES), None where it is not indexed. 
+        """
+        label = self.get_label() if "override_seqlbl" in self.settings else None
+        if self.is_multiport_timing(): sp_timing = None; mp_timing = self.get_tim_settings()
+        else:                          sp_timing = self.get_tim_settings(); mp_timing = None
+        return (label, self.get_lvl_settings(), sp_timing, mp_timing, self.get_tm_num() or None)
 
     def is_bypassed(self,): 
-        """Return boolean representing if testsuite is bypassed"""
-        if "local_flags" in self.settings.keys(): 
-            if "bypass" in self.settings["local_flags"]: 
-                return True
-        # TODO: check if bypassed within the groups
-        return False 
+        """
+        Return boolean representing if testsuite is bypassed, either by 
+        its own 'bypass' flag or by a bypassed group (see `group_bypass`).
+        """
+        if self._bypassed is None: 
+            self._bypassed = self.group_bypass or "bypass" in self.settings.get("local_flags","")
+        return self._bypassed
 
 
     def get_tm_num(self):
@@ -813,13 +956,95 @@ class TestSuite(object):
         """Return the local flags."""
         return "TODO:FLAGS"
 
+# Inverted indexes of TestSuites, in the order of `TestSuite.index_keys`. 
+TS_INDEXES = ["labels","lvls","single_port_timings","multi_port_timings","tms"]
+
 class TestSuites(st7putils.Container): 
+    """
+    Testsuites container. The get_unique_* queries are answered from 
+    inverted indexes ([key] -> testsuites, see TS_INDEXES). Testsuites 
+    are reindexed lazily: `add` and `TestSuite.add_setting` only mark 
+    them, the next query updates the indexes of the marked testsuites. 
+    Queries return read-only views ([key] -> tuple of testsuites), built
+    once per index change and shared between calls. 
+    """
     def __init__(self): 
         super(TestSuites,self).__init__()
-        self._uniqlbls = {} # lbl -> [tss]
+        self._index  = [OrderedDict() for name in TS_INDEXES] # [key] -> [tsnames]
+        self._active = [OrderedDict() for name in TS_INDEXES] # Same, w/o bypassed testsuites
+        self._keys   = {} # [tsname] -> (index keys, bypassed) as indexed
+        self._dirty  = OrderedDict() # [tsname] -> None, testsuites to reindex 
+        self._pos    = {} # [tsname] -> position 
+        self._views  = {} # [(index name, countBypassed)] -> view, see `_query`
 
     def add(self, testsuite):
         super(TestSuites,self).add(testsuite,TestSuite)
+        testsuite._owner = self
+        self._pos[testsuite.name] = len(self._pos)
+        self.reindex(testsuite)
+
+    def reindex(self, testsuite): 
+        """Marks `testsuite` to be reindexed by the next query."""
+        self._dirty[testsuite.name] = None
+
+    def _update_indexes(self): 
+        for tsname in self._dirty: 
+            ts = self.objects[tsname]
+            new = (ts.index_keys(), ts.is_bypassed())
+            old = self._keys.get(tsname)
+            if new == old: continue 
+            self._views.clear()
+            if old is not None: 
+                for index, key in zip(self._index,old[0]): 
+                    if key is not None: self._unindex(index,key,tsname)
+                if not old[1]: 
+                    for index, key in zip(self._active,old[0]): 
+                        if key is not None: self._unindex(index,key,tsname)
+            for index, key in zip(self._index,new[0]): 
+                if key is not None: index.setdefault(key,[]).append(tsname)
+            if not new[1]: 
+                for index, key in zip(self._active,new[0]): 
+                    if key is not None: index.setdefault(key,[]).append(tsname)
+            self._keys[tsname] = new
+        self._dirty.clear()
+
+    def _unindex(self, index, key, tsname): 
+        index[key].remove(tsname)
+        if not index[key]: del index[key]
+
+    def _query(self, name, countBypassed=True): 
+        """Returns the index `name` (see TS_INDEXES) as a read-only [key] -> (tsnames)."""
+        if self._dirty: self._update_indexes()
+        view = self._views.get((name,countBypassed))
+        if view is None: 
+            i = TS_INDEXES.index(name)
+            index = self._index[i] if countBypassed else self._active[i]
+            view = MappingProxyType(OrderedDict((key,tuple(tsnames)) for key, tsnames in index.items()))
+            self._views[(name,countBypassed)] = view 
+        return view 
+
+    def count_unique(self, name, countBypassed=True): 
+        """Returns the number of keys of the index `name` (see TS_INDEXES)."""
+        if self._dirty: self._update_indexes()
+        i = TS_INDEXES.index(name)
+        return len(self._index[i] if countBypassed else self._active[i])
+
+    def __getstate__(self): 
+        state = dict(self.__dict__)
+        state["_views"] = {} # MappingProxyType cannot be pickled
+        return state
+
+    def update_bypassed(self,flow): 
+        """
+        Sets `group_bypass` of every testsuite from the bypass bitmap of 
+        the `Flow` (see `Flow.update_bypassed`). Called once by the read
+        method. 
+        """
+        for tsname, ts in self.objects.items(): 
+            group_bypass = flow.is_bypassed(tsname)
+            if group_bypass != ts.group_bypass: 
+                ts.group_bypass = group_bypass; ts._bypassed = None
+                self.reindex(ts)
 
 
     def get_unique_single_port_timings(self, ):
@@ -827,64 +1052,42 @@ class TestSuites(st7putils.Container):
         Returns a dictionary of all unique single port timing 
         setups referenced throughout the testflow. 
 
-        The keys are the unique timing setups and the values are lists 
+        The keys are the unique timing setups and the values are tuples 
         of testsuites using said timings.
         """
-        unique_timings = {} 
-        for tsname,ts in self.objects.items(): 
-             if ts.is_multiport_timing(): continue 
-             tm = ts.get_tim_settings() 
-             #print(ts.name,ls)
-             if tm in unique_timings: 
-                 unique_timings[tm].append(tsname)
-             else: 
-                 unique_timings[tm] = [tsname]
-        return unique_timings
+        return self._query("single_port_timings")
 
     def get_unique_multi_port_timings(self, ):
         """ 
         Returns a dictionary of all unique multi-port timing 
         setups referenced throughout the testflow. 
 
-        The keys are the unique timing setups and the values are lists 
+        The keys are the unique timing setups and the values are tuples 
         of testsuites using said timings.
         """
-        unique_timings = {} 
-        for tsname,ts in self.objects.items(): 
-             if not ts.is_multiport_timing(): continue 
-             tm = ts.get_tim_settings() 
-             #print(ts.name,ls)
-             if tm in unique_timings: 
-                 unique_timings[tm].append(tsname)
-             else: 
-                 unique_timings[tm] = [tsname]
-        return unique_timings
+        return self._query("multi_port_timings")
 
     def get_unique_lvls(self, countBypassed=True): 
         """ 
         Returns a dictionary of all unique level setups referenced
         throughout the testflow. 
 
-        The keys are the unique level setups and the values are lists 
+        The keys are the unique level setups and the values are tuples 
         of testsuites using said levels.
+
+        Parameters: 
+          countBypassed : bool, default = True
+            If true, bypassed testsuites will be accounted for. 
+            Otherwise, they will be ignored. 
         """
-        unique_lvls = {} 
-
-        for tsname,ts in self.objects.items(): 
-             ls = ts.get_lvl_settings() 
-             #print(ts.name,ls)
-             if ls in unique_lvls: 
-                 unique_lvls[ls].append(tsname)
-             else: 
-                 unique_lvls[ls] = [tsname]
-        return unique_lvls
+        return self._query("lvls",countBypassed=countBypassed)
          
     def get_unique_tms(self, tmMap): 
         """ 
         Returns a dictionary of all unique test methods referenced
         throughout the testflow. 
 
-        The keys are the unique testmethods and the values are lists 
+        The keys are the unique testmethods and the values are tuples 
         of testsuites using said label.
 
         Parameters: 
@@ -893,17 +1096,16 @@ class TestSuites(st7putils.Container):
             will be coming from the `st7p.testflow.Testflow` class.   
         """
         unique_tms = {} 
-        for tsname,ts in self.objects.items(): 
-            _tmNum = ts.get_tm_num()
-
-            #print("DEBUG",tsname,_tmNum)
-            if not _tmNum: continue 
+        merged = set() # Names of several tm-nums
+        for _tmNum, tsnames in self._query("tms").items(): 
             if _tmNum not in tmMap:
                 raise RuntimeError("Missing tm-num %s from internal map"%(_tmNum))
             if tmMap[_tmNum] in unique_tms: 
-                unique_tms[tmMap[_tmNum]].append(tsname)
+                unique_tms[tmMap[_tmNum]] += tsnames
+                merged.add(tmMap[_tmNum])
             else: 
-                unique_tms[tmMap[_tmNum]] = [tsname]
+                unique_tms[tmMap[_tmNum]] = tsnames
+        for name in merged: unique_tms[name] = tuple(sorted(unique_tms[name],key=self._pos.get))
         return unique_tms
       
 
@@ -912,7 +1114,7 @@ class TestSuites(st7putils.Container):
         Returns a dictionary of all unique labels referenced throughout 
         the testflow.  
 
-        The keys are the unique labels and the values are lists 
+        The keys are the unique labels and the values are tuples 
         of testsuites using said label. 
 
         Parameters: 
@@ -920,18 +1122,7 @@ class TestSuites(st7putils.Container):
             If true, bypassed testsuites will be accounted for. 
             Otherwise, they will be ignored. 
         """
-        #if self._uniqlbls: return self._uniqlbls
-        # ^^^ Because we allow parameters to change the search, we cant
-        # store the last search . 
-        uniqlbls = {} 
-        for tsname, ts in self.objects.items():
-            if "override_seqlbl" not in  ts.settings.keys(): continue 
-            if ts.is_bypassed()  and not countBypassed: continue  
-            # TODO: check if bypassed within the groups
-            lbl = ts.settings["override_seqlbl"].strip("\"")
-            if lbl in uniqlbls: uniqlbls[lbl].append(tsname)
-            else: uniqlbls[lbl] = [tsname] 
-        return uniqlbls
+        return self._query("labels",countBypassed=countBypassed)
 
 
 class Testflow(object): 
@@ -950,7 +1141,7 @@ class Testflow(object):
         self.config = ""
         self.vector = ""
         self.channel_attribute = ""
-        #self.flow = Flow() # TODO
+        self.flow   = None # NOTE: Set by the read method, see `build_flow`
 
     def get_test_method(self,ts): 
         if isinstance(ts,str): 
@@ -987,7 +1178,7 @@ class Testflow(object):
         Returns a dictionary of all unique level setups referenced throughout 
         the testflow.  
 
-        The keys are the unique level setups and the values are lists 
+        The keys are the unique level setups and the values are tuples 
         of testsuites using said level setups
 
         Parameters: 
@@ -1004,7 +1195,7 @@ class Testflow(object):
         Returns a dictionary of all unique labels referenced throughout 
         the testflow.  
 
-        The keys are the unique labels and the values are lists 
+        The keys are the unique labels and the values are tuples 
         of testsuites using said label. 
 
         Parameters: 
@@ -1064,15 +1255,15 @@ class Testflow(object):
         else:    print("[%s]: Source-path: %s"%(func, self._abs_path))
         print("[%s]: Number of testsuites: %s"%(func, self.tss.length()))
         print("[%s]: Number of unique labels: %s"%(
-                     func, self.get_unique_labels().__len__()))
+                     func, self.tss.count_unique("labels")))
         print("[%s]: Number of unique testmethods: %s"%(
                      func, self.get_unique_tms().__len__()))
         print("[%s]: Number of unique levels setups: %s"%(
-                     func, self.get_unique_lvls().__len__()))
+                     func, self.tss.count_unique("lvls")))
         print("[%s]: Number of unique single-port timing setups: %s"%(
-                     func, self.get_unique_single_port_timings().__len__()))
+                     func, self.tss.count_unique("single_port_timings")))
         print("[%s]: Number of unique multi-port timing setups: %s"%(
-                     func, self.get_unique_multi_port_timings().__len__()))
+                     func, self.tss.count_unique("multi_port_timings")))
         return 
    
 
@@ -1,49 +1,50 @@
 import os, sys, re, argparse
 from collections import OrderedDict
 import st7putils
+from st7p import expressions, memo, blocks, parallel, lazy
 
 # TODO: How to handle master timing files 
 
 # -----------------------------------------------------------------------------:
-RE_HP93000_TIMING    = re.compile("^hp93000,timing,\d\.\d$")
-RE_EQSP_WVT          = re.compile("^EQSP TIM,WVT")
-RE_EQSP_EQN          = re.compile("^EQSP TIM,EQN")
-RE_EQSP_SPS          = re.compile("^EQSP TIM,SPS")
+RE_HP93000_TIMING    = lazy.compile("^hp93000,timing,\d\.\d$")
+RE_EQSP_WVT          = lazy.compile("^EQSP TIM,WVT")
+RE_EQSP_EQN          = lazy.compile("^EQSP TIM,EQN")
+RE_EQSP_SPS          = lazy.compile("^EQSP TIM,SPS")
 
 # Wavetable
-RE_WAVETBL           = re.compile("^WAVETBL\s+(?P<wvtbl>[\"\w\s]+)")
-RE_DEFINES           = re.compile("^DEFINES\s+(?P<ports>[\w\s]+)")
-RE_PINS              = re.compile("^PINS\s+(?P<pins>[\w\s]+)")
-RE_PWI_PINSCALE      = re.compile("^(?P<pwi>[0-9abcdef]+)\s+\"(?P<edges>[\!\w\:\{\}\s\.]+)\"\s*(?P<dvc>[\w\.]*)")
-RE_PWI_EMPTY         = re.compile("^(?P<pwi>[0-9abcdef]+)\s+\"(?P<edges>\s*)\"\s*(?P<dvc>[\w\.]*)")
+RE_WAVETBL           = lazy.compile("^WAVETBL\s+(?P<wvtbl>[\"\w\s]+)")
+RE_DEFINES           = lazy.compile("^DEFINES\s+(?P<ports>[\w\s]+)")
+RE_PINS              = lazy.compile("^PINS\s+(?P<pins>[\w\s]+)")
+RE_PWI_PINSCALE      = lazy.compile("^(?P<pwi>[0-9abcdef]+)\s+\"(?P<edges>[\!\w\:\{\}\s\.]+)\"\s*(?P<dvc>[\w\.]*)")
+RE_PWI_EMPTY         = lazy.compile("^(?P<pwi>[0-9abcdef]+)\s+\"(?P<edges>\s*)\"\s*(?P<dvc>[\w\.]*)")
 
 
 
-RE_BRK               = re.compile("^brk\s+\"(?P<brk>[\w\s\:]*)\"")
+RE_BRK               = lazy.compile("^brk\s+\"(?P<brk>[\w\s\:]*)\"")
+RE_XMODE             = lazy.compile("\{[\w\s\:\!]+\}")
 #NOTE: Ignoring STATEMAP; RE_STATEMAP          = re.compile("^STATEMAP")
-RE_EQNSET            = re.compile("^EQNSET\s+(?P<num>\d+)\s*(?P<name>[\"\w\s]*)")
-RE_TIMINGSET         = re.compile("^TIMINGSET\s+(?P<num>\d+)\s*(?P<name>[\"\w\s]*)")
-RE_EDGEBLOCK_ENTRY   = re.compile("^(?P<edge>[dr]\d)\s*=\s*(?P<expr>[\w\s\.\(\)\/\*\+\-]+)")
+RE_EQNSET            = lazy.compile("^EQNSET\s+(?P<num>\d+)\s*(?P<name>[\"\w\s]*)")
+RE_TIMINGSET         = lazy.compile("^TIMINGSET\s+(?P<num>\d+)\s*(?P<name>[\"\w\s]*)")
+RE_EDGEBLOCK_ENTRY   = lazy.compile("^(?P<edge>[dr]\d)\s*=\s*(?P<expr>[\w\s\.\(\)\/\*\+\-]+)")
 # TODO: THis is probably only good for PinScale systems 
-RE_PERIOD            = re.compile("^period\s*=\s*(?P<period>[\w\s\.\(\)\,\/\*\+]+)")
-RE_FRACT             = re.compile("^fract\((?P<num>\w+)\s*,\s*(?P<den>\w+)\s*,\s*(?P<scale>\w+)\)")
-RE_SPECS             = re.compile("^SPECS")
-RE_SPEC_ENTRY        = re.compile("(?P<spec>\w+)\s*(?P<unit>\[[\w\s]*\])?")
-RE_SPECSET           = re.compile("^SPECSET\s+(?P<num>\d+)\s*(?P<name>[\w\s\"]*)")
-RE_SPECIFICATION     = re.compile("^SPECIFICATION\s+(?P<name>[\"\w\s]+)")
-RE_SPECIFICATION_WCB = re.compile("^SPECIFICATION\s+(?P<name>[\"\w\s]+)\s*{")
-RE_SPEC_VALUES       = re.compile("(?P<spec>\w+)\s+(?P<act>[\d\.\-\+]+)\s*(?P<min>[\d\.\-\+]*)\s*(?P<max>[\d\.\-\+]*)\s*(?P<unit>[\[\]\w\s]*)\s*#?(?P<comment>.*)")
-RE_SYNC              = re.compile("^SYNC")
-RE_SYNC_WCB          = re.compile("^SYNC\s+{")
-RE_PHASE             = re.compile("^PHASE")
-RE_SEQUENCE          = re.compile("^SEQUENCE\s+\"(?P<group>\w+)\"")
-RE_CLOCK             = re.compile("^CLOCK\s+\"(?P<clk>\w+)\"")
-RE_PORT              = re.compile("^PORT\s+(?P<name>\w+)")
-RE_EQUATIONS         = re.compile("^EQUATIONS")
-RE_EQUATION          = re.compile("^(?P<name>\w+)\s*=\s*(?P<expr>[\(\)\w\+\-\*\.\/\s]+)")
+RE_PERIOD            = lazy.compile("^period\s*=\s*(?P<period>[\w\s\.\(\)\,\/\*\+]+)")
+RE_SPECS             = lazy.compile("^SPECS")
+RE_SPEC_ENTRY        = lazy.compile("(?P<spec>\w+)\s*(?P<unit>\[[\w\s]*\])?")
+RE_SPECSET           = lazy.compile("^SPECSET\s+(?P<num>\d+)\s*(?P<name>[\w\s\"]*)")
+RE_SPECIFICATION     = lazy.compile("^SPECIFICATION\s+(?P<name>[\"\w\s]+)")
+RE_SPECIFICATION_WCB = lazy.compile("^SPECIFICATION\s+(?P<name>[\"\w\s]+)\s*{")
+RE_SPEC_VALUES       = lazy.compile("(?P<spec>\w+)\s+(?P<act>[\d\.\-\+]+)\s*(?P<min>[\d\.\-\+]*)\s*(?P<max>[\d\.\-\+]*)\s*(?P<unit>[\[\]\w\s]*)\s*#?(?P<comment>.*)")
+RE_SYNC              = lazy.compile("^SYNC")
+RE_SYNC_WCB          = lazy.compile("^SYNC\s+{")
+RE_PHASE             = lazy.compile("^PHASE")
+RE_SEQUENCE          = lazy.compile("^SEQUENCE\s+\"(?P<group>\w+)\"")
+RE_CLOCK             = lazy.compile("^CLOCK\s+\"(?P<clk>\w+)\"")
+RE_PORT              = lazy.compile("^PORT\s+(?P<name>\w+)")
+RE_EQUATIONS         = lazy.compile("^EQUATIONS")
+RE_EQUATION          = lazy.compile("^(?P<name>\w+)\s*=\s*(?P<expr>[\(\)\w\+\-\*\.\/\s]+)")
 # NON SUPPORTED KEYWORDS:
-RE_LOOP              = re.compile("^LOOP_[IODLE]+") # _I, _O, _I_IDLE, _O_IDLE
-RE_MODECONTEXT       = re.compile("^MODECONTEXT")
+RE_LOOP              = lazy.compile("^LOOP_[IODLE]+") # _I, _O, _I_IDLE, _O_IDLE
+RE_MODECONTEXT       = lazy.compile("^MODECONTEXT")
 # -----------------------------------------------------------------------------:
 
 def complete_specset(specset): 
@@ -148,11 +149,11 @@ class TimingMasterFile(object):
 
 # ============================================================================:
 # Timing MASTER FILE REGEX: 
-RE_TMF_HEADER     = re.compile("^hp93000,timing_master_file,0\.1")
-RE_TMF_TESTERFILE = re.compile("^testerfile\s*:\s*(?P<testerfile>[\w\.]+)") 
-RE_TMF_EQNSET     = re.compile("^EQNSET\s+(?P<num>\d+)\s*\:\s*(?P<sfp>[\w\/\.]+)")
-RE_TMF_MP_SPEC    = re.compile("^MULTIPORT_SPEC\s+(?P<mps>[\w\"\s]+)\s*:\s*(?P<sfp>[\w\/\.]+)")
-RE_TMF_WAVETABLE  = re.compile("^WAVETABLE\s+(?P<wvtbl>[\w\"\s]+)\s*:\s*(?P<sfp>[\w\/\.]+)")
+RE_TMF_HEADER     = lazy.compile("^hp93000,timing_master_file,0\.1")
+RE_TMF_TESTERFILE = lazy.compile("^testerfile\s*:\s*(?P<testerfile>[\w\.]+)") 
+RE_TMF_EQNSET     = lazy.compile("^EQNSET\s+(?P<num>\d+)\s*\:\s*(?P<sfp>[\w\/\.]+)")
+RE_TMF_MP_SPEC    = lazy.compile("^MULTIPORT_SPEC\s+(?P<mps>[\w\"\s]+)\s*:\s*(?P<sfp>[\w\/\.]+)")
+RE_TMF_WAVETABLE  = lazy.compile("^WAVETABLE\s+(?P<wvtbl>[\w\"\s]+)\s*:\s*(?P<sfp>[\w\/\.]+)")
 # ============================================================================:
 # NOTE: One way we could code this up is too load all the lines then start the 
 # pasring of the various blocks. 
@@ -210,8 +211,48 @@ def read_timing_master_file(sfp,debug=False):
     print("DEBUG: (%s): Num of WAVETABLEs: %s"%(func,tmf.wvtbls.__len__()))
     return tmf 
 # ============================================================================:
-def read_timing_file(sfp,debug=False):
+# Lines of these keywords are reported and skipped.
+TIMING_SKIPPED_KEYWORDS = ["DCDT","SPST","PCLK","CLKR","BWDS","ETDS","TSUX","SDSC"]
+# ^^^ TODO: May want to capture PCLK and CLKR
+
+def _split_key(line): 
+    """
+    Splits a stripped line into its first token and the remainder. The 
+    token ends at the first whitespace or '=' (e.g. 'd1=0' -> 'd1').
+    """
+    parts = line.split(None,1)
+    if len(parts) == 2: return parts[0].partition("=")[0], parts[1]
+    return parts[0].partition("=")[0], ""
+
+def _split_num(rest): 
+    """Splits '<num> <desc>' into (num, desc)."""
+    parts = rest.split(None,1)
+    if len(parts) == 2: return parts[0], parts[1].strip()
+    return parts[0], ""
+
+def _quoted(text): 
+    """Returns the text within the leading double quotes of `text`."""
+    return text[1:].partition('"')[0]
+
+def _strict_match(regex,ln,line): 
+    match = regex.search(line)
+    if not match: 
+        raise RuntimeError("Line does not adhere to strict form: [%d] %s"%(ln,line))
+    return match
+
+def read_timing_file(sfp,debug=False,strict=False):
     """ 
+    Reads a timing (equation, wavetable and/or specification) file. 
+
+    Each line is dispatched on its first token (see `_split_key`) straight
+    to the handler of the current EQSP section; fields are extracted with
+    plain string operations.
+
+    Parameters: 
+      strict : bool, default = False
+        If True, every dispatched line is additionally validated against 
+        its RE_* regular expression and the fields are taken from the 
+        match. Lines that do not match raise a RuntimeError.
 
     Unsupported Keywords (for now): 
       - LOOP         : (TODO: TDC entry)
@@ -234,25 +275,21 @@ def read_timing_file(sfp,debug=False):
             if not line: continue 
             if line.startswith("#"): continue 
             if debug: print("DEBUG: (%s) [%s] %s"%(func,ln,line))
-            ## Unsupported Syntax: 
-            match = RE_LOOP.search(line)
-            if match: raise RuntimeError("SmartLoop is currently not supported: [%d]: %s"%(ln,line))
-            match = RE_MODECONTEXT.search(line)
-            if match: raise RuntimeError("MODECONTEXT is currently not supported: [%d]: %s"%(ln,line))
-            if line.startswith("USE_PROTOCOL"): 
-                raise RuntimeError("USE_PROTOCOL is currently not supported: [%d]: %s"%(ln,line))
-
-
-
-            if line.startswith("NOOP"): 
+            key, rest = _split_key(line)
+            if key.startswith(("LOOP_","MODECONTEXT","USE_PROTOCOL","NOOP")): 
+                ## Unsupported Syntax: 
+                if key.startswith("LOOP_"): 
+                    raise RuntimeError("SmartLoop is currently not supported: [%d]: %s"%(ln,line))
+                if key.startswith("MODECONTEXT"): 
+                    raise RuntimeError("MODECONTEXT is currently not supported: [%d]: %s"%(ln,line))
+                if key.startswith("USE_PROTOCOL"): 
+                    raise RuntimeError("USE_PROTOCOL is currently not supported: [%d]: %s"%(ln,line))
                 if debug: print("DEBUG: (%s): Skipping instances of NOOP: [%d]: %s"%(func,ln,line))
                 continue 
             ## STATES SECTION
             if in_eqsp_wvt: 
                 if in_statemap: 
-                    if   line.startswith("PINS "):    in_statemap = False 
-                    elif line.startswith("WAVETBL "): in_statemap = False 
-                    elif line.startswith("EQSP "):    in_statemap = False 
+                    if   key in ["PINS","WAVETBL","EQSP"]: in_statemap = False 
                     else: 
                         print("TODO: process statemap line: [%s] %s"%(ln,line))
                         #sline = line.split()
@@ -260,41 +297,46 @@ def read_timing_file(sfp,debug=False):
                         #statechars = sline[1]
                         #xmode      = sline[2]
                         #selector   = " ".join(sline[3:])
-                        tmo.wvtbls[wvtbl].pwfbs[pwfb].statemap.append(line) 
+                        pwfb_obj.statemap.append(line) 
                         # ^^^ TODO: Simply store the line until we figure out
                         #     how we want to store it. 
                         continue 
-                if line.startswith("STATEMAP"):
+                if key == "STATEMAP":
                     in_statemap = True; continue  
-                    
-
-                match = RE_WAVETBL.search(line)
-                if match: wvtbl=match.group("wvtbl").strip();tmo.wvtbls.add(WAVETBL(wvtbl,sfp=sfp));continue
-                match = RE_DEFINES.search(line)
-                if match: tmo.wvtbls[wvtbl].ports = match.group("ports").split(); continue 
-                match = RE_PINS.search(line)
-                if match: 
-                    pwfb = match.group("pins"); pwfbID = tmo.wvtbls[wvtbl].pwfbs._get_next_id()
-                    tmo.wvtbls[wvtbl].pwfbs.add(PWFBlock(pwfb,pwfb.split(),pwfbID)); continue 
-
-                if line.startswith("HRPF"): 
-                    tmo.wvtbls[wvtbl].hrpf = True
+
+                if key == "WAVETBL" and rest: 
+                    if strict: rest = _strict_match(RE_WAVETBL,ln,line).group("wvtbl")
+                    wvtbl=rest.strip();wvtbl_obj=WAVETBL(wvtbl,sfp=sfp);tmo.wvtbls.add(wvtbl_obj);continue
+                if key == "DEFINES" and rest: 
+                    if strict: rest = _strict_match(RE_DEFINES,ln,line).group("ports")
+                    wvtbl_obj.ports = rest.split(); continue 
+                if key == "PINS" and rest: 
+                    if strict: rest = _strict_match(RE_PINS,ln,line).group("pins")
+                    pwfb = rest; pwfbID = wvtbl_obj.pwfbs._get_next_id()
+                    pwfb_obj = PWFBlock(pwfb,pwfb.split(),pwfbID)
+                    wvtbl_obj.pwfbs.add(pwfb_obj); continue 
+
+                if key == "HRPF": 
+                    wvtbl_obj.hrpf = True
                     line = line[5:].strip()
+                    key, rest = _split_key(line)
                     # continue processeing because the waveform needs to be processed.
-                match = RE_PWI_EMPTY.search(line)
-                if match: 
-                    pwi, edges, dvc = match.groups()
-                    edges = PWIS.process_edges(edges,classtype="pinscale",debug=debug) # TODO: How do you know its PinScale?
-                    tmo.wvtbls[wvtbl].pwfbs[pwfb].pwis.add(PWI(pwi,edges,dvc)); continue 
-
-                match = RE_PWI_PINSCALE.search(line)
-                if match: 
-                    pwi, edges, dvc = match.groups()
+                # Waveform: <pwi> "<edges>" [<dvc>], pwi being hexadecimal
+                if rest.startswith('"') and not key.strip("0123456789abcdef"): 
+                    if strict: 
+                        match = RE_PWI_EMPTY.search(line) or _strict_match(RE_PWI_PINSCALE,ln,line)
+                        pwi, edges, dvc = match.groups()
+                    else: 
+                        pwi = key
+                        edges, _, dvc = rest[1:].partition('"')
+                        dvc = dvc.partition("#")[0].split()
+                        dvc = dvc[0] if dvc else ""
                     edges = PWIS.process_edges(edges,classtype="pinscale",debug=debug) # TODO: How do you know its PinScale?
-                    tmo.wvtbls[wvtbl].pwfbs[pwfb].pwis.add(PWI(pwi,edges,dvc)); continue 
-                match = RE_BRK.search(line)
-                if match: 
-                    tmo.wvtbls[wvtbl].pwfbs[pwfb].brk = PWIS.process_edges(match.group('brk'),classtype="pinscale",debug=debug) # TODO: How do you know its PinScale
+                    pwfb_obj.pwis.add(PWI(pwi,edges,dvc)); continue 
+                if key == "brk" and rest.startswith('"'): 
+                    brk = _quoted(rest)
+                    if strict: brk = _strict_match(RE_BRK,ln,line).group("brk")
+                    pwfb_obj.brk = PWIS.process_edges(brk,classtype="pinscale",debug=debug) # TODO: How do you know its PinScale
                     continue  
                 # TODO: RE_PWI_SMARTSCALE
                 # TODO: TTMODE
@@ -303,43 +345,55 @@ def read_timing_file(sfp,debug=False):
 
             if in_eqsp_eqn: 
                 #if debug: print("DEBUG: (%s): In EQSP EQN")
-                match = RE_EQNSET.search(line)
-                if match: 
-                    eqnset,desc = [x.strip() for x in match.groups()] # NOTE: Required for spaces w/n double quotes
-                    tmo.eqnsets.add(EQNSET(eqnset,desc,sfp=sfp)); 
+                if key == "EQNSET" and rest: 
+                    if strict: eqnset,desc = [x.strip() for x in _strict_match(RE_EQNSET,ln,line).groups()]
+                    else:      eqnset,desc = _split_num(rest)
+                    eqnset_obj = EQNSET(eqnset,desc,sfp=sfp); tmo.eqnsets.add(eqnset_obj)
                     continue 
-                match = RE_TIMINGSET.search(line)
-                if match: 
-                    timset,desc = [x.strip() for x in match.groups()] # NOTE: Required for spaces w/n double quotes
-                    tmo.eqnsets[eqnset].timingsets.add(TIMINGSET(timset,desc)); 
+                if key == "TIMINGSET" and rest: 
+                    if strict: timset,desc = [x.strip() for x in _strict_match(RE_TIMINGSET,ln,line).groups()]
+                    else:      timset,desc = _split_num(rest)
+                    timset_obj = TIMINGSET(timset,desc); eqnset_obj.timingsets.add(timset_obj)
                     continue 
 
-                match = RE_DEFINES.search(line)
-                if match: tmo.eqnsets[eqnset].ports = match.group("ports").split(); continue 
-                match = RE_PINS.search(line)
-                if match: 
-                    edgeb = match.group("pins"); edgebID = tmo.eqnsets[eqnset].timingsets[timset].edgeblocks._get_next_id()
-                    tmo.eqnsets[eqnset].timingsets[timset].edgeblocks.add(EdgeBlock(edgeb,edgeb.split(),edgebID)); continue 
-                match = RE_PERIOD.search(line)
-                if match: tmo.eqnsets[eqnset].timingsets[timset].period = match.group("period");continue 
-                match = RE_EDGEBLOCK_ENTRY.search(line)
-                if match: 
-                    edge, expr = match.groups()
-                    tmo.eqnsets[eqnset].timingsets[timset].edgeblocks[edgeb].update(edge,expr); continue 
-                match = RE_EQUATIONS.search(line) 
-                if match: continue 
-                match = RE_SPECS.search(line) 
-                if match: continue 
-                match = RE_EQUATION.search(line)
-                if match: var,expr=match.groups();tmo.eqnsets[eqnset].equations[var]=expr;continue 
-                match = RE_SPEC_ENTRY.search(line) 
-                if match: 
-                    spec,unit=match.groups();
-                    if not unit: unit = ""
-                    else: unit = unit.strip() 
-                    if st7putils.is_valid_spec_name(spec) and spec != 'EQSP': 
-                        tmo.eqnsets[eqnset].add_spec(spec,unit.strip("[] \t")); continue 
-                    else: pass 
+                if key == "DEFINES" and rest: 
+                    if strict: rest = _strict_match(RE_DEFINES,ln,line).group("ports")
+                    eqnset_obj.ports = rest.split(); continue 
+                if key == "PINS" and rest: 
+                    if strict: rest = _strict_match(RE_PINS,ln,line).group("pins")
+                    edgeb = rest; edgebID = timset_obj.edgeblocks._get_next_id()
+                    edgeb_obj = EdgeBlock(edgeb,edgeb.split(),edgebID)
+                    timset_obj.edgeblocks.add(edgeb_obj); continue 
+                if key == "period" and "=" in line: 
+                    if strict: period = _strict_match(RE_PERIOD,ln,line).group("period")
+                    else:      period = line.partition("=")[2].partition("#")[0].strip()
+                    timset_obj.period = period;continue 
+                if len(key) == 2 and key[0] in "dr" and key[1].isdigit() and "=" in line: 
+                    if strict: edge, expr = _strict_match(RE_EDGEBLOCK_ENTRY,ln,line).groups()
+                    else:      edge, expr = key, line.partition("=")[2].partition("#")[0].strip()
+                    edgeb_obj.update(edge,expr); continue 
+                if key == "EQUATIONS": continue 
+                if key == "SPECS": continue 
+                if "=" in line: 
+                    var, _, expr = line.partition("=")
+                    var = var.strip()
+                    if var.isidentifier(): 
+                        if strict: var,expr = _strict_match(RE_EQUATION,ln,line).groups()
+                        else:      expr = expr.partition("#")[0].strip()
+                        eqnset_obj.equations[var]=expr;continue 
+                # Spec declaration: <spec> [<unit>]
+                if strict: 
+                    match = RE_SPEC_ENTRY.search(line)
+                    spec,unit = match.groups() if match else ("",None)
+                else: 
+                    spec = key.partition("[")[0]
+                    unit = line[len(spec):].lstrip()
+                    if not unit.startswith("["): unit = ""
+                if not unit: unit = ""
+                else: unit = unit.strip() 
+                if st7putils.is_valid_spec_name(spec) and spec != 'EQSP': 
+                    eqnset_obj.add_spec(spec,unit.strip("[] \t")); continue 
+                else: pass 
             if in_eqsp_sps:
                 if in_specification: 
                     # Maintain cbs count
@@ -357,30 +411,32 @@ def read_timing_file(sfp,debug=False):
                             in_specification = False
                         continue 
                     # Catching elements  
-                    if line.startswith("CHECK"): 
+                    if key == "CHECK": 
                         if    spf_queue['portsets'].__len__() == 0: spf_queue['check'] = line.split()[1].strip() 
                         else: spf_queue['portsets'][-1]['check'] = line.split()[1].strip()
                         continue 
-                    match = RE_EQNSET.search(line)
-                    if match: 
-                        eqnset,desc=match.groups()
+                    if key == "EQNSET" and rest: 
+                        if strict: eqnset,desc=_strict_match(RE_EQNSET,ln,line).groups()
+                        else:      eqnset,desc=_split_num(rest)
                         spf_queue['portsets'].append({'eqnset':eqnset,'wvtbl':'','port':'','sequence':'','phase':False,'specs':OrderedDict()})
                         continue 
-                    match = RE_WAVETBL.search(line)
-                    if match: spf_queue['portsets'][-1]['wvtbl']=match.group('wvtbl').strip();continue
-                    match = RE_PORT.search(line)
-                    if match: spf_queue['portsets'][-1]['port']=match.group('name').strip();continue
-                    match = RE_SYNC_WCB.search(line)
-                    if match: cbs+=1; continue 
-                    match = RE_SYNC.search(line)
-                    if match: continue 
-                    match = RE_PHASE.search(line)
-                    if match: spf_queue['portsets'][-1]['phase']=True;continue
-                    match = RE_SEQUENCE.search(line)
-                    if match: spf_queue['portsets'][-1]['sequence']=match.group('group').strip();continue
-
-                    match = RE_CLOCK.search(line)
-                    if match: spf_queue['portsets'][-1]['clock']=match.group('clk').strip();continue
+                    if key == "WAVETBL" and rest: 
+                        if strict: rest = _strict_match(RE_WAVETBL,ln,line).group('wvtbl')
+                        spf_queue['portsets'][-1]['wvtbl']=rest.strip();continue
+                    if key == "PORT" and rest: 
+                        if strict: rest = _strict_match(RE_PORT,ln,line).group('name')
+                        spf_queue['portsets'][-1]['port']=rest.split()[0];continue
+                    if key == "SYNC": 
+                        if rest.startswith("{"): cbs+=1
+                        continue 
+                    if key == "PHASE": spf_queue['portsets'][-1]['phase']=True;continue
+                    if key == "SEQUENCE" and rest.startswith('"'): 
+                        if strict: rest = '"%s"'%(_strict_match(RE_SEQUENCE,ln,line).group('group'))
+                        spf_queue['portsets'][-1]['sequence']=_quoted(rest).strip();continue
+
+                    if key == "CLOCK" and rest.startswith('"'): 
+                        if strict: rest = '"%s"'%(_strict_match(RE_CLOCK,ln,line).group('clk'))
+                        spf_queue['portsets'][-1]['clock']=_quoted(rest).strip();continue
 
                     match = RE_SPEC_VALUES.search(line)
                     if match: 
@@ -391,53 +447,47 @@ def read_timing_file(sfp,debug=False):
                     raise RuntimeError("in_specification: Not sure what to do with line: [%d]: %s"%(ln,line))
                 else: # not in_specifcation 
                     #if debug: print("DEBUG: (%s): in single port specset section...")
-                    match = RE_EQNSET.search(line)
-                    if match: eqnset, _ = match.groups(); continue 
-                    match = RE_WAVETBL.search(line)
-                    if match: wvtbl=match.group("wvtbl").strip(); continue
-                    if line.startswith("CHECK"): check = line.split()[1]; continue 
-                    match = RE_SPECSET.search(line)
-                    if match: specset,desc = match.groups(); tmo.specsets.add(SPECSET(eqnset=eqnset,num=specset,desc=desc,wvtbl=wvtbl,check=check,sfp=sfp)); continue 
-                    match = RE_SPEC_VALUES.search(line)    
-                    if match: 
-                        sn,sa,smn,smx,su,sc = match.groups();
-                        if st7putils.is_valid_spec_name(sn): 
-                            tmo.specsets.__last__().specs.add(SPEC(name=sn,actual=sa.strip(),minimum=smn.strip(),maximum=smx.strip(),unit=su.strip("[] "),comment=sc.strip()));continue
-                    if line.startswith("SPECIFICATION"): pass # TODO: NO NEED
+                    if key == "EQNSET" and rest: 
+                        if strict: eqnset, _ = _strict_match(RE_EQNSET,ln,line).groups()
+                        else:      eqnset, _ = _split_num(rest)
+                        continue 
+                    if key == "WAVETBL" and rest: 
+                        if strict: rest = _strict_match(RE_WAVETBL,ln,line).group("wvtbl")
+                        wvtbl=rest.strip(); continue
+                    if key == "CHECK": check = line.split()[1]; continue 
+                    if key == "SPECSET" and rest: 
+                        if strict: specset,desc = _strict_match(RE_SPECSET,ln,line).groups()
+                        else:      specset,desc = _split_num(rest)
+                        tmo.specsets.add(SPECSET(eqnset=eqnset,num=specset,desc=desc,wvtbl=wvtbl,check=check,sfp=sfp)); continue 
+                    if key != "SPECIFICATION": 
+                        match = RE_SPEC_VALUES.search(line)    
+                        if match: 
+                            sn,sa,smn,smx,su,sc = match.groups();
+                            if st7putils.is_valid_spec_name(sn): 
+                                tmo.specsets.__last__().specs.add(SPEC(name=sn,actual=sa.strip(),minimum=smn.strip(),maximum=smx.strip(),unit=su.strip("[] "),comment=sc.strip()));continue
             ## FREELANCE : ---------------------------------------------------:
-            match = RE_EQSP_WVT.search(line)
-            if match: clear_eqsp(ln,line); in_eqsp_wvt=True; in_eqsp_eqn=False; in_eqsp_sps=False;continue 
-            match = RE_EQSP_EQN.search(line)
-            if match: clear_eqsp(ln,line); in_eqsp_wvt=False; in_eqsp_eqn=True; in_eqsp_sps=False;continue 
-            match = RE_EQSP_SPS.search(line)
-            if match: clear_eqsp(ln,line); in_eqsp_wvt=False; in_eqsp_eqn=False; in_eqsp_sps=True;continue 
-            match = RE_SPECIFICATION.search(line)
-            if match: 
-                spfn=match.group("name"); 
+            if key == "EQSP": 
+                clear_eqsp(ln,line)
+                in_eqsp_wvt = line.startswith("EQSP TIM,WVT")
+                in_eqsp_eqn = line.startswith("EQSP TIM,EQN")
+                in_eqsp_sps = line.startswith("EQSP TIM,SPS")
+                if in_eqsp_wvt or in_eqsp_eqn or in_eqsp_sps: continue 
+            if key == "SPECIFICATION" and rest: 
+                if strict: spfn = _strict_match(RE_SPECIFICATION,ln,line).group("name")
+                else:      spfn = rest.partition("{")[0]
                 spf_queue = {};
                 spf_queue['name']     = spfn.strip()
                 spf_queue['check']    = 'all'
                 spf_queue['specs']    = OrderedDict() # global variables
                 spf_queue['portsets'] = [] #  {'eqnset':'','wvtbl':'','sequence':'','phase':False} 
                 in_specification=True;
-                if RE_SPECIFICATION_WCB.search(line): cbs = 1; 
+                if "{" in rest: cbs = 1; 
                 else: cbs = 0
                 continue 
 
             if line.startswith("hp93000,timing,0.1"): continue
             if line.startswith("@"): continue 
-            if line.startswith("DCDT "): print("TODO: Not processing DCDT lines: [%d] %s"%(ln,line));continue 
-            if line.startswith("SPST "): print("TODO: Not processing SPST lines: [%d] %s"%(ln,line));continue 
-            if line.startswith("PCLK "): print("TODO: Not processing PCLK lines: [%d] %s"%(ln,line));continue 
-            # ^^^ TODO: May want to capture this 
-            if line.startswith("CLKR "): print("TODO: Not processing CLKR lines: [%d] %s"%(ln,line));continue 
-            # ^^^ TODO: May want to capture this 
-            if line.startswith("BWDS "): print("TODO: Not processing BWDS lines: [%d] %s"%(ln,line));continue 
-            if line.startswith("ETDS "): print("TODO: Not processing ETDS lines: [%d] %s"%(ln,line));continue 
-            if line.startswith("TSUX "): print("TODO: Not processing TSUX lines: [%d] %s"%(ln,line));continue 
-            if line.startswith("SDSC "): print("TODO: Not processing SDSC lines: [%d] %s"%(ln,line));continue 
-
-
+            if key in TIMING_SKIPPED_KEYWORDS: print("TODO: Not processing %s lines: [%d] %s"%(key,ln,line));continue 
 
             raise RuntimeError("Unaccounted for line: [%d] %s"%(ln,line))
     return tmo
@@ -453,7 +503,55 @@ def read_timing_file(sfp,debug=False):
 # Regardless of the type of timing file, we always return a Timing object. 
 # the way this will be okay is that al lthe top-level blocks will contain 
 # sfp pointers to track original locations. 
-def read(sfp,debug=False):  
+def _resolve_master_path(dir_path,kind,name,path): 
+    """
+    Resolves the `path` of a timing master file entry: leading '../' are
+    relative to the master file directory `dir_path`, other paths are 
+    used as-is. Raises if the file does not exist.
+    """
+    relative_count = path.count("../")
+    if relative_count >= 1: 
+        if not path.startswith("../"*relative_count): 
+            raise RuntimeError("Expecting %d '../' at the start: %s"%(relative_count,path))
+        act_sfp = os.path.join("/".join(dir_path.split("/")[:-relative_count]),path[3*relative_count:])
+        if not os.path.isfile(act_sfp): 
+            raise RuntimeError("Bad/No file: %s"%(act_sfp)) 
+        return act_sfp
+    if not os.path.isfile(path): 
+        raise RuntimeError("Bad/No file: %s %s : %s"%(kind,name,path))
+    return path
+
+def _read_timing_file_task(task): 
+    """Process pool worker of `read_timing_files`. task = (sfp, debug, strict)"""
+    sfp, debug, strict = task
+    return read_timing_file(sfp,debug=debug,strict=strict)
+
+def read_timing_files(sfps,debug=False,strict=False,workers=None): 
+    """
+    Parses the timing files `sfps` with `read_timing_file`, concurrently 
+    in a process pool. 
+
+    Parameters: 
+      workers : int, default = None 
+        Number of processes. None uses os.cpu_count(); 1 parses within 
+        the current process. 
+
+    Returns: 
+      OrderedDict : [sfp] -> Timing 
+    """
+    tasks = [(sfp,debug,strict) for sfp in sfps]
+    return OrderedDict(zip(sfps,parallel.parallel_map(_read_timing_file_task,tasks,workers)))
+
+def read(sfp,debug=False,strict=False,workers=None):  
+    """
+    Reads a timing file or a timing master file. The files referenced by
+    a master file are parsed concurrently, see `read_timing_files`.
+
+    Parameters: 
+      workers : int, default = None 
+        Number of processes used for the files of a master file. None 
+        uses os.cpu_count(); 1 parses within the current process. 
+    """
     func = "st7p.timing.read"
     print("DEBUG: (%s): Recieved: %s"%(func,sfp))
     if not os.path.isfile(sfp): 
@@ -477,30 +575,32 @@ def read(sfp,debug=False):
             break
     # -----------------------------------------------------------------------: 
     if not timing_master_file: 
-        return read_timing_file(sfp=sfp,debug=debug)#Timing(sfp=sfp,debug=debug)
+        return read_timing_file(sfp=sfp,debug=debug,strict=strict)#Timing(sfp=sfp,debug=debug)
     if timing_master_file: 
         tmf = read_timing_master_file(sfp = sfp,debug=debug)
         tmo = Timing()
         # --------------------------------------------------------------------:
-        # EQNSET: Parse each file within the tmf
+        # Resolve the files of every EQNSET, WAVETABLE and MULTIPORT_SPEC. 
+        # Each file is parsed once, even if referenced by several entries. 
+        eqnset_sfps  = OrderedDict() # [eqnset] -> file
+        wvtbl_sfps   = OrderedDict() # [wvtbl] -> file
+        mp_spec_sfps = OrderedDict() # [mp_spec] -> file
         for eqnset, eqnset_dict in tmf.eqnsets.items(): 
-            eqnset_sfp = eqnset_dict["path"]
-            act_eqnset_sfp = "" 
-            # Resolve the eqnset path: 
-            relative_count = eqnset_sfp.count("../")
-            if relative_count >= 1: 
-                if not eqnset_sfp.startswith("../"*relative_count): 
-                    raise RuntimeError("Expecting %d '../' at the start: %s"%(relative_count,eqnset_sfp))
-                act_eqnset_sfp = os.path.join("/".join(dir_path.split("/")[:-relative_count]),eqnset_sfp[3*relative_count:])
-                if not os.path.isfile(act_eqnset_sfp): 
-                    raise RuntimeError("Bad/No file: %s"%(act_eqnset_sfp)) 
-            else: 
-                if not os.path.isfile(eqnset_dict['path']): 
-                    raise RuntimeError("Bad/No file: EQNSET %s : %s"%(eqnset,eqnset_sfp))
-                act_eqnset_sfp = eqnset_sfp
-            print("DEBUG: (%s): Searching: EQNSET %s : %s"%(func,eqnset,act_eqnset_sfp))
-            # Parsing timng file: 
-            _tmo = read_timing_file(act_eqnset_sfp,debug=debug) 
+            eqnset_sfps[eqnset] = _resolve_master_path(dir_path,"EQNSET",eqnset,eqnset_dict["path"])
+            print("DEBUG: (%s): Searching: EQNSET %s : %s"%(func,eqnset,eqnset_sfps[eqnset]))
+        for wvtbl, wvtbl_dict in tmf.wvtbls.items(): 
+            wvtbl_sfps[wvtbl] = _resolve_master_path(dir_path,"WAVETABLE",wvtbl,wvtbl_dict["path"])
+            print("DEBUG: (%s): Searching: WAVETABLE %s : %s"%(func,wvtbl,wvtbl_sfps[wvtbl]))
+        for mp_spec, mp_spec_dict in tmf.mp_specs.items(): 
+            mp_spec_sfps[mp_spec] = _resolve_master_path(dir_path,"MULTIPORT_SPEC",mp_spec,mp_spec_dict["path"])
+            print("DEBUG: (%s): Searching: SPECIFICAITON %s : %s"%(func,mp_spec,mp_spec_sfps[mp_spec]))
+        sfps = list(OrderedDict.fromkeys(list(eqnset_sfps.values()) + list(wvtbl_sfps.values()) + list(mp_spec_sfps.values())))
+        if debug: print("DEBUG: (%s): Parsing %s files (%s references)"%(func,len(sfps),len(eqnset_sfps) + len(wvtbl_sfps) + len(mp_spec_sfps)))
+        parsed = read_timing_files(sfps,debug=debug,strict=strict,workers=workers)
+        # --------------------------------------------------------------------:
+        # EQNSET: 
+        for eqnset, act_eqnset_sfp in eqnset_sfps.items(): 
+            _tmo = parsed[act_eqnset_sfp]
             tmo.eqnsets.add(_tmo.eqnsets[eqnset])
             #print("TODO: Not sure how to handle SPECSET here. Revisit when necessary (if referenced from TestSuite)")
 
@@ -511,51 +611,14 @@ def read(sfp,debug=False):
                 print("WARNING: Found extra SPECSETS in Levels-master-files processing of: %s"%(act_eqnset_sfp))
                 print("WARNING:   - Extra SPECSET: %s"%(specset.name))
 
-        # --------------------------------------------------------------------:
         # --------------------------------------------------------------------:
         # WAVETBLS: 
-        for wvtbl, wvtbl_dict in tmf.wvtbls.items(): 
-            wvtbl_sfp = wvtbl_dict["path"]
-            act_wvtbl_sfp = "" 
-            # Resolve the wvtbl path: 
-            relative_count = wvtbl_sfp.count("../")
-            if relative_count >= 1: 
-                if not wvtbl_sfp.startswith("../"*relative_count): 
-                    raise RuntimeError("Expecting %d '../' at the start: %s"%(relative_count,wvtbl_sfp))
-                act_wvtbl_sfp = os.path.join("/".join(dir_path.split("/")[:-relative_count]),wvtbl_sfp[3*relative_count:])
-                if not os.path.isfile(act_wvtbl_sfp): 
-                    raise RuntimeError("Bad/No file: %s"%(act_wvtbl_sfp)) 
-            else: 
-                if not os.path.isfile(wvtbl_dict['path']): 
-                    raise RuntimeError("Bad/No file: WAVETABLE %s : %s"%(wvtbl,wvtbl_sfp))
-                act_wvtbl_sfp = wvtbl_sfp
-            print("DEBUG: (%s): Searching: EQNSET %s : %s"%(func,wvtbl,act_wvtbl_sfp))
-
-            # Parsing timng file: 
-            _tmo = read_timing_file(act_wvtbl_sfp,debug=debug) 
-            tmo.wvtbls.add(_tmo.wvtbls[wvtbl])
+        for wvtbl, act_wvtbl_sfp in wvtbl_sfps.items(): 
+            tmo.wvtbls.add(parsed[act_wvtbl_sfp].wvtbls[wvtbl])
         # --------------------------------------------------------------------:
         # SPECICATIONS
-        for mp_spec, mp_spec_dict in tmf.mp_specs.items(): 
-            mp_spec_sfp = mp_spec_dict["path"]
-            act_mp_spec_sfp = "" 
-            # Resolve the mp_spec path: 
-            relative_count = mp_spec_sfp.count("../")
-            if relative_count >= 1: 
-                if not mp_spec_sfp.startswith("../"*relative_count): 
-                    raise RuntimeError("Expecting %d '../' at the start: %s"%(relative_count,mp_spec_sfp))
-                act_mp_spec_sfp = os.path.join("/".join(dir_path.split("/")[:-relative_count]),mp_spec_sfp[3*relative_count:])
-                if not os.path.isfile(act_mp_spec_sfp): 
-                    raise RuntimeError("Bad/No file: %s"%(act_mp_spec_sfp)) 
-            else: 
-                if not os.path.isfile(mp_spec_dict['path']): 
-                    raise RuntimeError("Bad/No file: MULTIPORT_SPEC %s : %s"%(mp_spec,mp_spec_sfp))
-                act_mp_spec_sfp = mp_spec_sfp
-            print("DEBUG: (%s): Searching: SPECIFICAITON %s : %s"%(func,mp_spec,act_mp_spec_sfp))
-
-            # Parsing timng file: 
-            _tmo = read_timing_file(act_mp_spec_sfp,debug=debug) 
-            tmo.specifications.add(_tmo.specifications[mp_spec])
+        for mp_spec, act_mp_spec_sfp in mp_spec_sfps.items(): 
+            tmo.specifications.add(parsed[act_mp_spec_sfp].specifications[mp_spec])
             # TODO: Missing double quotes! really
 
 
@@ -664,8 +727,19 @@ def is_action_diff(edge, act1,act2):
      else: raise RuntimeError("Edge type %s not supported."%(edge))
 
 
+# ----------------------------------------------------------------------------:
+# Results of eval_specification/eval_specset are memoized per Timing object 
+# and version; any change to the Timing object invalidates its results (see 
+# memo.py). Results are read-only, memo.copy_result returns a mutable copy. 
+EVAL_MEMO = memo.LRUMemo(maxsize=1024)
+
 def eval_specification(tmo,specification,timingsets,debug=False ):
     func = "eval_specification"
+    memo_key = ("specification",specification,tuple(str(ts) for ts in timingsets))
+    ports = EVAL_MEMO.get(tmo,memo_key)
+    if ports is not None: 
+        if debug: print("DEBUG: (%s): Memoized: %s"%(func,specification))
+        return ports 
 
     # Type checking: ---------------------------------------------------------:
     if specification not in tmo.specifications.names(): 
@@ -743,7 +817,7 @@ def eval_specification(tmo,specification,timingsets,debug=False ):
         for var, expr in tmo.eqnsets[portset.eqnset].equations.items(): 
             #print("  eqn-eqvr: %s = %s"%(var,expr))
             if expr in port_eqnset_specs: port_eqnset_specs[var] = port_eqnset_specs[expr]; continue 
-            port_eqnset_specs[var] = st7putils.compute(expr,port_eqnset_specs)
+            port_eqnset_specs[var] = expressions.evaluate(expr,port_eqnset_specs)
             #val = compute(expr, )
         if debug:  
             print("\n:" + str("-")*78 + ":")
@@ -760,23 +834,11 @@ def eval_specification(tmo,specification,timingsets,debug=False ):
         timset = tmo.eqnsets[portset.eqnset].timingsets[timingsets[i]]
         #print("period = %s"%(timset.period)) 
         if timset.period in port_eqnset_specs: things['period']  = port_eqnset_specs[timset.period] 
-        elif re.search("fract\(",timset.period): 
-          match = RE_FRACT.search(timset.period)
-          if not match: raise RuntimeError("Fract statement doesn't fit regex: %s"(timset.period))
-          numerator, denominator, scale = match.groups() 
-          period_expr = "(%s/%s)*(%s)"%(numerator,denominator,scale)
-          #print("DEBUG: (%s): Reconstructed fract period statement: %s"%(func,period_expr))
-          if debug: print("DEBUG: (%s): COMPUTE period expr : %s"%(func,period_expr))  
-          things['period'] = st7putils.compute(period_expr,port_eqnset_specs)  
-          if debug: print("DEBUG: (%s): COMPLETE period expr: %s == %s"%(func, period_expr, things["period"]))  
         else : 
-
-            if debug: print("DEBUG: (%s): COMPUTE period expr : %s"%(func,period_expr))  
-            result =  st7putils.compute(timset.period, port_eqnset_specs) #interpreter.interpret(total_vars) 
-            #print("period = %s = %s"%(timset.period,result))
-            things['period'] = result
-            if debug: print("DEBUG: (%s): COMPLETE period expr: %s == %s"%(func, period_expr, things["period"]))  
-        # TIMINGSET fract
+            # NOTE: fract(...) is handled by the expression engine. 
+            if debug: print("DEBUG: (%s): COMPUTE period expr : %s"%(func,timset.period))  
+            things['period'] = expressions.evaluate(timset.period,port_eqnset_specs)
+            if debug: print("DEBUG: (%s): COMPLETE period expr: %s == %s"%(func, timset.period, things["period"]))  
         for eb in timset.edgeblocks:
             for edge,expr in eb.edges.items(): 
                 if debug: print("DEBUG: (%s): Pin = %s, Edge = %s, Expr = %s"%(func,eb.pins, edge,expr))
@@ -787,7 +849,7 @@ def eval_specification(tmo,specification,timingsets,debug=False ):
                     else:
                          
                         if debug: print("DEBUG: (%s): COMPUTE expr : %s"%(func,expr))  
-                        things[pin][edge] = st7putils.compute(expr,port_eqnset_specs)
+                        things[pin][edge] = expressions.evaluate(expr,port_eqnset_specs)
                         if debug: print("DEBUG: (%s): COMPLETE expr: %s == %s"%(func, expr, things[pin][edge]))  
         #print("\n:" + str("-")*78 + ":")
         #print("Port edges for %s: "%(portset.name))
@@ -807,7 +869,7 @@ def eval_specification(tmo,specification,timingsets,debug=False ):
     #        for edge,action in edges.items():
     #            print("   %s , %s"%(edge,action))
 
-    return ports 
+    return EVAL_MEMO.put(tmo,memo_key,ports)
 
 # Evaluation of single-port timing specset
 # TODO: I am not entirely sure what the return structures should be.
@@ -828,8 +890,14 @@ def eval_specset(tmo, specset,timingset,debug=False):
 
       pinedges: OrderDict of period and pin-edge-delays settings
 
+    Results are memoized in EVAL_MEMO, see memo.py.
     """
     func = "eval_specset"
+    memo_key = ("specset",str(specset),str(timingset))
+    result = EVAL_MEMO.get(tmo,memo_key)
+    if result is not None: 
+        if debug: print("DEBUG: (%s): Memoized: specset %s, timingset %s"%(func,specset,timingset))
+        return result
     if str(specset) not in tmo.specsets.names(): 
         raise RuntimeError("SPECSET '%s' is not contained within Timing object."%(specset))
     eqnset = tmo.specsets[specset].eqnset
@@ -847,7 +915,7 @@ def eval_specset(tmo, specset,timingset,debug=False):
         #result = interpreter.interpret(total_vars) 
         if debug: print("DEBUG: (%s): compute var:%s, expr:%s"%(func,var,expr))
         if expr in total_vars: total_vars[var] = total_vars[expr]
-        else: total_vars[var] = st7putils.compute(expr,total_vars)
+        else: total_vars[var] = expressions.evaluate(expr,total_vars)
         #print('  - ', var, result)
 
     # NOTE: This dictionary is to be returned. Note, as is, it doesnt 
@@ -874,16 +942,8 @@ def eval_specset(tmo, specset,timingset,debug=False):
     timset = tmo.eqnsets[eqnset].timingsets[timingset]
     #print("period = %s"%(timset.period)) 
     if timset.period in total_vars: pinedges['period'] = total_vars[timset.period] 
-    elif re.search("fract\(",timset.period): 
-          match = RE_FRACT.search(timset.period)
-          if not match: raise RuntimeError("Fract statement doesn't fit regex: %s"(timset.period))
-          numerator, denominator, scale = match.groups() 
-          period_expr = "(%s/%s)*(%s)"%(numerator,denominator,scale)
-          if debug: print("DEBUG: (%s): Reconstructed fract period statement: %s"%(func,period_expr))
-          pinedges['period'] = st7putils.compute(period_expr,total_vars)  
     else : 
-        pinedges['period'] = st7putils.compute(timset.period,total_vars)
-    # TODO: TIMINGSET fract
+        pinedges['period'] = expressions.evaluate(timset.period,total_vars) # Handles fract(...)
     for eb in timset.edgeblocks:
         for edge,expr in eb.edges.items(): 
             #print(eb.pins, edge,expr)
@@ -891,15 +951,123 @@ def eval_specset(tmo, specset,timingset,debug=False):
                 if pin in pinedges: pass
                 else: pinedges[pin] = OrderedDict()
                 if expr in total_vars: pinedges[pin][edge] = total_vars[expr]  # TODO: Make sure that exprs are striped before uploaded
-                else: pinedges[pin][edge] = st7putils.compute(expr,total_vars)
+                else: pinedges[pin][edge] = expressions.evaluate(expr,total_vars)
+
+    return EVAL_MEMO.put(tmo,memo_key,(total_vars,pinedges))
+
+# ----------------------------------------------------------------------------:
+class TimingMatrix(object): 
+    """ 
+    Dense results of `eval_eqnset_matrix`. Axis labels are held in the 
+    lists `specsets`, `timingsets`, `variables`, `pins` and `edges`. 
+
+    Attributes: 
+      vars   : array (specset, variable) of spec and equation values 
+      period : array (specset, timingset)
+      values : array (specset, timingset, pin, edge); NaN where a pin 
+               has no such edge within the timingset. 
+    """
+    def __init__(self,eqnset,specsets,timingsets,variables,pins,edges): 
+        self.eqnset     = eqnset
+        self.specsets   = specsets
+        self.timingsets = timingsets
+        self.variables  = variables
+        self.pins       = pins 
+        self.edges      = edges 
+        np = lazy.numpy()
+        self.vars   = np.zeros((len(specsets),len(variables)))
+        self.period = np.zeros((len(specsets),len(timingsets)))
+        self.values = np.full((len(specsets),len(timingsets),len(pins),len(edges)),np.nan)
+
+    def timingset(self,timingset): 
+        """Returns the (specset, pin, edge) array of a timingset."""
+        return self.values[:,self.timingsets.index(str(timingset))]
+
+    def get(self,specset,timingset,pin,edge): 
+        """Returns a single edge value."""
+        return self.values[self.specsets.index(str(specset)),
+                           self.timingsets.index(str(timingset)),
+                           self.pins.index(pin),self.edges.index(edge)]
+
+def eval_eqnset_matrix(tmo,eqnset,specsets=None,timingsets=None,debug=False): 
+    """ 
+    Batch counterpart of `eval_specset`: evaluates every SPECSET of an 
+    EQNSET against every TIMINGSET. The spec values are loaded into a 
+    (specset, spec) array; each equation, period and edge expression is 
+    then compiled once and evaluated column-wise over all specsets. 
+
+    Parameters: 
+      tmo : Timing object
+
+      eqnset : EQNSET integer identifier 
+
+      specsets : list, default = None 
+        SPECSET identifiers (eqnset*100 + specset). None selects all 
+        SPECSETs of the EQNSET. 
+
+      timingsets : list, default = None 
+        TIMINGSET identifiers. None selects all TIMINGSETs of the EQNSET.
 
-    return total_vars, pinedges
+    Returns: 
+      TimingMatrix
+    """
+    func = "st7p.timing.eval_eqnset_matrix"
+    np = lazy.numpy()
+    if np is None: raise RuntimeError("(%s): NumPy is required"%(func))
+    eqn = tmo.eqnsets[eqnset]
+    if specsets is None: 
+        specsets = [ss.name for ss in tmo.specsets if int(ss.eqnset) == int(eqnset)]
+    else: 
+        specsets = [str(ss) for ss in specsets]
+        for ss in specsets: 
+            if ss not in tmo.specsets.names(): 
+                raise RuntimeError("SPECSET '%s' is not contained within Timing object."%(ss))
+            if int(tmo.specsets[ss].eqnset) != int(eqnset): 
+                raise RuntimeError("SPECSET '%s' does not belong to EQNSET %s"%(ss,eqnset))
+    if timingsets is None: timingsets = [str(ts.name) for ts in eqn.timingsets]
+    else: timingsets = [str(ts) for ts in timingsets]
+    if debug: print("DEBUG: (%s): EQNSET %s: %s SPECSETs x %s TIMINGSETs"%(func,eqnset,len(specsets),len(timingsets)))
+
+    # Axis labels: pins and edges in order of first appearance
+    pins = OrderedDict(); edges = OrderedDict()
+    for ts in timingsets: 
+        for eb in eqn.timingsets[ts].edgeblocks: 
+            for pin in eb.pins: pins[pin] = None 
+            for edge in eb.edges: edges[edge] = None 
+    pins = list(pins.keys()); edges = list(edges.keys())
+    variables = list(eqn.specs.keys()) + [var for var in eqn.equations if var not in eqn.specs]
+    matrix = TimingMatrix(eqnset,specsets,timingsets,variables,pins,edges)
+    size = len(specsets)
+
+    # SPECS: (specset, spec) 
+    columns = OrderedDict()
+    for spec in eqn.specs: 
+        columns[spec] = np.array([float(tmo.specsets[ss].specs[spec].act) for ss in specsets])
+    # EQUATIONS: one column-wise evaluation per equation
+    for var, expr in eqn.equations.items(): 
+        columns[var] = expressions.compile_expr(expr).evaluate_array(columns,size=size)
+    for i, var in enumerate(variables): 
+        matrix.vars[:,i] = columns[var]
+
+    pin_index  = dict((pin,i) for i,pin in enumerate(pins))
+    edge_index = dict((edge,i) for i,edge in enumerate(edges))
+    for t, ts in enumerate(timingsets): 
+        timset = eqn.timingsets[ts]
+        matrix.period[:,t] = expressions.compile_expr(timset.period).evaluate_array(columns,size=size)
+        results = {} # [expr] -> column; edge expressions repeat heavily
+        for eb in timset.edgeblocks: 
+            rows = [pin_index[pin] for pin in eb.pins]
+            for edge, expr in eb.edges.items(): 
+                if expr not in results: 
+                    results[expr] = expressions.compile_expr(expr).evaluate_array(columns,size=size)
+                matrix.values[:,t,rows,edge_index[edge]] = results[expr][:,None]
+    return matrix 
     
        
     
     
 # -----------------------------------------------------:
-class PortSet(object):
+class PortSet(memo.Tracked):
     """
     ~SPECSET for each port w/in a Multi-port timing. 
     """
@@ -940,16 +1108,17 @@ class PortSet(object):
         return PortSet(port=psd['port'],wvtbl=psd['wvtbl'],eqnset=psd['eqnset'],sequence=psd['sequence'],phase=psd['phase'],check=psd['check'],specs=specs) 
      
         
-class PortSets(st7putils.Container): 
+class PortSets(memo.TrackedContainer,st7putils.Container): 
     def __init__(self): 
         super(PortSets,self).__init__()
     def add(self, portset): 
         super(PortSets,self).add(portset,PortSet)
+        memo.added(self,portset)
 # -----------------------------------------------------:  
     
 
 # ----------------------------------------------------------------------------:
-class SPECIFICATION(object): 
+class SPECIFICATION(memo.Tracked): 
     def __init__(self,name,check="all"): 
         self.name     = name 
         self.check    = check 
@@ -990,11 +1159,12 @@ class SPECIFICATION(object):
 
         return spf 
         
-class SPECIFICATIONS(st7putils.Container): 
+class SPECIFICATIONS(memo.TrackedContainer,st7putils.Container): 
     def __init__(self): 
         super(SPECIFICATIONS,self).__init__()
     def add(self, specification): 
         super(SPECIFICATIONS,self).add(specification,SPECIFICATION)
+        memo.added(self,specification)
 # ----------------------------------------------------------------------------:
 # ----------------------------------------------------------------------------:
 def clear_eqsp(ln,line): 
@@ -1004,7 +1174,7 @@ def clear_eqsp(ln,line):
     return 
 
 # ----------------------------------------------------------------------------:
-class SPEC(object):
+class SPEC(memo.Tracked):
     def __init__(self,name,actual,minimum,maximum,unit,comment): 
         self.name    = name 
         self.act     = actual  # float(actual)
@@ -1013,17 +1183,18 @@ class SPEC(object):
         self.unit    = unit
         self.comment = comment.strip() 
         
-class SPECS(st7putils.Container): 
+class SPECS(memo.TrackedContainer,st7putils.Container): 
     def __init__(self): 
         super(SPECS,self).__init__()
     def add(self, spec): 
         super(SPECS,self).add(spec,SPEC)
+        memo.added(self,spec)
         
 
     
 # ----------------------------------------------------------------------------:
 # ----------------------------------------------------------------------------:
-class SPECSET(object): 
+class SPECSET(memo.Tracked): 
     """SPECSET. Single-port timing setups."""
     def __init__(self,num,desc,eqnset,wvtbl,check="all",specs={},sfp=""):
         self.name   = "%s"%(int(eqnset)*100 + int(num))
@@ -1055,11 +1226,12 @@ class SPECSET(object):
         return SPECSET(num=ssd['specset'],desc=ssd['specset-desc'],wvtbl=ssd['wvtbl'],eqnset=ssd['eqnset'],check=ssd['check'],specs=specs) 
       
 
-class SPECSETS(st7putils.Container): 
+class SPECSETS(memo.TrackedContainer,st7putils.Container): 
     def __init__(self): 
         super(SPECSETS,self).__init__()
     def add(self, specset): 
         super(SPECSETS,self).add(specset,SPECSET)
+        memo.added(self,specset)
     def __getitem__(self,name): 
         return self.objects[str(name)]
 # -----------------------------------------------------: 
@@ -1099,7 +1271,7 @@ class PWIS(st7putils.Container):
         edges['recieve'] = OrderedDict()
         edges['order'] = []
 
-        xmode_syntax = re.findall("\{[\w\s\:\!]+\}",string)
+        xmode_syntax = "{" in string and RE_XMODE.search(string)
         
         
         if debug: print("DEBUG: (%s): Recieved: %s"%(func,string))
@@ -1188,48 +1360,11 @@ class PWFBlock(object):
         return len(self.pwis)
 # ----------------------------------------------------------------------------:
 # ----------------------------------------------------------------------------:
-class PWFBlocks(st7putils.Container): 
-
-    def __init__(self): 
-        super(PWFBlocks,self).__init__()
-        self._ids = [] 
-        self._ids_2_names = {}
-
+class PWFBlocks(blocks.PinBlockIndex,st7putils.Container): 
     def add(self,pwfb): 
+        self._index_pins(pwfb)
         super(PWFBlocks,self).add(pwfb,PWFBlock) 
-        self._ids.append(pwfb._id)
-        self._ids_2_names[pwfb._id] = pwfb.name
-
-    # TODO: Change get method? Rather than name namee...
-    # TODO: Need to make sure that there can be double defintions
-    # for a given pin within a waveformtable.
-    def __getitem__(self,entry): 
-        return self.get(entry)
-
-    def pins(self): 
-        """Return a list of all the pins referred to"""
-        pins = [] 
-        for pwfb in self.objects: 
-             pins.extend(self.objects[pwfb].pins)
-        return pins 
-
-    def get(self,entry):
-        if entry in self.objects: return self.objects[entry]
-        for pwfb in self.objects:
-            pins = pwfb.split() 
-            if entry in pins: return self.objects[pwfb]
-            else: continue 
-        raise RuntimeError("No entry for '%s'"%(entry))
-
-    def _get_next_id(self): 
-        if len(self._ids) == 0 : return 1
-        else: return int(self._ids[-1] + 1)
-
-    def contains(self,pin): 
-        for pwfb in self.objects: 
-            pins = pwfb.split()
-            if pin in pins: return self.objects[pwfb]
-        return None
+        self._index_id(pwfb)
 # ----------------------------------------------------------------------------:
 # ----------------------------------------------------------------------------:
 class WAVETBL(object):
@@ -1269,15 +1404,15 @@ class WAVETBLS(st7putils.Container):
         return "WAVETBLs: %d defined\nWAVETBLs: %s"%(len(self.objects),list(self.objects.keys()))
 # ----------------------------------------------------------------------------:
 # ----------------------------------------------------------------------------:
-class EQNSET(object): 
+class EQNSET(memo.Tracked): 
     def __init__(self,num,desc="",sfp=""):  
         self.name = num
         self.num  = num
         self.desc = desc
         self.sfp  = sfp # NOTE: present due to Timing Master File Setups
         self.ports      = [] # Should the default be '@'
-        self.specs      = OrderedDict()
-        self.equations  = OrderedDict() 
+        self.specs      = memo.TrackedDict()
+        self.equations  = memo.TrackedDict() 
         self.timingsets = TIMINGSETS()
 
     def add_spec(self,spec,unit=""): 
@@ -1292,11 +1427,12 @@ class EQNSET(object):
             retstr = "EQNSET %s"%(self.num)
         return retstr
 
-class EQNSETS(st7putils.Container): 
+class EQNSETS(memo.TrackedContainer,st7putils.Container): 
     def __init__(self): 
         super(EQNSETS,self).__init__()
     def add(self, eqnset): 
         super(EQNSETS,self).add(eqnset,EQNSET)
+        memo.added(self,eqnset)
 
     def __getitem__(self,name): 
         return self.objects[str(name)]
@@ -1305,7 +1441,7 @@ class EQNSETS(st7putils.Container):
 
 
 # ----------------------------------------------------------------------------:
-class TIMINGSET(object): 
+class TIMINGSET(memo.Tracked): 
     def __init__(self,num,desc="",period=""): 
         self.name = num
         self.num  = num
@@ -1313,20 +1449,21 @@ class TIMINGSET(object):
         self.period = period
         self.edgeblocks = EdgeBlocks() # TODO: IN Levels we call this pins block...
 # ----------------------------------------------------------------------------:
-class TIMINGSETS(st7putils.Container): 
+class TIMINGSETS(memo.TrackedContainer,st7putils.Container): 
     def __init__(self): 
         super(TIMINGSETS,self).__init__()
     def add(self, timingset): 
         super(TIMINGSETS,self).add(timingset,TIMINGSET)
+        memo.added(self,timingset)
     def __getitem__(self,name): 
         return self.objects[str(name)]
 # ----------------------------------------------------------------------------:
-class EdgeBlock(object): 
+class EdgeBlock(memo.Tracked): 
     def __init__(self,name,pins,ID=0):
         self.name = name # TODO: I believe the names and pins are the same.
         self.pins = pins   
         self._id  = ID # NOTE: The id is relative TIMINGSET
-        self.edges     = OrderedDict()
+        self.edges     = memo.TrackedDict()
     def update(self,edge,expr): 
         if edge in self.edges:
             raise RuntimeError("Double def for edge '%s'"%(edge)) 
@@ -1343,43 +1480,17 @@ class EdgeBlock(object):
         return len(self.edges)
     # TODO: The length should probably be reporting the number of pins
 # ----------------------------------------------------------------------------:
-class EdgeBlocks(st7putils.Container): 
-    def __init__(self): 
-        super(EdgeBlocks,self).__init__()
-        self._ids = [] 
-        self._ids_2_names = {}
+class EdgeBlocks(blocks.PinBlockIndex,memo.TrackedContainer,st7putils.Container): 
     def add(self,edgeblock): 
+        self._index_pins(edgeblock)
         super(EdgeBlocks,self).add(edgeblock,EdgeBlock) 
-        self._ids.append(edgeblock._id)
-        self._ids_2_names[edgeblock._id] = edgeblock.name
-    # TODO: Change get method? Rather than name namee...
-    # TODO: Need to make sure that there can be double defintions
-    # for a given pin within a waveformtable.
-    def __getitem__(self,entry): 
-        return self.get(entry)
-    def get(self,entry):
-        if entry in self.objects: return self.objects[entry]
-        for edgeblock in self.objects:
-            pins = edgeblock.split() 
-            if entry in pins: return self.objects[edgeblock]
-            else: continue 
-        raise RuntimeError("No entry for '%s'"%(entry))
-
-    def _get_next_id(self): 
-        if len(self._ids) == 0 : return 1
-        else: return int(self._ids[-1] + 1)
-
-    def pins(self): # TODO: Add functionality to PWFBlock 
-        """Return a list of all pins referenced within all edgeblocks"""
-        retlist = []
-        for edge in self.objects: 
-            retlist.extend(self.objects[edge].pins)
-        return retlist
+        memo.added(self,edgeblock)
+        self._index_id(edgeblock)
 # ----------------------------------------------------------------------------:
 
 
 # ----------------------------------------------------------------------------:
-class Timing(object): 
+class Timing(memo.Root): 
     def __init__(self,sfp="",debug=False): 
         if sfp:  
           _ = st7putils._93k_file_handler(sfp, "timing")
@@ -1420,6 +1531,11 @@ def __handle_cmdline_args():
     parser.add_argument("-debug", 
                         help="Increase console logging", 
                         action="store_true")
+    parser.add_argument("-strict", 
+                        help="Validate every line against its full regex", 
+                        action="store_true")
+    parser.add_argument("-workers", type=int, default=None,
+                        help="number of processes for master file entries (default: cpu count)")
     parser.add_argument("timing", help="timing file path")
     args = parser.parse_args()
     if not os.path.isfile(args.timing): 
@@ -1428,6 +1544,6 @@ def __handle_cmdline_args():
 # ----------------------------------------------------------------------------:
 if __name__ == "__main__": 
     args = __handle_cmdline_args()
-    obj = read(sfp=args.timing, debug=args.debug) 
+    obj = read(sfp=args.timing, debug=args.debug, strict=args.strict, workers=args.workers) 
     print("\nNOTE: If in interactive mode, use variable name 'obj' to"\
           " the parsed object.")
@@ -4,9 +4,11 @@ pattern-master-files (pmf) and various pattern-label-files
 (burst, binl, etc.). 
 
 """
-import os, sys, re, argparse
+import os, sys, re, argparse, mmap, bisect
+from array import array
 from collections import OrderedDict
 import st7putils
+from st7p import parallel, lazy # NOTE: NumPy is only used for bulk cycle counting; pure python fallback.
 
 # ----------------------------------------------------------------------------:
 # ----------------------------------------------------------------------------:
@@ -15,12 +17,12 @@ import st7putils
 # ----------------------------------------------------------------------------:
 # ----------------------------------------------------------------------------:
 
-RE_HP93000_VECTOR    = re.compile("^hp93000,vector,\d\.\d$")
-RE_HP93000_PMF       = re.compile("^hp93000,pattern_master_file,\d\.\d$")
-RE_DMAS              = re.compile("^DMAS (?P<area>\w+),(?P<mem>\w+),(?P<size>\d+),\((?P<port>[\@\w]+)\)")
-RE_SQLB              = re.compile("^SQLB ")
-RE_SQLB_FULL         = re.compile("^SQLB \"(?P<lbl>[\w]+)\",(?P<lbltype>\w+),(?P<start>\d+),(?P<stop>\d+),\"(?P<wvtbl>\w+)\",\((?P<port>[\@\w]+)\)")
-RE_SQPG              = re.compile("^SQPG (?P<cmdNo>\d+),(?P<instr>\w+),(?P<param1>\w*),(?P<param2>[\w\"]*),(?P<mem>\w*),\((?P<port>[\@\w]+)\)")
+RE_HP93000_VECTOR    = lazy.compile("^hp93000,vector,\d\.\d$")
+RE_HP93000_PMF       = lazy.compile("^hp93000,pattern_master_file,\d\.\d$")
+RE_DMAS              = lazy.compile("^DMAS (?P<area>\w+),(?P<mem>\w+),(?P<size>\d+),\((?P<port>[\@\w]+)\)")
+RE_SQLB              = lazy.compile("^SQLB ")
+RE_SQLB_FULL         = lazy.compile("^SQLB \"(?P<lbl>[\w]+)\",(?P<lbltype>\w+),(?P<start>\d+),(?P<stop>\d+),\"(?P<wvtbl>\w+)\",\((?P<port>[\@\w]+)\)")
+RE_SQPG              = lazy.compile("^SQPG (?P<cmdNo>\d+),(?P<instr>\w+),(?P<param1>\w*),(?P<param2>[\w\"]*),(?P<mem>\w*),\((?P<port>[\@\w]+)\)")
 
 
 # "The sequnecer program is contained in a sequencer area." TDC: 96570
@@ -64,9 +66,11 @@ class SequencerProgram(object):
         self.label   = label  
         self.label_type = label_type
         self.port    = port
-        self.program = OrderedDict() # [cmdNo] -> {cmd:"", <dic options dependentant on cmd tye>}
+        self.program = SequencerProgramColumns(port=port) # [cmdNo] -> {"instr":"", "param1":"", ...}
         self.vectors = 0 # TODO: Proper placement? 
         self.cycles  = 0 # TODO: Proper placement? 
+        self.cycle_offsets = None # Set by `count`; cumulative cycles per row
+        self.cycle_cmd_nos = None # Set when streaming; cmd number per cycle_offsets row
 
     def __len__(self): 
         return len(self.program)
@@ -75,26 +79,25 @@ class SequencerProgram(object):
     def add_call(self,port,cmdNo,label): 
         if port != self.port: 
            raise RuntimeError("Port mismatch: %s != %s"%(self.port,port))
-        self.program[cmdNo] = {"cmd":"CALL","label":label}
+        self.program.append(cmdNo,"CALL","",label,"")
+        self.cycle_offsets = None
    
     def add_bend(self,port,cmdNo): 
         if port != self.port: 
            raise RuntimeError("Port mismatch: %s != %s"%(self.port,port))
-        self.program[cmdNo] = {"cmd":"BEND"}
+        self.program.append(cmdNo,"BEND","","","")
+        self.cycle_offsets = None
 
     def first_cmd_num(self,): 
-        return list(self.program.keys())[0]
+        return self.program.cmd_nos[0]
 
     def last_cmd_num(self,): 
-        return list(self.program.keys())[-1]
+        return self.program.cmd_nos[-1]
 
 
     def dump(self,):
         for cmdno, cmd in self.program.items(): 
-            if cmd["cmd"] == "CALL": 
-                print("SQPG %s,CALL,,\"%s\",,(%s)"%(cmdno,cmd["label"],self.port))
-            if cmd["cmd"] == "BEND": 
-                print("SQPG %s, BEND,,,,(%s)"%(cmdno,self.port))
+            print("SQPG %s,%s,%s,%s,%s,(%s)"%(cmdno,cmd["instr"],cmd["param1"],cmd["param2"],cmd["memory"],self.port))
        
 
 
@@ -124,31 +127,97 @@ class SequencerProgram(object):
         for ln,sqpg in sqpg_lines.items():
             if ln < start: continue 
             if ln > stop:  continue 
-            cmdNo = sqpg['cmd_no']
-            cmd   = sqpg['instr']
-            param1 = sqpg["param1"]
-            param2 = sqpg["param2"]
-            memory = sqpg["memory"]
-            port   = sqpg["port"]
-            sqpg_line = "SQPG %s,%s,%s,%s,%s,(%s)"%(cmdNo,cmd,param1,param2,memory,port)
-
-            if port != self.port: 
-                raise RuntimeError("Port mismatch amongst Sequencer Program: %s != %s; %s"%(self.port,port,self.label))
-
-            self.program[cmdNo] = {"instr":cmd,"param1":param1,"param2":param2,"memory":memory,"port":port}
-            if   cmd == "STVA": pass
-            elif cmd == "STSA": pass
-            elif cmd == "GENV": 
-                self.vectors += int(param1) 
-                self.cycles  += int(param1)
-            elif cmd == "RPTV": 
-                self.vectors += int(param1) 
-                self.cycles  += int(param1) * int(param2)
-            elif cmd == "WAIT": pass
-            elif cmd == "CALL": pass
-            elif cmd == "STOP": break
+            if not self.add_sqpg(sqpg['cmd_no'],sqpg['instr'],sqpg["param1"],
+                                 sqpg["param2"],sqpg["memory"],sqpg["port"],
+                                 count=False): 
+                break
+        self.count()
         return 
 
+    def add_sqpg(self,cmdNo,cmd,param1,param2,memory,port,keep=True,count=True): 
+        """ 
+        Adds a single SQPG command to the sequencer program and updates the
+        `vectors` and `cycles` totals. 
+
+        Parameters: 
+          keep : bool, default = True
+            If False, the command itself is not stored within `program`. 
+            GENV/RPTV commands are then recorded in `cycle_cmd_nos` and 
+            `cycle_offsets` as they are counted, so `cmd_at_cycle` still 
+            works on streamed programs. 
+
+          count : bool, default = True 
+            If False, the totals are not updated. Used when the totals are 
+            computed in bulk by `count` once the program is complete.
+
+        Returns: 
+          False once a STOP command has been added, otherwise True. 
+        """
+        if port != self.port: 
+            raise RuntimeError("Port mismatch amongst Sequencer Program: %s != %s; %s"%(self.port,port,self.label))
+        if keep: 
+            self.program.append(cmdNo,cmd,param1,param2,memory)
+            self.cycle_offsets = None
+        if not count: 
+            if cmd == "STOP": return False
+            return True
+        if   cmd == "GENV": 
+            self.vectors += int(param1) 
+            self.cycles  += int(param1)
+        elif cmd == "RPTV": 
+            self.vectors += int(param1) 
+            self.cycles  += int(param1) * int(param2)
+        elif cmd == "STOP": return False
+        else: return True
+        if not keep: 
+            if self.cycle_cmd_nos is None: 
+                self.cycle_cmd_nos = array('q')
+                self.cycle_offsets = array('q')
+            self.cycle_cmd_nos.append(int(cmdNo))
+            self.cycle_offsets.append(self.cycles)
+        return True
+
+    def count(self,): 
+        """ 
+        Computes `vectors` and `cycles` from the stored program in bulk. The
+        GENV/RPTV params are taken as integer columns and reduced in one go
+        (with NumPy when available). The cumulative cycle count per command
+        is kept in `cycle_offsets`, which `cmd_at_cycle` searches. 
+
+        Programs streamed without keeping their commands keep the totals 
+        counted while streaming. 
+
+        Returns: 
+          tuple : (vectors, cycles)
+        """
+        if self.cycle_cmd_nos is not None and not len(self.program): 
+            return self.vectors, self.cycles
+        self.vectors, self.cycles, self.cycle_offsets = sqpg_cycle_offsets(self.program,label=self.label)
+        return self.vectors, self.cycles
+
+    def cmd_at_cycle(self,cycle): 
+        """ 
+        Returns the command number executing at the given cycle (zero based).
+        Commands not generating cycles (STVA, STOP, etc) are never returned.
+
+        Parameters: 
+          cycle : int 
+        """
+        if self.cycle_cmd_nos is not None and not len(self.program): 
+            cmd_nos = self.cycle_cmd_nos # Streamed, see `add_sqpg`
+        elif not len(self.program) and self.cycles: 
+            raise RuntimeError("Sequencer program of %s was not kept; cannot look up cycle %s"%(self.label,cycle))
+        else: 
+            if self.cycle_offsets is None: self.count()
+            cmd_nos = self.program.cmd_nos
+        if cycle < 0 or cycle >= self.cycles: 
+            raise RuntimeError("Cycle %s out of range [0,%s) for %s"%(cycle,self.cycles,self.label))
+        if isinstance(self.cycle_offsets,array): 
+            row = bisect.bisect_right(self.cycle_offsets,cycle)
+        else: 
+            row = int(lazy.numpy().searchsorted(self.cycle_offsets,cycle,side="right"))
+        return cmd_nos[row]
+
 class MAINLabel(object): 
     def __init__(self, sfp="",name="",port="",start="",stop=""):
         self.sfp   = sfp 
@@ -198,6 +267,15 @@ class MPBLabel(object):
     def get_port_names(self):
         return self.ports.names() 
 
+    def get_call_targets(self): 
+        """Returns the unique labels CALLed across all ports (quotes stripped)."""
+        targets = OrderedDict()
+        for port in self.ports: 
+            for cmdNo, sqpg in port.seq_prog.program.items(): 
+                if sqpg['instr'] == "CALL": 
+                    targets[sqpg['param2'].strip("\"")] = None
+        return list(targets.keys())
+
     def dump(self,): 
         print("MPBLabel.dump: Recreating %s"%(self.sfp))
         print("hp93000,vector,0.1")
@@ -214,8 +292,247 @@ SQPG_INSTRS = set(["BEND", "BRKV","CALL", "CLEV", "COGO", "CTIM",
 "MJPE","MRPT","NOP","PRBS","RETC","RGOP","RPTJ","RPTV","RSJP","RSUB","SRCV","SSRC","STOP","STSA",
 "STVA", "TMUA","WAIT","WTER","XACT"])
 
+# ============================================================================:
+# Compact sequencer program storage. 
+# 
+# A MAIN label can hold millions of SQPG commands, so rather than holding a 
+# dictionary per command, `SequencerProgramColumns` stores the commands 
+# column-wise in arrays: 
+#   - instructions are stored as opcodes, an index into SQPG_OPCODES. 
+#   - integer params are stored directly. Any other param (label names, 
+#     empty params, zero-padded numbers, values beyond int64) is interned 
+#     into the StringTable of the program and stored as a negative 
+#     reference (-1 - index). 
+#   - memory names are interned into the StringTable of the program. 
+# Each program owns its table, so its strings are freed along with it. The
+# strings themselves go through `sys.intern`, thus a label name CALLed from
+# thousands of bursts is still only stored once while any of them is alive.
+SQPG_OPCODES = sorted(SQPG_INSTRS)
+SQPG_OPCODE  = dict((instr,i) for i,instr in enumerate(SQPG_OPCODES))
+
+class StringTable(object): 
+    """Interns strings into integer references."""
+    def __init__(self): 
+        self.strings = []
+        self._index  = {}
+
+    def intern(self,string): 
+        idx = self._index.get(string)
+        if idx is None: 
+            idx = len(self.strings)
+            string = sys.intern(string)
+            self.strings.append(string)
+            self._index[string] = idx
+        return idx
+
+    def __getitem__(self,idx): 
+        return self.strings[idx]
+
+    def __len__(self): 
+        return len(self.strings)
+
+SQPG_INT_MAX = 2**63 - 1 # Largest param stored as an integer (array 'q')
 
+def _encode_sqpg_param(param,table): 
+    if param.isascii() and param.isdigit() and (param == "0" or not param.startswith("0")): 
+        value = int(param)
+        if value <= SQPG_INT_MAX: return value
+    return -1 - table.intern(param)
 
+def _decode_sqpg_param(value,table): 
+    if value >= 0: return str(value)
+    return table[-1 - value]
+
+class SequencerProgramColumns(object): 
+    """ 
+    Column-wise storage of the SQPG commands of a sequencer program. 
+
+    The class keeps the dictionary-style access of the former 
+    `SequencerProgram.program` OrderedDict: `program[cmdNo]` returns a 
+    dictionary with the keys "instr", "param1", "param2", "memory" and 
+    "port", and `keys`, `values`, `items`, `len` and `in` behave the same. 
+    The dictionaries are built on access and are not stored. 
+
+    Attributes: 
+      cmd_nos : array of the command numbers 
+      opcodes : array of indexes into SQPG_OPCODES 
+      param1  : array of encoded params (see `_encode_sqpg_param`) 
+      param2  : array of encoded params 
+      memory  : array of indexes into `table` 
+      table   : StringTable of the non-integer params and memory names 
+    """
+    def __init__(self,port=""): 
+        self.port    = port 
+        self.table   = StringTable()
+        self.cmd_nos = array('q')
+        self.opcodes = array('B')
+        self.param1  = array('q')
+        self.param2  = array('q')
+        self.memory  = array('l')
+        self._monotonic = True # cmd_nos are strictly increasing
+
+    def _row(self,cmdNo): 
+        """Returns the row of cmdNo or -1 if not present."""
+        if self._monotonic: 
+            i = bisect.bisect_left(self.cmd_nos,cmdNo)
+            if i < len(self.cmd_nos) and self.cmd_nos[i] == cmdNo: return i
+            return -1
+        try: return self.cmd_nos.index(cmdNo)
+        except ValueError: return -1
+
+    def append(self,cmdNo,instr,param1,param2,memory): 
+        """Adds a command. An existing command number is overwritten in place."""
+        cmdNo = int(cmdNo)
+        if instr not in SQPG_OPCODE: 
+            raise RuntimeError("bad instr '%s' for cmd %s"%(instr,cmdNo))
+        if self.cmd_nos and (not self._monotonic or cmdNo <= self.cmd_nos[-1]): 
+            i = self._row(cmdNo)
+            if i >= 0: 
+                self.opcodes[i] = SQPG_OPCODE[instr]
+                self.param1[i]  = _encode_sqpg_param(param1,self.table)
+                self.param2[i]  = _encode_sqpg_param(param2,self.table)
+                self.memory[i]  = self.table.intern(memory)
+                return 
+            self._monotonic = False
+        self.cmd_nos.append(cmdNo)
+        self.opcodes.append(SQPG_OPCODE[instr])
+        self.param1.append(_encode_sqpg_param(param1,self.table))
+        self.param2.append(_encode_sqpg_param(param2,self.table))
+        self.memory.append(self.table.intern(memory))
+
+    def instr(self,i): 
+        """Returns the instruction of row i."""
+        return SQPG_OPCODES[self.opcodes[i]]
+
+    def row(self,i): 
+        """Returns the command dictionary of row i."""
+        return {"instr"  : SQPG_OPCODES[self.opcodes[i]], 
+                "param1" : _decode_sqpg_param(self.param1[i],self.table), 
+                "param2" : _decode_sqpg_param(self.param2[i],self.table), 
+                "memory" : self.table[self.memory[i]], 
+                "port"   : self.port}
+
+    def __getitem__(self,cmdNo): 
+        i = self._row(cmdNo)
+        if i < 0: raise KeyError(cmdNo)
+        return self.row(i)
+
+    def __setitem__(self,cmdNo,cmd): 
+        self.append(cmdNo,cmd["instr"],cmd.get("param1",""),cmd.get("param2",""),cmd.get("memory",""))
+
+    def get(self,cmdNo,default=None): 
+        i = self._row(cmdNo)
+        if i < 0: return default
+        return self.row(i)
+
+    def __contains__(self,cmdNo): 
+        return self._row(cmdNo) >= 0
+
+    def __len__(self): 
+        return len(self.cmd_nos)
+
+    def __iter__(self): 
+        return iter(self.cmd_nos)
+
+    def keys(self): 
+        return list(self.cmd_nos)
+
+    def values(self): 
+        for i in range(len(self.cmd_nos)): 
+            yield self.row(i)
+
+    def items(self): 
+        for i in range(len(self.cmd_nos)): 
+            yield self.cmd_nos[i], self.row(i)
+
+    # When pickled, only the referenced strings are carried over; they 
+    # become the table of the loaded program. 
+    def __getstate__(self): 
+        local = StringTable()
+        table = self.table
+        def _relocal(value): 
+            if value >= 0: return value
+            return -1 - local.intern(table[-1 - value])
+        state = dict(self.__dict__)
+        del state["table"]
+        state["param1"] = array('q',[_relocal(v) for v in self.param1])
+        state["param2"] = array('q',[_relocal(v) for v in self.param2])
+        state["memory"] = array('l',[local.intern(table[v]) for v in self.memory])
+        state["strings"] = local.strings
+        return state
+
+    def __setstate__(self,state): 
+        table = StringTable()
+        for string in state.pop("strings"): table.intern(string)
+        self.__dict__.update(state)
+        self.table = table 
+
+
+
+
+# ----------------------------------------------------------------------------:
+def _sqpg_int_column(program,column,rows,label=""): 
+    """
+    Returns the decoded integer values of `column` at `rows`. Used for the 
+    few params that were interned as strings (e.g. zero padded numbers).
+    """
+    values = []
+    for i in rows: 
+        param = _decode_sqpg_param(column[i],program.table)
+        try: values.append(int(param))
+        except ValueError: 
+            raise RuntimeError("Non-integer GENV/RPTV param '%s' in %s"%(param,label))
+    return values
+
+def sqpg_cycle_offsets(program,label=""): 
+    """ 
+    Bulk vector and cycle accounting of a SequencerProgramColumns object. 
+    GENV adds param1 vectors and cycles; RPTV adds param1 vectors and 
+    param1 * param2 cycles. 
+
+    Returns: 
+      tuple : (vectors, cycles, offsets)
+        offsets[i] is the total cycle count once row i has been executed, 
+        thus row i runs cycles [offsets[i-1], offsets[i]). A numpy int64 
+        array when NumPy is available, otherwise array('q').
+    """
+    n = len(program)
+    genv = SQPG_OPCODE["GENV"]
+    rptv = SQPG_OPCODE["RPTV"]
+    np = lazy.numpy()
+    if np is None: 
+        offsets = array('q')
+        vectors = 0; cycles = 0
+        for i in range(n): 
+            op = program.opcodes[i]
+            if op == genv or op == rptv: 
+                p1 = program.param1[i]
+                if p1 < 0: p1 = _sqpg_int_column(program,program.param1,[i],label)[0]
+                vectors += p1
+                if op == genv: cycles += p1
+                else: 
+                    p2 = program.param2[i]
+                    if p2 < 0: p2 = _sqpg_int_column(program,program.param2,[i],label)[0]
+                    cycles += p1 * p2
+            offsets.append(cycles)
+        return vectors, cycles, offsets
+    if n == 0: return 0, 0, np.zeros(0,dtype=np.int64)
+    opcodes = np.frombuffer(program.opcodes,dtype=np.uint8)
+    is_genv = opcodes == genv
+    is_rptv = opcodes == rptv
+    p1 = np.frombuffer(program.param1,dtype=np.int64)
+    p2 = np.frombuffer(program.param2,dtype=np.int64)
+    # Interned (negative) params only need decoding where they are used: 
+    bad1 = np.flatnonzero((is_genv | is_rptv) & (p1 < 0))
+    bad2 = np.flatnonzero(is_rptv & (p2 < 0))
+    if bad1.size: 
+        p1 = p1.copy(); p1[bad1] = _sqpg_int_column(program,program.param1,bad1,label)
+    if bad2.size: 
+        p2 = p2.copy(); p2[bad2] = _sqpg_int_column(program,program.param2,bad2,label)
+    row_cycles = np.where(is_genv,p1,0) + np.where(is_rptv,p1*p2,0)
+    offsets = np.cumsum(row_cycles)
+    vectors = int(p1[is_genv | is_rptv].sum())
+    return vectors, int(offsets[-1]), offsets
 
 # ============================================================================:
 def process_dmas(line,ln=""): 
@@ -436,6 +753,145 @@ def nvidia_vector_file_read(sfp,debug=False):
 
 
     return main_label_obj, mpb_label_obj
+# ============================================================================:
+def iter_vector_records(sfp,debug=False): 
+    """ 
+    Generator that memory-maps a vector file and yields its records one at a
+    time. The file is scanned as bytes and no raw line text is kept, so the 
+    memory footprint does not depend on the size of the file. 
+
+    Yields: 
+      (ln, kind, record) 
+        ln     : int, line number within the vector file. 
+        kind   : string, one of "DMAS", "SQLB" or "SQPG". 
+        record : for "DMAS" and "SQLB" the dictionary returned by 
+                 `process_dmas` and `process_sqlb`. For "SQPG" a tuple of 
+                 (cmd_no, instr, param1, param2, memory, port). 
+
+    NOTE: Same as `nvidia_vector_file_read`, the running assumption is that 
+    there should not be any empty lines. If present, the file is done. 
+    """
+    func = "st7p.vectors.iter_vector_records"
+    with open(sfp,"rb") as fh: 
+        if os.fstat(fh.fileno()).st_size == 0: return 
+        mm = mmap.mmap(fh.fileno(),0,access=mmap.ACCESS_READ)
+        try: 
+            for ln, line in enumerate(iter(mm.readline,b""),start=1): 
+                line = line.strip()
+                if not line: break 
+                key = line[:4]
+                if key == b"SQPG": 
+                    sline = line[5:].decode("latin-1").split(",")
+                    if sline.__len__() != 6: 
+                        raise RuntimeError("Bad SQPG line: [%s] %s; %s"%(ln,line.decode("latin-1"),sfp))
+                    instr = sline[1]
+                    if instr not in SQPG_INSTRS: 
+                        raise RuntimeError("bad instr '%s': [%d] %s"%(instr,ln,line.decode("latin-1")))
+                    yield ln, "SQPG", (int(sline[0]),instr,sline[2],sline[3],sline[4],sline[5].strip("()"))
+                elif key == b"DMAS": 
+                    yield ln, "DMAS", process_dmas(ln=ln,line=line.decode("latin-1"))
+                elif key == b"SQLB": 
+                    yield ln, "SQLB", process_sqlb(ln=ln,line=line.decode("latin-1"))
+                elif key == b"STML" or key == b"SQLA": 
+                    continue 
+                elif RE_HP93000_VECTOR.search(line.decode("latin-1")): 
+                    continue 
+                else: raise RuntimeError("Unaccommodated line: [%s] %s; %s"%(ln,line.decode("latin-1"),sfp))
+        finally: 
+            mm.close()
+# ============================================================================:
+def nvidia_vector_file_stream(sfp,keep_program=False,debug=False): 
+    """ 
+    Streaming counterpart of `nvidia_vector_file_read`. Records are pulled 
+    from `iter_vector_records` and the sequencer programs, including their 
+    vectors and cycles totals, are built on the fly. 
+
+    Parameters: 
+      sfp : string 
+        Vector label file path. 
+
+      keep_program : bool, default = False 
+        If False, MAIN labels only accumulate the vectors and cycles totals
+        and `seq_prog.program` is left empty. MPBU sequencer programs are
+        always kept because they hold the CALL targets.
+
+    Returns: 
+      main_label_obj, mpb_label_obj : same as `nvidia_vector_file_read`. 
+    """
+    func = "st7p.vectors.nvidia_vector_file_stream"
+    if debug: print("DEBUG: (%s): Processing: %s"%(func,sfp))
+
+    dmas_list = []
+    sqlb_list = []
+    seq_progs = OrderedDict() # [port] -> SequencerProgram
+    main_label = False
+    mpb_label  = False 
+    num_of_sqpg = 0 
+
+    for ln, kind, record in iter_vector_records(sfp,debug=debug): 
+        if kind == "SQPG": 
+            cmdNo, instr, param1, param2, memory, port = record 
+            if port not in seq_progs: 
+                raise RuntimeError("SQPG before SQLB for port %s: [%s]; %s"%(port,ln,sfp))
+            num_of_sqpg += 1
+            keep = keep_program or mpb_label 
+            if not seq_progs[port].add_sqpg(cmdNo,instr,param1,param2,memory,port,keep=keep): 
+                if main_label: break 
+                else: raise RuntimeError("Only expecting SQPG STOP on main labels. %s"%(sfp))
+        elif kind == "DMAS": 
+            dmas_list.append(record)
+        elif kind == "SQLB": 
+            sqlb = record
+            if   sqlb['label-type'] == "MAIN": main_label = True
+            elif sqlb['label-type'] == "MPBU": mpb_label = True
+            else: raise RuntimeError("Bad SQLB label-type: [%d]: %s; %s"%(ln,sqlb['label-type'],sfp))
+            if sqlb['port'] in seq_progs: 
+                raise RuntimeError("Double SQLB for port %s: [%s]; %s"%(sqlb['port'],ln,sfp))
+            seq_progs[sqlb['port']] = SequencerProgram(label=sqlb['label'],port=sqlb['port'],
+                                                      label_type=sqlb['label-type'])
+            sqlb_list.append(sqlb)
+
+    if mpb_label == main_label: 
+        raise RuntimeError("MAIN and MPBU flags equal. That shouldnt be: %s"%(sfp))
+
+    main_label_obj = None
+    mpb_label_obj  = None
+    if main_label: 
+        if len(dmas_list) not in [2,3]: 
+            raise RuntimeError("Expecting two or three DMAS commands per MAIN label: %s"%(sfp))
+        port = ""
+        for dmas in dmas_list: 
+            if dmas['area'] == "MTST": continue 
+            if port: 
+                if dmas['port'] != port: raise RuntimeError("Port mismatch for MAIN label: %s!=%s; %s"%(dmas['port'],port,sfp))
+            else: port = dmas['port']
+        if len(sqlb_list) != 1: raise RuntimeError("Expecting exactly one SQLB command per MAIN label: %s"%(sfp))
+        sqlb = sqlb_list[0]
+        if sqlb['port'] != port: raise RuntimeError("Port mismatch for MAIN label: %s!=%s; %s"%(sqlb['port'],port,sfp))
+        start = sqlb['start-cmd'] 
+        stop  = sqlb['stop-cmd'] 
+        total_sqpg_cmds = int(stop) - int(start) + 1
+        if num_of_sqpg != total_sqpg_cmds: 
+            raise RuntimeError("Number of seq-program cmds off: %s != %s; %s"%(total_sqpg_cmds,num_of_sqpg,sfp))
+        main_label_obj = MAINLabel(sfp=sfp,port=port,start=start,stop=stop)
+        main_label_obj.seq_prog = seq_progs[port]
+
+    elif mpb_label: 
+        if len(dmas_list) != len(sqlb_list): 
+            raise RuntimeError("For MPB labels, we expect equal DMAS and SQLB commands: %s"%(sfp))
+        dmas_mems = {}
+        for dmas in dmas_list: 
+            dmas_mems[dmas['port']] = dmas['mem']
+        mpb_label_obj = MPBLabel(sfp=sfp)
+        for sqlb in sqlb_list: 
+            port = sqlb['port']
+            if port not in dmas_mems: 
+                raise RuntimeError("Port is missing from DMAS: %s, %s"%(port,sfp))
+            seq_prog = seq_progs[port]
+            mpb_label_obj.ports.add(Port(port=port,seq_size=len(seq_prog),mem=dmas_mems[port],sync_grp=sqlb['wf_or_sync']))
+            mpb_label_obj.ports[port].seq_prog = seq_prog
+
+    return main_label_obj, mpb_label_obj
           
         
 
@@ -855,9 +1311,8 @@ def read_pmf(sfp,debug=False):
             if line == "files:": flg_path=False; flg_files=True;  continue; 
             if flg_path: 
                 path = line 
-                if path in pmf._map.keys(): continue 
-                else: pmf._map[path] = []
-            if flg_files: pmf._map[path].append(line)
+                pmf.add_path(path)
+            if flg_files: pmf.add_file(path,line)
     #print(pmf._map)
     return pmf 
 
@@ -891,7 +1346,8 @@ class PMF(object):
         self._debug = debug
         if sfp:  self._abs_path, self._dd_path, self._filename = st7putils._93k_file_handler(sfp, "vectors")
         else:    self._abs_path = ""; self._dd_path = ""; self._filename = ""; 
-        self._map = OrderedDict()
+        self._map = OrderedDict() # [path] -> [files]; edit through `add_path`/`add_file`
+        self._index = None # See `build_index`, reset on every edit of `_map`
 
     def length(self): 
         """Returns the number of the patterns foudn in PMF"""
@@ -908,22 +1364,83 @@ class PMF(object):
     def paths(self): 
         """Return all paths referenced"""
         return self._map.keys()
-    def get(self,filename, ddpath = ""): 
+
+    def add_path(self,path): 
+        """Adds a search path (no-op if present)."""
+        if path in self._map: return 
+        self._map[path] = []
+        self._index = None 
+
+    def add_file(self,path,fyle): 
+        """Adds the file `fyle` to the search path `path`."""
+        self.add_path(path)
+        self._map[path].append(fyle)
+        self._index = None 
+
+    def invalidate_index(self): 
+        """Drops the label index. Needed after editing `_map` directly."""
+        self._index = None 
+    def build_index(self,): 
         """
-        Return a list of all paths+files that match filename. 
-        Note, this method returns a list of concatenated paths/files
-        for each filename match. 
+        Builds the label index: base name (suffix stripped) -> entries, 
+        where entries is the list of (path, file) in PMF order. When any 
+        entry is a .burst/.binl file, the first of those is the only entry 
+        kept, same as the priority rule of the regex `get`. 
+        """
+        index = OrderedDict()
+        for path, files in self._map.items(): 
+            for fyle in files: 
+                name = fyle.split(".")[0]
+                entries = index.get(name)
+                if entries is None: 
+                    index[name] = [(path,fyle)]
+                    continue 
+                if entries[0][1].endswith((".burst",".binl")): continue # Priority entry found
+                if fyle.endswith((".burst",".binl")): index[name] = [(path,fyle)]
+                else: entries.append((path,fyle))
+        self._index = index 
+        return index 
+
+    def _get_index(self,): 
+        if getattr(self,"_index",None) is None: self.build_index()
+        return self._index 
+
+    @staticmethod
+    def _join(path,fyle,ddpath=""): 
+        pathfile = path.rstrip("/") + "/" + fyle
+        if ddpath and path.startswith("../"): 
+            pathfile = pathfile.replace('../', ddpath + "/")
+        return pathfile 
+
+    def get(self,filename, ddpath = "", regex = False): 
+        """
+        Return a list of all paths+files whose base name (suffix stripped)
+        is filename. If a .burst or .binl file exists for the name, only 
+        that file is returned. Lookups use the index of `build_index`. 
 
         Option 'ddpath' stands for device-directory path, and it 
         will replace the prefix '../' on paths with its value.
 
+        Option 'regex' selects the former slow path: filename is compiled
+        as a regex and searched within every file name of the PMF. 
+
+        NOTE: Because the testflow file leaves the suffix off, the suffix 
+        is not part of the index key. 
+        """
+        if regex: return self.get_regex(filename,ddpath)
+        entries = self._get_index().get(filename,[])
+        return [self._join(path,fyle,ddpath) for path, fyle in entries]
+
+    def get_regex(self,filename, ddpath = ""): 
+        """
+        Return a list of all paths+files that match filename. 
+        Note, this method returns a list of concatenated paths/files
+        for each filename match. 
+
         NOTE: The filename is directly fed into a regex pattern. 
         Thus the expectation is that the file name consists only
         of aphlanumeric values, or the user knows that the string
         is a regex and creates it correctly.
-
-        NOTE: Because the testflow file leaves the suffix off, we 
-        simply match from the start of the file
         """
         pathsfiles = []
         RE_MATCHER = re.compile(filename)
@@ -934,17 +1451,82 @@ class PMF(object):
 
         for path, files in self._map.items(): 
             for fyle in files: 
-                fyleWOSuffix = fyle.split(".")[0]
                 if RE_MATCHER.search(fyle): 
-                    pathsfiles.append(path.rstrip("/") + "/" + fyle)
-                    if ddpath and path.startswith("../"): 
-                        pathsfiles[-1] = pathsfiles[-1].replace('../', ddpath + "/")
+                    pathsfiles.append(self._join(path,fyle,ddpath))
                     if RE_FILE_BURST.search(fyle): return [pathsfiles[-1]]
                     if RE_FILE_BINL.search(fyle) : return [pathsfiles[-1]]
         return pathsfiles 
 
+    def _label_files(self,ddpath=""): 
+        """
+        Returns an OrderedDict of label-name (suffix stripped) to file path,
+        i.e. the first index entry of each name.
+        """
+        files = OrderedDict()
+        for name, entries in self._get_index().items(): 
+            path, fyle = entries[0]
+            files[name] = self._join(path,fyle,ddpath)
+        return files 
+
+    def parse_all(self,labels=None,workers=None,ddpath="",keep_program=False,cache=None,debug=False): 
+        """
+        Parses label files over a pool of processes. 
+
+        Labels CALLed by parsed MPBU labels are pulled in as well. Each 
+        label file is parsed once, no matter how many MPBU labels CALL it. 
+
+        Parameters: 
+          labels : list, default = None 
+            Label names (no suffix) to parse, e.g. from the testflow. If 
+            None, all labels in the PMF are parsed. 
+
+          workers : int, default = None 
+            Number of processes. None uses os.cpu_count(); 1 parses within 
+            the current process. 
 
+          ddpath : string, default = "" 
+            Replaces the '../' prefix on PMF paths. Defaults to the device 
+            directory of the PMF. 
 
+          keep_program : bool, default = False
+            Passed to `nvidia_vector_file_stream`. 
+
+          cache : st7p.cache.ParseCache, default = None 
+            If given, labels are read through the cache. Cached labels 
+            always keep their sequencer programs. 
+
+        Returns: 
+          OrderedDict : [label-name] -> MAINLabel or MPBLabel
+        """
+        func = "st7p.vectors.PMF.parse_all"
+        if not ddpath: ddpath = self._dd_path
+        files = self._label_files(ddpath)
+        if labels is None: pending = list(files.keys())
+        else: 
+            pending = list(OrderedDict.fromkeys(labels))
+            for label in pending: 
+                if label not in files: raise RuntimeError("Label not found in PMF: %s"%(label))
+        if workers is None: workers = os.cpu_count() or 1
+        if debug: print("DEBUG: (%s): %s labels, %s workers"%(func,len(pending),workers))
+
+        results = OrderedDict()
+        while pending: 
+            tasks = [(files[label],keep_program,cache) for label in pending]
+            objs = parallel.parallel_map(_parse_label_file,tasks,workers)
+            calls = OrderedDict()
+            for label, obj in zip(pending,objs): 
+                results[label] = obj
+                if isinstance(obj,MPBLabel): 
+                    for target in obj.get_call_targets(): calls[target] = None 
+            pending = []
+            for target in calls: 
+                if target in results: continue 
+                if target not in files: 
+                    print("WARNING: (%s): CALL target not found in PMF: %s"%(func,target))
+                    continue 
+                pending.append(target)
+            if debug and pending: print("DEBUG: (%s): %s CALLed labels"%(func,len(pending)))
+        return results 
 
     def summary(self,mask=False): 
         """ 
@@ -967,6 +1549,16 @@ class PMF(object):
         return 
 
 # ----------------------------------------------------------------------------:
+def _parse_label_file(task): 
+    """Process pool worker of `PMF.parse_all`. task = (sfp, keep_program, cache)"""
+    sfp, keep_program, cache = task
+    if cache is not None: 
+        main_label_obj, mpb_label_obj = cache.read_label(sfp)
+    else: 
+        main_label_obj, mpb_label_obj = nvidia_vector_file_stream(sfp,keep_program=keep_program)
+    if main_label_obj is not None: return main_label_obj
+    return mpb_label_obj
+# ----------------------------------------------------------------------------:
 def __handle_cmdline_args(): 
     parser = argparse.ArgumentParser()
     parser.add_argument("--debug", 
@@ -0,0 +1,20 @@
+"""
+Puts the repository root on sys.path, so the tests import the package
+(`from st7p import timing`) whether or not it is installed.
+"""
+import os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path: sys.path.insert(0,ROOT)
+
+import pytest
+from st7p import bench
+
+# Small sizes for the bench generators, shared by the tests. 
+SIZES = dict(pins=8,sites=2,groups=8,supplies=2,eqnsets=2,timingsets=2,levelsets=2,
+             wavetables=2,specsets=2,specifications=1,suites=60,labels=3,sqpg=300,ports=2)
+
+@pytest.fixture(scope="session")
+def device_dir(tmp_path_factory): 
+    """Synthetic device directory written by `bench.generate`: [kind] -> file path."""
+    return bench.generate(str(tmp_path_factory.mktemp("device")),**SIZES)
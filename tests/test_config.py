@@ -0,0 +1,58 @@
+import re
+from st7p import bench, config
+
+def _config_file(tmp_path,extra=()):
+    lines = list(bench.config_lines(pins=4,sites=2,groups=2,supplies=1)) + list(extra)
+    return bench._write(str(tmp_path / "pins.cfg"),lines)
+
+def test_reused_channel_keeps_first_pin(tmp_path,capsys):
+    # Channel 100000 is p0 on site 1; p1 claims it on site 2 afterwards.
+    cfo = config.read(_config_file(tmp_path,["PALS 2,100000,,(p1)"]))
+    assert cfo.get_channel(100000) == ("p0",1)
+    assert cfo.get_channel(200001) == ("",0)
+    assert cfo.channel_conflicts() == [(100000,"p1",2)]
+    warnings = [line for line in capsys.readouterr().out.splitlines() if line.startswith("WARNING")]
+    assert len(warnings) == 1
+    assert "site 2 for pin p1" in warnings[0]
+
+def test_released_channel_goes_to_next_pin(tmp_path):
+    cfo = config.read(_config_file(tmp_path,["PALS 2,100000,,(p1)","PALS 1,100009,,(p0)"]))
+    assert cfo.get_channel(100000) == ("p1",2)
+    assert cfo.get_channel(100009) == ("p0",1)
+    assert cfo.channel_conflicts() == []
+    cfo.reindex()
+    assert cfo.get_channel(100000) == ("p1",2)
+    assert cfo.channel_conflicts() == []
+
+def _dfge_config(tmp_path,groups):
+    lines = ["hp93000,config,0.1","PSTE 1"]
+    lines += ['DFPN %d,"%d",(%s)'%(10001 + i,i,name) for i, name in enumerate("abcd")]
+    lines += ["DFGP I,(a,b,c),(g1)","DFGP I,(c,d),(g2)"]
+    lines += ['DFGE I,"%s",(%s)'%(expr,name) for name, expr in groups]
+    return config.read(bench._write(str(tmp_path / "dfge.cfg"),lines))
+
+def test_dfge_algebra(tmp_path):
+    cfo = _dfge_config(tmp_path,[("x","g1*g2+a"),("y","g1 - g2"),("z","(g1+g2)*g2-d"),
+                                 ("w","g1+d-g2*g1"),("v","x+d")])
+    assert cfo.groups["x"].pins == ["a","c"]     # '*' binds tighter than '+'
+    assert cfo.groups["y"].pins == ["a","b"]
+    assert cfo.groups["z"].pins == ["c"]
+    assert cfo.groups["w"].pins == ["a","b","d"] # g1 + d - (g2*g1)
+    assert cfo.groups["v"].pins == ["a","c","d"] # DFGE of a DFGE
+    assert config.eval_dfge("d+a",cfo) == ["a","d"] # pin (DFPN) order
+
+def test_generated_dfge_groups(device_dir):
+    # The generated DFGE groups are '+'/'-' chains of DFGP groups and pins,
+    # applied left to right.
+    cfo = config.read(device_dir["config"])
+    order = cfo.pins.names()
+    with open(device_dir["config"]) as fh: 
+        dfges = [line for line in fh.read().splitlines() if line.startswith("DFGE")]
+    assert dfges
+    for line in dfges: 
+        expr, name = line.split('"')[1], line.rsplit("(",1)[1].rstrip(")")
+        pins = set()
+        for op, term in re.findall(r"([+-])([\w/]+)","+" + expr): 
+            members = set(cfo.groups[term].pins) if term in cfo.groups else set([term])
+            pins = pins | members if op == "+" else pins - members
+        assert cfo.groups[name].pins == [pin for pin in order if pin in pins]
@@ -0,0 +1,56 @@
+import pytest
+from st7p import bench, levels, memo, timing
+
+@pytest.fixture
+def tim_sfp(device_dir): 
+    return device_dir["timing"]
+
+@pytest.fixture
+def lev_sfp(device_dir): 
+    return device_dir["levels"]
+
+def test_other_objects_do_not_invalidate(tim_sfp): 
+    timing.EVAL_MEMO.clear()
+    tmo = timing.read(tim_sfp)
+    timing.eval_specset(tmo,"101","1")
+    other = timing.read(tim_sfp)
+    other.specsets["101"].specs["per"].act = "50"
+    timing.eval_specset(tmo,"101","1")
+    assert timing.EVAL_MEMO.hits == 1
+    assert timing.eval_specset(other,"101","1")[1]["period"] == 50.0
+    assert timing.eval_specset(tmo,"101","1")[1]["period"] == 6.0
+
+def test_nested_changes_invalidate(tim_sfp): 
+    tmo = timing.read(tim_sfp)
+    edgeblock = list(tmo.eqnsets["1"].timingsets["1"].edgeblocks)[0]
+    assert "new_pin" not in timing.eval_specset(tmo,"101","1")[1]
+    edgeblock.pins.append("new_pin")
+    assert timing.eval_specset(tmo,"101","1")[1]["new_pin"]["d1"] == pytest.approx(0.1)
+    edgeblock.edges["d1"] = "t_r"
+    assert timing.eval_specset(tmo,"101","1")[1]["new_pin"]["d1"] == pytest.approx(0.6)
+    tmo.eqnsets["1"].equations["half"] = "per/3"
+    assert timing.eval_specset(tmo,"101","1")[1]["p0"]["d2"] == pytest.approx(2.0 + 0.1)
+
+def test_levels_setting_change_invalidates(lev_sfp): 
+    lvo = levels.read(lev_sfp)
+    pinblock = list(lvo.eqnsets["1"].levelsets["1"].pinblocks)[0]
+    # SPECSET 101: vcc = 1.05 
+    assert levels.eval_specset(lvo,"101","1")[1]["pins"]["p0"]["vih"] == pytest.approx(1.05*0.8 + 0.01)
+    pinblock.settings["vih"] = "vcc"
+    assert levels.eval_specset(lvo,"101","1")[1]["pins"]["p0"]["vih"] == pytest.approx(1.05)
+
+def test_results_are_read_only(tim_sfp): 
+    tmo = timing.read(tim_sfp)
+    total_vars, pinedges = timing.eval_specset(tmo,"101","1")
+    with pytest.raises(TypeError): pinedges["period"] = 0
+    with pytest.raises(TypeError): pinedges["p0"]["d1"] = 0
+    copy = memo.copy_result(pinedges)
+    copy["p0"]["d1"] = 0
+    assert timing.eval_specset(tmo,"101","1")[1]["p0"]["d1"] == pytest.approx(0.1)
+
+def test_debug_uses_memo(tim_sfp): 
+    timing.EVAL_MEMO.clear()
+    tmo = timing.read(tim_sfp)
+    first = timing.eval_specset(tmo,"101","1",debug=True)
+    assert timing.eval_specset(tmo,"101","1",debug=True) is first
+    assert timing.EVAL_MEMO.hits == 1
@@ -0,0 +1,107 @@
+import pickle
+import pytest
+from st7p import bench, testflow
+
+def _flow(lines): 
+    return testflow.build_flow(testflow.tokenize_flow(["test_flow","  {"] + lines + ['  }, open,"top", ""']))
+
+def _ptrs(flow,name): 
+    node = flow.get(flow.nodes.ids(name)[0])
+    return ([flow.get(ID).name for ID in node.pass_ptr], [flow.get(ID).name for ID in node.fail_ptr])
+
+def test_group_trailer_after_loop_body(): 
+    flow = _flow(["    run(E);",
+                  "    for @i = 0; @i < 3; @i = @i + 1; do",
+                  "    test_number_loop_increment = 0",
+                  "    {",
+                  "      run(F);",
+                  '    }, open, "loop", ""',
+                  "    run(G);"])
+    assert [grp.name for grp in flow.groups] == ["top","loop"]
+    assert sorted(_ptrs(flow,"E")[0]) == ["F","G"]
+    assert _ptrs(flow,"F") == (["G"],["G"])
+    assert _ptrs(flow,"G") == ([],[])
+
+def test_group_trailer_after_then_block(): 
+    flow = _flow(["    run_and_branch(H)",
+                  "    then",
+                  "    {",
+                  "      run(I);",
+                  '    }, open, "then", ""',
+                  "    else",
+                  "    {",
+                  "      run(K);",
+                  "    }",
+                  "    run(J);"])
+    assert _ptrs(flow,"H") == (["I"],["K"])
+    assert _ptrs(flow,"I") == (["J"],["J"])
+    assert _ptrs(flow,"K") == (["J"],["J"])
+
+def test_generated_flow_links_every_suite(tmp_path): 
+    sfp = bench.gen_testflow(str(tmp_path),suites=500)
+    flow = testflow.read(sfp).flow
+    assert len(flow.nodes) == 500
+    assert [flow.get(ID).name for ID in flow.entry] == ["ts_1"]
+    for i in range(1,500): 
+        nxt = ["ts_%d"%(i+1)]
+        # Every third suite is a run_and_branch whose else block stops the flow.
+        assert _ptrs(flow,"ts_%d"%(i)) == (nxt, [] if i % 3 == 0 else nxt)
+    # The fifth group of 100 suites is a groupbypass. 
+    assert not flow.is_bypassed("ts_400")
+    assert flow.is_bypassed("ts_401")
+
+def test_same_suite_in_both_branches(): 
+    flow = _flow(["    if @VAR1 == 1 then",
+                  "    {",
+                  "      run(A);",
+                  "    }",
+                  "    else",
+                  "    {",
+                  "      run(A);",
+                  "    }",
+                  "    run(B);"])
+    then_node, else_node = [flow.get(ID) for ID in flow.nodes.ids("A")]
+    assert flow.entry == [then_node._id, else_node._id]
+    assert then_node.pass_ptr == else_node.pass_ptr == flow.nodes.ids("B")
+
+def test_groups_of_the_same_name(): 
+    flow = _flow(["    {",
+                  "      run(A);",
+                  '    }, groupbypass, open, "G", ""',
+                  "    {",
+                  "      run(B);",
+                  '    }, open, "G", ""'])
+    assert [grp.name for grp in flow.groups] == ["top","G","G"]
+    assert len(flow.groups.ids("G")) == 2
+    assert flow.is_bypassed("A")
+    assert not flow.is_bypassed("B")
+
+def test_read_keeps_repeated_suites_and_groups(tmp_path): 
+    lines = list(bench.testflow_lines(suites=7))
+    # The first `if` runs ts_2 in both branches; grp_1 is renamed to top.
+    k = lines.index('       print_dl("x");')
+    lines[k] = "       run(ts_2);"
+    lines.insert(k+4,"       run(ts_2);") # within the empty else block
+    lines = [line.replace('"grp_1"','"top"') for line in lines]
+    sfp = bench._write(str(tmp_path / "testflow" / "tf"),lines)
+    tfo = testflow.read(sfp)
+    assert len(tfo.flow.nodes.ids("ts_2")) == 3
+    assert len(tfo.flow.groups.ids("top")) == 2
+    then_node, else_node, node = [tfo.flow.get(ID) for ID in tfo.flow.nodes.ids("ts_2")]
+    assert then_node.pass_ptr == else_node.pass_ptr == [node._id]
+    assert not tfo.tss["ts_2"].is_bypassed()
+
+def test_unique_queries_share_read_only_views(tmp_path): 
+    tfo = testflow.read(bench.gen_testflow(str(tmp_path),suites=60))
+    labels = tfo.get_unique_labels()
+    assert tfo.get_unique_labels() is labels
+    assert all(isinstance(tsnames,tuple) for tsnames in labels.values())
+    with pytest.raises(TypeError): labels["x"] = ()
+    assert tfo.tss.count_unique("labels") == len(labels)
+    ts = testflow.TestSuite("ts_new",settings={})
+    tfo.tss.add(ts)
+    ts.add_setting("override_seqlbl",'"new_label"')
+    assert tfo.get_unique_labels() is not labels
+    assert tfo.get_unique_labels()[ts.get_label()] == ("ts_new",)
+    copy = pickle.loads(pickle.dumps(tfo.tss))
+    assert dict(copy._query("labels")) == dict(tfo.get_unique_labels())
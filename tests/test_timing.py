@@ -0,0 +1,33 @@
+import pytest
+from st7p import bench, timing
+
+def _timing_file(tmp_path,comments=False):
+    sfp = bench.gen_timing(str(tmp_path),pins=8,eqnsets=2,timingsets=2,wavetables=2,specsets=2,specifications=1)
+    if not comments: return sfp
+    with open(sfp) as fh: lines = fh.read().splitlines()
+    lines = [line + "  # the period" if line.startswith("period =") else
+             line + "  # drive on"   if line.startswith("d1 =")     else line for line in lines]
+    return bench._write(str(tmp_path / "commented.tim"),lines)
+
+@pytest.mark.parametrize("strict", [False, True])
+def test_trailing_comments_on_period_and_edges(tmp_path,strict):
+    plain     = timing.read_timing_file(_timing_file(tmp_path),strict=strict)
+    commented = timing.read_timing_file(_timing_file(tmp_path,comments=True),strict=strict)
+    timset = commented.eqnsets["1"].timingsets["1"]
+    assert timset.period.strip() == "per"
+    for specset in ["101","102","201","202"]:
+        for timingset in ["1","2"]:
+            timing.EVAL_MEMO.clear()
+            expected = timing.eval_specset(plain,specset,timingset)[1]
+            timing.EVAL_MEMO.clear()
+            assert timing.eval_specset(commented,specset,timingset)[1] == expected
+
+def test_eval_specset_values(tmp_path):
+    tmo = timing.read_timing_file(_timing_file(tmp_path,comments=True))
+    timing.EVAL_MEMO.clear()
+    pinedges = timing.eval_specset(tmo,"101","2")[1]
+    # SPECSET 1: per = 6, t_d = 0.1, t_r = 0.6
+    assert pinedges["period"] == 6.0
+    assert pinedges["p0"]["d1"] == pytest.approx(0.1)
+    assert pinedges["p0"]["d2"] == pytest.approx(3.0 + 0.1*2)
+    assert pinedges["p0"]["r1"] == pytest.approx(3.6)
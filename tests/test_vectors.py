@@ -0,0 +1,71 @@
+import os
+import pytest
+from st7p import bench, vectors
+
+@pytest.fixture
+def main_label(device_dir):
+    return os.path.join(os.path.dirname(device_dir["vectors"]),"main_0.binl")
+
+def test_streamed_cmd_at_cycle_matches_kept_program(main_label):
+    streamed = vectors.nvidia_vector_file_stream(main_label)[0].seq_prog
+    kept     = vectors.nvidia_vector_file_stream(main_label,keep_program=True)[0].seq_prog
+    assert len(streamed) == 0
+    assert (streamed.vectors, streamed.cycles) == (kept.vectors, kept.cycles)
+    for cycle in range(kept.cycles): 
+        assert streamed.cmd_at_cycle(cycle) == kept.cmd_at_cycle(cycle)
+    # SQPG 0 is STVA and never returned; SQPG 1 is `GENV 2`.
+    assert streamed.cmd_at_cycle(0) == 1
+    assert streamed.cmd_at_cycle(2) == 2
+    with pytest.raises(RuntimeError): streamed.cmd_at_cycle(kept.cycles)
+
+def test_count_keeps_streamed_totals(main_label):
+    seq_prog = vectors.nvidia_vector_file_stream(main_label)[0].seq_prog
+    totals = (seq_prog.vectors, seq_prog.cycles)
+    assert totals[1] > 0
+    assert seq_prog.count() == totals
+    assert (seq_prog.vectors, seq_prog.cycles) == totals
+
+def test_program_not_kept(main_label):
+    seq_prog = vectors.SequencerProgram(label="main_0",port="pA")
+    seq_prog.cycles = 10
+    with pytest.raises(RuntimeError, match="not kept"): seq_prog.cmd_at_cycle(1)
+
+def test_programs_own_their_string_table(main_label):
+    import pickle
+    first  = vectors.nvidia_vector_file_stream(main_label,keep_program=True)[0].seq_prog.program
+    second = vectors.nvidia_vector_file_stream(main_label,keep_program=True)[0].seq_prog.program
+    assert first.table is not second.table
+    copy = pickle.loads(pickle.dumps(first))
+    assert copy.table is not first.table
+    assert list(copy.values()) == list(first.values())
+
+def test_params_beyond_int64_are_kept_as_strings():
+    program = vectors.SequencerProgramColumns(port="pA")
+    params = ["9223372036854775807","9223372036854775808","12345678901234567890123","\u00b2","\u0661\u0662","007"]
+    for cmdNo, param in enumerate(params): 
+        program.append(cmdNo,"GENV",param,"",param)
+    assert program.param1[0] == 2**63 - 1
+    assert [program[cmdNo]["param1"] for cmdNo in range(len(params))] == params
+    assert len(program.table) == len(params) + 1 # the memory names and the empty param2
+
+def test_streamed_labels_of_generated_pmf(device_dir):
+    pmf = vectors.read(device_dir["vectors"])
+    streamed = pmf.parse_all(workers=1)
+    kept     = pmf.parse_all(workers=1,keep_program=True)
+    assert list(streamed) == list(kept) == ["main_0","main_1","main_2","burst_0"]
+    for name in ["main_0","main_1","main_2"]: 
+        seq_prog, expected = streamed[name].seq_prog, kept[name].seq_prog
+        assert (seq_prog.vectors, seq_prog.cycles) == (expected.vectors, expected.cycles)
+        for cycle in range(0,expected.cycles,7): 
+            assert seq_prog.cmd_at_cycle(cycle) == expected.cmd_at_cycle(cycle)
+
+def test_pmf_index_follows_edits(device_dir):
+    pmf = vectors.read(device_dir["vectors"])
+    assert pmf.get("main_0") == ["../vectors/main_0.binl"]
+    pmf.add_file("../other","extra.binl")
+    assert pmf.get("extra") == ["../other/extra.binl"]
+    # Replacing a file keeps the number of files.
+    pmf._map["../vectors"][0] = "renamed.binl"
+    pmf.invalidate_index()
+    assert pmf.get("main_0") == []
+    assert pmf.get("renamed") == ["../vectors/renamed.binl"]